@@ -0,0 +1,154 @@
+"""
+Concurrent conversations per worker: blocking graph vs async graph.
+
+Every chain the graph calls is replaced by a fake with a fixed latency
+(time.sleep for invoke, asyncio.sleep for ainvoke) and the retriever by a
+fixed list of documents, so the numbers isolate how the execution model
+handles LLM wait time. A RAG turn makes 5 sequential LLM waits (route,
+grading batch, generate, hallucination grade, answer grade).
+
+The blocking graph serves one conversation per worker thread at a time; the
+async graph serves all of them from a single event loop.
+
+Usage:
+    python -m benchmarks.bench_async_graph --sessions 50 --latency 0.2
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List
+
+# The chains build their chat model clients at import; all of them are replaced below
+os.environ.setdefault("OPENAI_API_KEY", "sk-placeholder")
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun  # noqa: E402
+from langchain_core.documents import Document  # noqa: E402
+from langchain_core.retrievers import BaseRetriever  # noqa: E402
+from langchain_core.runnables import RunnableLambda  # noqa: E402
+
+import src.graph as graph  # noqa: E402
+from src.chains.answer_grader import GradeAnswer  # noqa: E402
+from src.chains.generation_grader import GradeGeneration  # noqa: E402
+from src.chains.hallucination_grader import GradeHallucinations  # noqa: E402
+from src.chains.retrieval_grader import GradeDocuments  # noqa: E402
+from src.chains.router import RouteQuery  # noqa: E402
+
+DOCUMENTS = [Document(page_content=f"Category: Test\nQuestion: q{i}\nAnswer: a{i}") for i in range(3)]
+
+
+class FixedRetriever(BaseRetriever):
+    latency: float = 0.0
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun, categories=None
+    ) -> List[Document]:
+        time.sleep(self.latency)
+        return list(DOCUMENTS)
+
+    async def _aget_relevant_documents(self, query: str, *, run_manager, categories=None) -> List[Document]:
+        await asyncio.sleep(self.latency)
+        return list(DOCUMENTS)
+
+
+def _fake(result, latency: float) -> RunnableLambda:
+    def func(_):
+        time.sleep(latency)
+        return result
+
+    async def afunc(_):
+        await asyncio.sleep(latency)
+        return result
+
+    return RunnableLambda(func, afunc=afunc)
+
+
+def _install_fakes(latency: float, retrieval_latency: float = 0.0) -> None:
+    nodes = {name: sys.modules[f"src.nodes.{name}"] for name in
+             ("route_question", "retrieve", "grade_documents", "generate", "simulated_generate")}
+    nodes["route_question"].question_router = _fake(RouteQuery(datasource="vectorstore"), latency)
+    nodes["route_question"].local_route = lambda question, conversation_history=None: None
+    nodes["retrieve"].leased_retriever = lambda: contextlib.nullcontext(FixedRetriever(latency=retrieval_latency))
+    nodes["retrieve"].is_ready = lambda: True
+    nodes["grade_documents"].retrieval_grader = _fake(GradeDocuments(binary_score="yes"), latency)
+    nodes["generate"].generation_chain = _fake("answer", latency)
+    nodes["simulated_generate"].simulated_generation_chain = _fake("answer", latency)
+    graph.hallucination_grader = _fake(GradeHallucinations(binary_score=True), latency)
+    graph.answer_grader = _fake(GradeAnswer(binary_score=True), latency)
+    graph.generation_grader = _fake(GradeGeneration(grounded=True, addresses_question=True), latency)
+
+
+@contextlib.contextmanager
+def fake_chains(latency: float = 0.0, retrieval_latency: float = 0.0) -> Iterator[None]:
+    """_install_fakes for the duration of the block, restoring the real chains after."""
+    nodes = [sys.modules[f"src.nodes.{name}"] for name in
+             ("route_question", "retrieve", "grade_documents", "generate", "simulated_generate")]
+    saved = [(module, dict(vars(module))) for module in nodes + [graph]]
+    _install_fakes(latency, retrieval_latency)
+    try:
+        yield
+    finally:
+        for module, attributes in saved:
+            vars(module).update(attributes)
+
+
+def _state(i: int) -> dict:
+    return {"question": f"question {i}", "conversation_history": [], "generation_retry_count": 0}
+
+
+def _run_sync(sessions: int, workers: int) -> List[float]:
+    def session(i: int) -> float:
+        started = time.perf_counter()
+        graph.app.invoke(_state(i))
+        return time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(session, range(sessions)))
+
+
+async def _run_async(sessions: int) -> List[float]:
+    async def session(i: int) -> float:
+        started = time.perf_counter()
+        await graph.async_app.ainvoke(_state(i))
+        return time.perf_counter() - started
+
+    return await asyncio.gather(*(session(i) for i in range(sessions)))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=50, help="concurrent conversations (one RAG turn each)")
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per fake LLM call")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    args = parser.parse_args()
+
+    _install_fakes(args.latency)
+
+    runs = []
+    for workers in args.workers:
+        runs.append((f"blocking, {workers} thread(s)", workers, lambda w=workers: _run_sync(args.sessions, w)))
+    runs.append(("async, 1 event loop", 1, lambda: asyncio.run(_run_async(args.sessions))))
+
+    print(f"📊 Async graph benchmark: {args.sessions} concurrent RAG turns, {args.latency * 1000:.0f} ms per LLM call")
+    print(f"{'execution':<26}{'wall s':>8}{'turns/s':>9}{'p50 turn s':>12}{'turns/s/worker':>16}")
+    for label, workers, run in runs:
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            latencies = run()
+        wall = time.perf_counter() - started
+        throughput = args.sessions / wall
+        print(
+            f"{label:<26}{wall:>8.2f}{throughput:>9.1f}{statistics.median(latencies):>12.2f}"
+            f"{throughput / workers:>16.1f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
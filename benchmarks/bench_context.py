@@ -0,0 +1,122 @@
+"""
+Prompt size of retrieved documents: Document repr vs the compact context.
+
+For every knowledge base question the top RETRIEVAL_CONFIG["k"] rows are
+retrieved offline (local hashing embeddings, no API calls), and the
+generation and hallucination grader prompts are rendered twice: with the
+documents as the chains used to receive them (the list's repr) and with
+src.context.format_context. Tokens are counted with tiktoken when its
+encoding is available, otherwise estimated by src.memory.estimate_tokens.
+
+With OPENAI_API_KEY the generation chain also runs on both renderings for
+the first --live-cases questions, and p50 latency and billed input tokens
+are reported.
+
+Usage:
+    python -m benchmarks.bench_context
+    python -m benchmarks.bench_context --live-cases 10    # needs OPENAI_API_KEY
+"""
+
+import argparse
+import os
+import re
+import statistics
+import sys
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+# The chains build their chat model clients at import; nothing is sent without a real key
+os.environ.setdefault("OPENAI_API_KEY", "sk-placeholder")
+LIVE = os.environ["OPENAI_API_KEY"] != "sk-placeholder"
+
+from langchain_core.callbacks import UsageMetadataCallbackHandler  # noqa: E402
+from langchain_core.output_parsers import StrOutputParser  # noqa: E402
+
+from config.settings import CONTEXT_CONFIG, RETRIEVAL_CONFIG  # noqa: E402
+from src.chains.generation import llm, prompt_template as generation_prompt  # noqa: E402
+from src.chains.hallucination_grader import hallucination_prompt  # noqa: E402
+from src.context import format_context  # noqa: E402
+from src.embeddings import HashingEmbeddings  # noqa: E402
+from src.hybrid_retrieval import DenseRetriever  # noqa: E402
+from src.ingestion import sync_vectorstore  # noqa: E402
+from src.knowledge_base import iter_documents  # noqa: E402
+from src.memory import count_tokens  # noqa: E402
+from src.numpy_store import NumpyVectorStore  # noqa: E402
+
+HISTORY = "No previous conversation."
+
+
+def _cases():
+    documents = list(iter_documents())
+    vectorstore = NumpyVectorStore(HashingEmbeddings())
+    sync_vectorstore(vectorstore, documents)
+    retriever = DenseRetriever(vectorstore=vectorstore, search_kwargs={"k": RETRIEVAL_CONFIG["k"]})
+    cases = []
+    for doc in documents:
+        question = re.search(r"^Question: (.*)$", doc.page_content, re.MULTILINE)
+        answer = re.search(r"^Answer: (.*)", doc.page_content, re.MULTILINE | re.DOTALL)
+        if question and answer:
+            cases.append((question.group(1), answer.group(1), retriever.invoke(question.group(1))))
+    return cases
+
+
+def _renderings(documents):
+    return {"repr": str(documents), "compact": format_context(documents)}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--live-cases", type=int, default=10)
+    args = parser.parse_args()
+
+    cases = _cases()
+    tokens = {(prompt, label): [] for prompt in ("generate", "hallucination") for label in ("repr", "compact")}
+    for question, answer, documents in cases:
+        for label, context in _renderings(documents).items():
+            rendered = generation_prompt.invoke(
+                {"question": question, "context": context, "conversation_history": HISTORY}
+            ).to_string()
+            tokens["generate", label].append(count_tokens(rendered))
+            rendered = hallucination_prompt.invoke({"documents": context, "generation": answer}).to_string()
+            tokens["hallucination", label].append(count_tokens(rendered))
+
+    print(
+        f"📊 Context benchmark: {len(cases)} questions, top {RETRIEVAL_CONFIG['k']} documents, "
+        f"context budget {CONTEXT_CONFIG['max_tokens']} tokens"
+    )
+    print(f"{'prompt':<15}{'repr p50':>10}{'repr max':>10}{'compact p50':>13}{'compact max':>13}{'saved':>8}")
+    for prompt in ("generate", "hallucination"):
+        before, after = tokens[prompt, "repr"], tokens[prompt, "compact"]
+        saved = 1 - sum(after) / sum(before)
+        print(
+            f"{prompt:<15}{statistics.median(before):>10.0f}{max(before):>10}"
+            f"{statistics.median(after):>13.0f}{max(after):>13}{saved:>8.0%}"
+        )
+
+    if not LIVE:
+        print("Set OPENAI_API_KEY to measure generation latency and billed input tokens.")
+        return 0
+
+    # The prompt and model of generation_chain, fed each rendering directly
+    chain = generation_prompt | llm | StrOutputParser()
+    print(f"{'context':<10}{'p50 ms':>10}{'input tok':>12}{'output tok':>12}")
+    for label in ("repr", "compact"):
+        usage = UsageMetadataCallbackHandler()
+        latencies = []
+        for question, _, documents in cases[:args.live_cases]:
+            inputs = {"question": question, "context": _renderings(documents)[label], "conversation_history": HISTORY}
+            started = time.perf_counter()
+            chain.invoke(inputs, {"callbacks": [usage]})
+            latencies.append((time.perf_counter() - started) * 1000)
+        totals = usage.usage_metadata.values()
+        print(
+            f"{label:<10}{statistics.median(latencies):>10.0f}"
+            f"{sum(u['input_tokens'] for u in totals):>12}{sum(u['output_tokens'] for u in totals):>12}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""
+Separate (hallucination + answer grader) vs combined generation grading.
+
+Cases are built from knowledge base rows: a row's own answer to its own
+question (grounded and relevant) and another row's answer (not grounded).
+The separate path runs like the graph does, calling the answer grader only
+for grounded generations.
+
+Without OPENAI_API_KEY only the prompt sizes are reported (tokens counted
+with tiktoken when its encoding is available, otherwise estimated by
+src.memory.estimate_tokens). With a key, each case is graded by both paths and
+p50 latency, total input/output tokens and decision agreement are reported.
+
+Usage:
+    python -m benchmarks.bench_generation_grader               # prompt sizes only, offline
+    python -m benchmarks.bench_generation_grader --cases 20    # live comparison (needs OPENAI_API_KEY)
+"""
+
+import argparse
+import os
+import re
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+# The chains build their chat model clients at import; nothing is sent without a real key
+os.environ.setdefault("OPENAI_API_KEY", "sk-placeholder")
+LIVE = os.environ["OPENAI_API_KEY"] != "sk-placeholder"
+
+from langchain_core.callbacks import UsageMetadataCallbackHandler  # noqa: E402
+
+from src.chains.answer_grader import answer_grader, answer_prompt  # noqa: E402
+from src.chains.generation_grader import generation_grader, generation_grader_prompt  # noqa: E402
+from src.chains.hallucination_grader import hallucination_grader, hallucination_prompt  # noqa: E402
+from src.context import format_context  # noqa: E402
+from src.knowledge_base import iter_documents  # noqa: E402
+
+
+def _token_counter() -> Tuple[Callable[[str], int], str]:
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding("o200k_base")
+        return lambda text: len(encoding.encode(text)), "tiktoken o200k_base"
+    except Exception:
+        return lambda text: len(text) // 4, "estimated at 4 chars/token"
+
+
+def _cases(count: int) -> List[Dict]:
+    rows = []
+    for doc in iter_documents():
+        question = re.search(r"^Question: (.*)$", doc.page_content, re.MULTILINE)
+        answer = re.search(r"^Answer: (.*)", doc.page_content, re.MULTILINE | re.DOTALL)
+        if question and answer:
+            rows.append((doc, question.group(1), answer.group(1)))
+
+    cases = []
+    for i, (doc, question, answer) in enumerate(rows[:count]):
+        cases.append({"documents": [doc], "question": question, "generation": answer, "expected": "useful"})
+        other = rows[(i + len(rows) // 2) % len(rows)][2]
+        cases.append({"documents": [doc], "question": question, "generation": other, "expected": "not grounded"})
+    return cases[:count]
+
+
+def _separate(case: Dict, callbacks: list) -> str:
+    config = {"callbacks": callbacks}
+    if not hallucination_grader.invoke({"documents": case["documents"], "generation": case["generation"]}, config).binary_score:
+        return "not grounded"
+    score = answer_grader.invoke({"question": case["question"], "generation": case["generation"]}, config)
+    return "useful" if score.binary_score else "not useful"
+
+
+def _combined(case: Dict, callbacks: list) -> str:
+    score = generation_grader.invoke(case, {"callbacks": callbacks})
+    if not score.grounded:
+        return "not grounded"
+    return "useful" if score.addresses_question else "not useful"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", type=int, default=20)
+    args = parser.parse_args()
+
+    cases = _cases(args.cases)
+    count_tokens, method = _token_counter()
+
+    def prompt_tokens(prompt, case) -> int:
+        # The chains format the documents before the prompt
+        return count_tokens(prompt.invoke({**case, "documents": format_context(case["documents"])}).to_string())
+
+    separate = [
+        prompt_tokens(hallucination_prompt, case) + prompt_tokens(answer_prompt, case) for case in cases
+    ]
+    combined = [prompt_tokens(generation_grader_prompt, case) for case in cases]
+    print(f"📊 Generation grader benchmark: {len(cases)} cases")
+    print(f"Prompt tokens per graded generation ({method}), both calls counted for the separate path:")
+    print(f"  separate  p50 {statistics.median(separate):>7.0f}   total {sum(separate):>8}")
+    print(f"  combined  p50 {statistics.median(combined):>7.0f}   total {sum(combined):>8}")
+
+    if not LIVE:
+        print("Set OPENAI_API_KEY to measure latency, billed tokens and decision agreement.")
+        return 0
+
+    print(f"{'path':<10}{'p50 ms':>10}{'input tok':>12}{'output tok':>12}{'correct':>10}")
+    decisions = {}
+    for name, grade in (("separate", _separate), ("combined", _combined)):
+        usage = UsageMetadataCallbackHandler()
+        latencies, results = [], []
+        for case in cases:
+            started = time.perf_counter()
+            results.append(grade(case, [usage]))
+            latencies.append((time.perf_counter() - started) * 1000)
+        decisions[name] = results
+        totals = {"input_tokens": 0, "output_tokens": 0}
+        for model_usage in usage.usage_metadata.values():
+            for key in totals:
+                totals[key] += model_usage.get(key, 0)
+        # Groundedness judged as expected; own answers may still be graded "not useful"
+        correct = sum(
+            (result == "not grounded") == (case["expected"] == "not grounded")
+            for result, case in zip(results, cases)
+        )
+        print(
+            f"{name:<10}{statistics.median(latencies):>10.0f}{totals['input_tokens']:>12}"
+            f"{totals['output_tokens']:>12}{correct:>7}/{len(cases)}"
+        )
+
+    agreement = sum(a == b for a, b in zip(decisions["separate"], decisions["combined"])) / len(cases)
+    print(f"Decision agreement between paths: {agreement:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+Latency and recall@3 of two-stage (truncated scan + full-dimension rerank) search.
+
+Every knowledge base question (plus the sample FAQ questions) is run against
+a single-stage float32 NumPy index and against two-stage indexes that scan
+the first 256 or 512 dimensions and rerank a candidate pool at full
+dimension. Recall@3 is measured against the single-stage top 3.
+
+text-embedding-3-large is trained so that its prefixes are usable embeddings
+(Matryoshka representation learning); the local hashing embeddings are not,
+so run with --provider openai for numbers that reflect production.
+
+Usage:
+    python -m benchmarks.bench_matryoshka                    # local embeddings, offline
+    python -m benchmarks.bench_matryoshka --provider openai  # text-embedding-3-large (needs OPENAI_API_KEY)
+    python -m benchmarks.bench_matryoshka --rows 100000      # more random synthetic rows
+"""
+
+import argparse
+import re
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.bench_quantization import _embeddings
+from config.settings import SAMPLE_FAQ_QUESTIONS
+from src.knowledge_base import document_id, iter_documents
+from src.numpy_store import NumpyVectorStore
+
+VARIANTS = [
+    (0, 0),
+    (256, 20),
+    (256, 50),
+    (256, 100),
+    (512, 20),
+    (512, 50),
+    (512, 100),
+]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--provider", choices=["local", "openai"], default="local")
+    parser.add_argument("--rows", type=int, default=20000, help="random synthetic rows added to the knowledge base")
+    args = parser.parse_args()
+
+    embeddings = _embeddings(args.provider)
+    documents = list(iter_documents())
+    ids = [document_id(doc) for doc in documents]
+    texts = [doc.page_content for doc in documents]
+    vectors = np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+
+    questions = [
+        match.group(1)
+        for doc in documents
+        if (match := re.search(r"^Question: (.*)$", doc.page_content, re.MULTILINE))
+    ] + SAMPLE_FAQ_QUESTIONS
+    queries = np.asarray(embeddings.embed_documents(questions), dtype=np.float32)
+
+    if args.rows:
+        rng = np.random.default_rng(0)
+        synthetic = rng.standard_normal((args.rows, vectors.shape[1])).astype(np.float32)
+        vectors = np.concatenate([vectors, synthetic])
+        ids += [f"synthetic-{i}" for i in range(args.rows)]
+        texts += [f"synthetic {i}" for i in range(args.rows)]
+
+    print(
+        f"📊 Two-stage search benchmark: {len(ids)} rows x {vectors.shape[1]} dims "
+        f"({args.provider} embeddings), {len(questions)} queries, k=3"
+    )
+    print(f"{'search':<26}{'recall@3':>10}{'p50 ms':>10}{'p95 ms':>10}")
+
+    baseline_top = None
+    for truncate_dim, pool in VARIANTS:
+        store = NumpyVectorStore(embeddings, truncate_dim=truncate_dim, candidate_pool=pool)
+        store.add_embeddings(ids, vectors, texts)
+        # Build the prefix matrix outside the timed loop
+        store.similarity_search_by_vector(queries[0], k=3)
+
+        latencies, tops = [], []
+        for query in queries:
+            started = time.perf_counter()
+            results = store.similarity_search_by_vector(query, k=3)
+            latencies.append((time.perf_counter() - started) * 1000)
+            tops.append({doc.id for doc in results})
+
+        if baseline_top is None:
+            baseline_top = tops
+        recall = statistics.mean(len(top & base) / len(base) for top, base in zip(tops, baseline_top))
+        label = f"{truncate_dim} dims, pool {pool}" if truncate_dim else f"single stage ({vectors.shape[1]} dims)"
+        print(
+            f"{label:<26}{recall:>10.3f}{statistics.median(latencies):>10.3f}"
+            f"{statistics.quantiles(latencies, n=20)[-1]:>10.3f}"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
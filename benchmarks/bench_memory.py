@@ -0,0 +1,110 @@
+"""
+Prompt tokens per node: last-6-messages window vs token-budgeted memory.
+
+A conversation is replayed from knowledge base rows (the row's question as
+the user message, its answer as the assistant reply). For every turn the
+router, generation and simulated generation prompts are rendered twice:
+with the old history (the last 6 messages verbatim) and with the memory
+(running summary plus the tail that fits MEMORY_CONFIG
+["history_token_budget"]), and their tokens are counted.
+
+Without OPENAI_API_KEY the summary is stood in for by the summarised user
+messages cut to the summariser's 120-word limit; with a key the real
+summariser chain updates it incrementally, as record_turn does.
+
+Usage:
+    python -m benchmarks.bench_memory --turns 12
+"""
+
+import argparse
+import os
+import re
+import statistics
+import sys
+
+from dotenv import load_dotenv
+
+load_dotenv()
+# The chains build their chat model clients at import; nothing is sent without a real key
+os.environ.setdefault("OPENAI_API_KEY", "sk-placeholder")
+LIVE = os.environ["OPENAI_API_KEY"] != "sk-placeholder"
+
+from config.settings import MEMORY_CONFIG  # noqa: E402
+from src.chains.generation import prompt_template as generation_prompt  # noqa: E402
+from src.chains.router import route_prompt  # noqa: E402
+from src.chains.simulated_generation import prompt_template as simulated_prompt  # noqa: E402
+from src.chains.summarizer import summarizer_chain  # noqa: E402
+from src.knowledge_base import iter_documents  # noqa: E402
+from src.memory import count_tokens, format_memory, format_messages, split_history  # noqa: E402
+
+PROMPTS = {"route_question": route_prompt, "generate": generation_prompt, "simulated_generate": simulated_prompt}
+
+
+def _conversation(turns: int):
+    rows = []
+    for doc in iter_documents():
+        question = re.search(r"^Question: (.*)$", doc.page_content, re.MULTILINE)
+        answer = re.search(r"^Answer: (.*)", doc.page_content, re.MULTILINE | re.DOTALL)
+        if question and answer:
+            rows.append((doc, question.group(1), answer.group(1)))
+    return rows[:turns]
+
+
+def _stand_in_summary(messages) -> str:
+    words = " ".join(m["content"] for m in messages if m["role"] == "user").split()
+    return " ".join(words[:120])
+
+
+def _window(history) -> str:
+    # The history formatting every node used to repeat
+    return format_messages(history[-6:]) or "No previous conversation."
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=12)
+    args = parser.parse_args()
+
+    conversation = _conversation(args.turns)
+    history, summary, summarized_count = [], None, 0
+    tokens = {node: {"before": [], "after": []} for node in PROMPTS}
+    summarised = []
+
+    for doc, question, answer in conversation:
+        older, tail = split_history(history, summarized_count)
+        memory = format_memory(summary, tail)
+        for node, prompt in PROMPTS.items():
+            for label, history_text in (("before", _window(history)), ("after", memory)):
+                rendered = prompt.invoke(
+                    {"question": question, "context": [doc], "conversation_history": history_text}
+                ).to_string()
+                tokens[node][label].append(count_tokens(rendered))
+
+        history += [{"role": "user", "content": question}, {"role": "assistant", "content": answer}]
+        older, _ = split_history(history, summarized_count)
+        if older:
+            if LIVE:
+                summary = summarizer_chain.invoke(
+                    {"summary": summary or "None yet.", "messages": format_messages(older)}
+                )
+            else:
+                summary = _stand_in_summary(history[:summarized_count + len(older)])
+            summarized_count += len(older)
+            summarised.append(len(older))
+
+    print(
+        f"📊 Memory benchmark: {len(conversation)} turns, verbatim budget "
+        f"{MEMORY_CONFIG['history_token_budget']} tokens, summary {'from the summariser' if LIVE else 'stand-in'}"
+    )
+    print(f"Summary updates: {len(summarised)}, folding {sum(summarised)} messages in total")
+    print(f"{'node':<20}{'before p50':>11}{'before max':>11}{'after p50':>11}{'after max':>11}")
+    for node, counts in tokens.items():
+        print(
+            f"{node:<20}{statistics.median(counts['before']):>11.0f}{max(counts['before']):>11}"
+            f"{statistics.median(counts['after']):>11.0f}{max(counts['after']):>11}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
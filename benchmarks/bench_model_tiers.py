@@ -0,0 +1,145 @@
+"""
+Generation model tiers: how many turns the fast model takes, and at what cost.
+
+Offline, every knowledge base question is retrieved (local hashing
+embeddings, top RETRIEVAL_CONFIG["k"]). The grader's verdicts are not
+known without an API key, so for each number n of documents it could keep
+(the top n) select_tier() picks the model for an opening turn and for a
+turn deep in a conversation. The generation cost is projected from the
+counted prompt tokens and the row's answer as the output, for tiered
+generation vs the strong model for every turn (no prompt cache discount,
+no retries).
+
+With OPENAI_API_KEY the graph answers the first --cases questions with
+tiering on and off, and per-tier calls, latency and cost (src.llm_usage)
+are reported with p50 turn latency and how many turns escalated.
+
+Usage:
+    python -m benchmarks.bench_model_tiers
+    python -m benchmarks.bench_model_tiers --cases 10    # needs OPENAI_API_KEY
+"""
+
+import argparse
+import contextlib
+import io
+import itertools
+import os
+import re
+import statistics
+import sys
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+# The chains build their chat model clients at import; nothing is sent without a real key
+os.environ.setdefault("OPENAI_API_KEY", "sk-placeholder")
+LIVE = os.environ["OPENAI_API_KEY"] != "sk-placeholder"
+
+from config.settings import MODEL_TIERS_CONFIG, RETRIEVAL_CONFIG  # noqa: E402
+from src.chains.generation import prompt_template as generation_prompt  # noqa: E402
+from src.context import format_context  # noqa: E402
+from src.embeddings import HashingEmbeddings  # noqa: E402
+from src.hybrid_retrieval import DenseRetriever  # noqa: E402
+from src.ingestion import sync_vectorstore  # noqa: E402
+from src.knowledge_base import iter_documents  # noqa: E402
+from src.llm_usage import call_cost, tier_report  # noqa: E402
+from src.memory import count_tokens  # noqa: E402
+from src.metrics import metrics  # noqa: E402
+from src.model_tiers import FAST, STRONG, select_tier, tier_model  # noqa: E402
+from src.numpy_store import NumpyVectorStore  # noqa: E402
+
+HISTORY = "No previous conversation."
+DEEP_HISTORY = [{"role": "user", "content": ""}, {"role": "assistant", "content": ""}] * (
+    MODEL_TIERS_CONFIG["max_simple_turns"] + 1
+)
+
+
+def _cases():
+    documents = list(iter_documents())
+    vectorstore = NumpyVectorStore(HashingEmbeddings())
+    sync_vectorstore(vectorstore, documents)
+    retriever = DenseRetriever(vectorstore=vectorstore, search_kwargs={"k": RETRIEVAL_CONFIG["k"]})
+    cases = []
+    for doc in documents:
+        question = re.search(r"^Question: (.*)$", doc.page_content, re.MULTILINE)
+        answer = re.search(r"^Answer: (.*)", doc.page_content, re.MULTILINE | re.DOTALL)
+        if question and answer:
+            cases.append((question.group(1), answer.group(1), retriever.invoke(question.group(1))))
+    return cases
+
+
+def _offline(cases) -> None:
+    # Projected as if tiering were on, whatever MODEL_TIERING says
+    enabled = MODEL_TIERS_CONFIG["enabled"]
+    MODEL_TIERS_CONFIG["enabled"] = True
+    print(f"{'relevant':<10}{'turn':<10}{'fast':>6}{'strong':>8}{'tiered $/1k turns':>20}{'strong $/1k turns':>20}")
+    turns = (("opening", []), ("deep", DEEP_HISTORY))
+    for n, (label, history) in itertools.product(range(1, RETRIEVAL_CONFIG["k"] + 1), turns):
+        tiers, tiered_cost, strong_cost = [], 0.0, 0.0
+        for question, answer, documents in cases:
+            relevant = documents[:n]
+            state = {
+                "question": question, "documents": relevant, "datasource": "vectorstore",
+                "simulated_generation": False, "conversation_history": history, "generation_retry_count": 0,
+            }
+            tier = select_tier(state)
+            tiers.append(tier)
+            prompt = generation_prompt.invoke(
+                {"question": question, "context": format_context(relevant), "conversation_history": HISTORY}
+            ).to_string()
+            usage = {"input_tokens": count_tokens(prompt), "output_tokens": count_tokens(answer)}
+            tiered_cost += call_cost(tier_model(tier), usage)
+            strong_cost += call_cost(tier_model(STRONG), usage)
+        print(
+            f"{n:<10}{label:<10}{tiers.count(FAST):>6}{tiers.count(STRONG):>8}"
+            f"{tiered_cost / len(cases) * 1000:>20.2f}{strong_cost / len(cases) * 1000:>20.2f}"
+        )
+    MODEL_TIERS_CONFIG["enabled"] = enabled
+
+
+def _live(cases) -> None:
+    # Imported here: building the graph is only needed for the live comparison
+    from src.graph import app
+
+    print(f"{'tiering':<9}{'tier':<8}{'calls':>6}{'p50 call s':>12}{'cost $':>10}{'p50 turn s':>12}{'escalated':>11}")
+    enabled = MODEL_TIERS_CONFIG["enabled"]
+    for tiering in (False, True):
+        MODEL_TIERS_CONFIG["enabled"] = tiering
+        metrics.reset()
+        turns, escalated = [], 0
+        for question, _, _ in cases:
+            started = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                state = app.invoke({"question": question, "conversation_history": [], "generation_retry_count": 0})
+            turns.append(time.perf_counter() - started)
+            escalated += (state.get("generation_retry_count") or 0) > 1
+        for tier, row in sorted(tier_report().items()):
+            print(
+                f"{'on' if tiering else 'off':<9}{tier:<8}{row['calls']:>6.0f}{row['p50_seconds']:>12.2f}"
+                f"{row['cost_usd']:>10.4f}{statistics.median(turns):>12.2f}{escalated:>11}"
+            )
+    MODEL_TIERS_CONFIG["enabled"] = enabled
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", type=int, default=10)
+    args = parser.parse_args()
+
+    cases = _cases()
+    print(
+        f"📊 Model tier benchmark: {len(cases)} questions, fast {tier_model(FAST)}, strong {tier_model(STRONG)}, "
+        f"tiering configured {'on' if MODEL_TIERS_CONFIG['enabled'] else 'off'}"
+    )
+    _offline(cases)
+
+    if not LIVE:
+        print("Set OPENAI_API_KEY to measure per-tier latency and cost on the graph.")
+        return 0
+    _live(cases[:args.cases])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""
+Prompt prefix caching: static prefix size per prompt and cache hits.
+
+Offline, every prompt that goes to a chat model is rendered for the
+knowledge base questions (with RETRIEVAL_CONFIG["k"] documents of
+context) and the report shows how many of its tokens are
+the static system prefix, and how many of those OpenAI could serve from its
+prompt cache (the prefix in 128-token steps, only for prompts of 1024
+tokens or more).
+
+With OPENAI_API_KEY, the router and generation chains run on --cases
+questions and the cached vs uncached prompt tokens recorded by
+src.llm_usage are reported per chain, with p50 latency of the first call
+and of the later ones.
+
+Usage:
+    python -m benchmarks.bench_prompt_cache
+    python -m benchmarks.bench_prompt_cache --cases 10    # needs OPENAI_API_KEY
+"""
+
+import argparse
+import os
+import re
+import statistics
+import sys
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+# The chains build their chat model clients at import; nothing is sent without a real key
+os.environ.setdefault("OPENAI_API_KEY", "sk-placeholder")
+LIVE = os.environ["OPENAI_API_KEY"] != "sk-placeholder"
+
+from config.settings import RETRIEVAL_CONFIG  # noqa: E402
+from src.chains.generation import generation_chain, prompt_template as generation_prompt  # noqa: E402
+from src.chains.generation_grader import generation_grader_prompt  # noqa: E402
+from src.chains.router import question_router, route_prompt  # noqa: E402
+from src.chains.simulated_generation import prompt_template as simulated_prompt  # noqa: E402
+from src.context import format_context  # noqa: E402
+from src.knowledge_base import iter_documents  # noqa: E402
+from src.llm_usage import prompt_cache_report  # noqa: E402
+from src.memory import count_tokens  # noqa: E402
+
+HISTORY = "No previous conversation."
+PROMPTS = {
+    "router": route_prompt,
+    "generation": generation_prompt,
+    "simulated_generation": simulated_prompt,
+    "generation_grader": generation_grader_prompt,
+}
+MIN_CACHED_PROMPT, CACHE_STEP = 1024, 128
+
+
+def _cases():
+    documents = list(iter_documents())
+    cases = []
+    for i, doc in enumerate(documents):
+        # The row and its neighbours stand in for the top-k retrieved documents
+        context = format_context(documents[i:i + RETRIEVAL_CONFIG["k"]])
+        question = re.search(r"^Question: (.*)$", doc.page_content, re.MULTILINE)
+        answer = re.search(r"^Answer: (.*)", doc.page_content, re.MULTILINE | re.DOTALL)
+        if question and answer:
+            cases.append({
+                "question": question.group(1),
+                "generation": answer.group(1),
+                "context": context,
+                "documents": context,
+                "conversation_history": HISTORY,
+            })
+    return cases
+
+
+def _cacheable(prefix: int, total: int) -> int:
+    return prefix // CACHE_STEP * CACHE_STEP if total >= MIN_CACHED_PROMPT else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", type=int, default=10)
+    args = parser.parse_args()
+
+    cases = _cases()
+    print(f"📊 Prompt cache benchmark: {len(cases)} questions")
+    print(f"{'prompt':<22}{'prefix tok':>11}{'p50 total':>11}{'cacheable p50':>15}")
+    for name, prompt in PROMPTS.items():
+        totals, cacheable = [], []
+        for case in cases:
+            messages = prompt.invoke(case).to_messages()
+            prefix = count_tokens(messages[0].content)
+            total = sum(count_tokens(message.content) for message in messages)
+            totals.append(total)
+            cacheable.append(_cacheable(prefix, total))
+        print(f"{name:<22}{prefix:>11}{statistics.median(totals):>11.0f}{statistics.median(cacheable):>15.0f}")
+
+    if not LIVE:
+        print("Set OPENAI_API_KEY to measure cache hits and latency.")
+        return 0
+
+    latencies = {"router": [], "generation": []}
+    for case in cases[:args.cases]:
+        for name, chain in (("router", question_router), ("generation", generation_chain)):
+            started = time.perf_counter()
+            chain.invoke(case)
+            latencies[name].append((time.perf_counter() - started) * 1000)
+
+    report = prompt_cache_report()
+    print(f"{'chain':<12}{'calls':>7}{'prompt tok':>12}{'cached':>9}{'hit rate':>10}{'first ms':>10}{'later p50':>11}")
+    for name, times in latencies.items():
+        row = report.get(name, {})
+        print(
+            f"{name:<12}{row.get('calls', 0):>7.0f}{row.get('prompt_tokens', 0):>12.0f}{row.get('cached_tokens', 0):>9.0f}"
+            f"{row.get('cache_hit_rate', 0):>10.0%}{times[0]:>10.0f}{statistics.median(times[1:] or times):>11.0f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+"""
+Memory saved and recall@3 kept by quantised NumPy indexes.
+
+Every knowledge base question (plus the sample FAQ questions) is run against
+float32, float16 and int8 indexes built from the same embeddings, with and
+without exact float32 rescoring. Recall@3 is measured against the float32
+top 3. Each index is persisted and reopened memory-mapped, as the app does,
+and reported by its size on disk, the bytes of the matrix scanned per query,
+the peak resident memory its queries add to the process (index pages read
+plus any transient float32 buffers; Linux only) and the median latency.
+
+Usage:
+    python -m benchmarks.bench_quantization                    # local embeddings, offline
+    python -m benchmarks.bench_quantization --provider openai  # text-embedding-3-large (needs OPENAI_API_KEY)
+    python -m benchmarks.bench_quantization --rows 20000       # add random synthetic rows
+"""
+
+import argparse
+import os
+import re
+import statistics
+import sys
+import tempfile
+import time
+from typing import Optional
+
+import numpy as np
+
+from config.settings import SAMPLE_FAQ_QUESTIONS
+from src.knowledge_base import document_id, iter_documents
+from src.numpy_store import NumpyVectorStore
+
+VARIANTS = [
+    ("float32", 0),
+    ("float16", 0),
+    ("int8", 0),
+    ("float16", 12),
+    ("int8", 12),
+]
+
+
+def _embeddings(provider: str):
+    if provider == "openai":
+        from src.embeddings import CachedEmbeddings, create_cache
+        from langchain_openai import OpenAIEmbeddings
+
+        return CachedEmbeddings(
+            OpenAIEmbeddings(model="text-embedding-3-large"),
+            "text-embedding-3-large",
+            create_cache("sqlite"),
+        )
+
+    from src.embeddings import HashingEmbeddings
+    return HashingEmbeddings()
+
+
+def _reset_peak_rss() -> bool:
+    """Reset the kernel's peak RSS counter for this process (Linux >= 4.0)."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _rss_mb(field: str) -> Optional[float]:
+    """VmRSS (current) or VmHWM (peak since the last reset) in MB, None where /proc is unavailable."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1e3
+    except OSError:
+        pass
+    return None
+
+
+def _disk_mb(directory: str) -> float:
+    return sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory)) / 1e6
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--provider", choices=["local", "openai"], default="local")
+    parser.add_argument("--rows", type=int, default=0, help="random synthetic rows added to the knowledge base")
+    args = parser.parse_args()
+
+    embeddings = _embeddings(args.provider)
+    documents = list(iter_documents())
+    ids = [document_id(doc) for doc in documents]
+    texts = [doc.page_content for doc in documents]
+    vectors = np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+
+    questions = [
+        match.group(1)
+        for doc in documents
+        if (match := re.search(r"^Question: (.*)$", doc.page_content, re.MULTILINE))
+    ] + SAMPLE_FAQ_QUESTIONS
+    queries = np.asarray(embeddings.embed_documents(questions), dtype=np.float32)
+
+    if args.rows:
+        rng = np.random.default_rng(0)
+        synthetic = rng.standard_normal((args.rows, vectors.shape[1])).astype(np.float32)
+        vectors = np.concatenate([vectors, synthetic])
+        ids += [f"synthetic-{i}" for i in range(args.rows)]
+        texts += [f"synthetic {i}" for i in range(args.rows)]
+
+    print(
+        f"📊 Quantisation benchmark: {len(ids)} rows x {vectors.shape[1]} dims "
+        f"({args.provider} embeddings), {len(questions)} queries, k=3"
+    )
+    print(f"{'index':<22}{'disk MB':>9}{'scan MB':>9}{'saved':>7}{'RSS +MB':>9}{'recall@3':>10}{'p50 ms':>9}")
+
+    baseline_top = None
+    baseline_bytes = None
+    for dtype, rescore in VARIANTS:
+        with tempfile.TemporaryDirectory() as workdir:
+            built = NumpyVectorStore(embeddings, persist_directory=workdir, dtype=dtype, rescore_candidates=rescore)
+            built.add_embeddings(ids, vectors, texts)
+            built.persist()
+            del built
+            store = NumpyVectorStore(embeddings, persist_directory=workdir, dtype=dtype, rescore_candidates=rescore)
+            disk = _disk_mb(workdir)
+
+            rss_before = _rss_mb("VmRSS") if _reset_peak_rss() else None
+            latencies, tops = [], []
+            for query in queries:
+                started = time.perf_counter()
+                results = store.similarity_search_by_vector(query, k=3)
+                latencies.append((time.perf_counter() - started) * 1000)
+                tops.append({doc.id for doc in results})
+            peak = _rss_mb("VmHWM")
+            added = f"{peak - rss_before:>9.1f}" if rss_before is not None and peak is not None else f"{'n/a':>9}"
+
+            if baseline_top is None:
+                baseline_top, baseline_bytes = tops, store.nbytes
+            recall = statistics.mean(len(top & base) / len(base) for top, base in zip(tops, baseline_top))
+            label = f"{dtype}" + (f" + rescore {rescore}" if rescore else "")
+            print(
+                f"{label:<22}{disk:>9.2f}{store.nbytes / 1e6:>9.2f}{1 - store.nbytes / baseline_bytes:>7.0%}"
+                f"{added}{recall:>10.3f}{statistics.median(latencies):>9.3f}"
+            )
+            del store
+
+    print(
+        "disk MB includes the float32 copy kept for rescoring; scan MB is the matrix read per query; "
+        "RSS +MB is the peak memory the queries added."
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""
+Local router vs LLM router: accuracy, coverage and latency.
+
+CASES is a hand-labelled set of patient messages that are not among the
+local router's seeds (paraphrases, Egyptian Arabic, other clinics). For a
+range of confidence margins the report shows how many messages the local
+router decides on its own (coverage: margin at least the threshold and no
+keyword conflict, as in local_route), how often those decisions are right,
+and its per-message latency. It also reports the share of knowledge base
+questions whose repeats the answer cache can serve, which is limited to
+those the local router confirms (see src/answer_cache.py).
+
+With OPENAI_API_KEY the LLM router classifies every case too, and the
+hybrid (local first, LLM below ROUTER_CONFIG["local_min_margin"]) is
+compared with the LLM router alone on accuracy and latency.
+
+Usage:
+    python -m benchmarks.bench_router
+"""
+
+import os
+import statistics
+import sys
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+# The router chain builds its chat model client at import; nothing is sent without a real key
+os.environ.setdefault("OPENAI_API_KEY", "sk-placeholder")
+LIVE = os.environ["OPENAI_API_KEY"] != "sk-placeholder"
+
+from config.settings import ROUTER_CONFIG  # noqa: E402
+from src.chains.router import question_router  # noqa: E402
+from src.local_router import LocalRouter, keyword_conflict, seed_questions  # noqa: E402
+
+VECTORSTORE, SIMULATED = "vectorstore", "simulated_generation"
+CASES = [
+    ("How much does a consultation at the ENT clinic cost?", VECTORSTORE),
+    ("What's the price of a cesarean section?", VECTORSTORE),
+    ("Cost of a hernia operation?", VECTORSTORE),
+    ("Do you accept Bupa insurance?", VECTORSTORE),
+    ("Which insurance companies are you contracted with?", VECTORSTORE),
+    ("Which doctors work in the cardiology clinic?", VECTORSTORE),
+    ("When is the orthopedic doctor available?", VECTORSTORE),
+    ("What tests does your laboratory offer?", VECTORSTORE),
+    ("Tell me about the radiology department", VECTORSTORE),
+    ("What departments does the hospital have?", VECTORSTORE),
+    ("What are the working hours of the dermatology clinic?", VECTORSTORE),
+    ("Who is the pediatrics doctor on Tuesday?", VECTORSTORE),
+    ("كام سعر الكشف في عيادة العظام؟", VECTORSTORE),
+    ("بكام عملية الزايدة؟", VECTORSTORE),
+    ("ايه شركات التأمين اللي بتتعاملوا معاها؟", VECTORSTORE),
+    ("هل تقبلون تأمين ميدنت؟", VECTORSTORE),
+    ("مين الدكاترة في عيادة الأطفال؟", VECTORSTORE),
+    ("امتى مواعيد دكتور الباطنة؟", VECTORSTORE),
+    ("ما هي التحاليل المتاحة في المعمل؟", VECTORSTORE),
+    ("ما هي أقسام المستشفى؟", VECTORSTORE),
+    ("تكلفة عملية الولادة القيصرية كام؟", VECTORSTORE),
+    ("ما هي أسعار عيادة الأسنان؟", VECTORSTORE),
+    ("عايز اعرف معلومات عن قسم الطوارئ", VECTORSTORE),
+    ("ازاي استخدم التأمين بتاعي عندكم؟", VECTORSTORE),
+    ("Can you book me with Dr. Ahmed on Thursday?", SIMULATED),
+    ("I'd like to move my appointment to Saturday", SIMULATED),
+    ("Please cancel tomorrow's booking", SIMULATED),
+    ("Are my x-ray results out yet?", SIMULATED),
+    ("Call an ambulance to Nasr City please", SIMULATED),
+    ("I want to complain about the waiting time", SIMULATED),
+    ("Remind me of my appointment one day before", SIMULATED),
+    ("What should I eat before the colonoscopy?", SIMULATED),
+    ("Hi there", SIMULATED),
+    ("Thanks a lot!", SIMULATED),
+    ("I want to speak to someone from customer service", SIMULATED),
+    ("ممكن تحجزلي عند دكتور القلب يوم الخميس؟", SIMULATED),
+    ("عايز أأجل الميعاد ليوم السبت", SIMULATED),
+    ("لو سمحت الغي حجزي", SIMULATED),
+    ("نتيجة التحليل جاهزة؟", SIMULATED),
+    ("ابعتولي عربية إسعاف بسرعة", SIMULATED),
+    ("عايز أشتكي من التمريض", SIMULATED),
+    ("فكرني بالدوا كل يوم الساعة ٨", SIMULATED),
+    ("أعمل إيه قبل عملية المرارة؟", SIMULATED),
+    ("أهلا", SIMULATED),
+    ("متشكر جدا", SIMULATED),
+    ("ابني وقع وراسه بتنزف", SIMULATED),
+    # Mixed intents: a booking word in a factual question and the other way round
+    ("ما سعر حجز موعد عند دكتور القلب؟", VECTORSTORE),
+    ("How much does it cost to book an MRI scan?", VECTORSTORE),
+    ("هل التأمين بيغطي حجز الكشف؟", VECTORSTORE),
+    ("I want to book a knee replacement surgery", SIMULATED),
+    ("احجزلي تحليل فيتامين د بكرة الصبح", SIMULATED),
+    ("Cancel my appointment at the dermatology clinic", SIMULATED),
+]
+MARGINS = (0.0, 0.02, 0.05, 0.1, 0.15, 0.2)
+
+
+def main() -> int:
+    started = time.perf_counter()
+    router = LocalRouter(seed_questions())
+    build_ms = (time.perf_counter() - started) * 1000
+
+    local, latencies = [], []
+    for question, _ in CASES:
+        started = time.perf_counter()
+        datasource, margin = router.classify(question)
+        # A decision the keywords contradict is left to the LLM router at any margin
+        local.append((datasource, -1.0 if keyword_conflict(question, datasource) else margin))
+        latencies.append((time.perf_counter() - started) * 1e6)
+
+    print(f"📊 Router benchmark: {len(CASES)} labelled messages, local router built in {build_ms:.0f} ms")
+    print(f"Local router latency: p50 {statistics.median(latencies):.0f} µs, max {max(latencies):.0f} µs")
+    print(f"{'min margin':<12}{'decided locally':>17}{'local accuracy':>16}")
+    for min_margin in MARGINS:
+        decided = [(datasource, label) for (datasource, margin), (_, label) in zip(local, CASES) if margin >= min_margin]
+        correct = sum(datasource == label for datasource, label in decided)
+        accuracy = f"{correct}/{len(decided)} ({correct / len(decided):.0%})" if decided else "-"
+        marker = "  <- configured" if min_margin == ROUTER_CONFIG["local_min_margin"] else ""
+        print(f"{min_margin:<12}{len(decided):>10}/{len(CASES):<6}{accuracy:>16}{marker}")
+
+    # The answer cache serves a repeat only when the local router confirms the stored
+    # route, and stores knowledge base answers only (see src/answer_cache.py)
+    min_margin = ROUTER_CONFIG["local_min_margin"]
+    knowledge_base = [local_decision for local_decision, (_, label) in zip(local, CASES) if label == VECTORSTORE]
+    servable = sum(datasource == VECTORSTORE and margin >= min_margin for datasource, margin in knowledge_base)
+    print(
+        f"Answer cache: a repeat can hit for {servable}/{len(knowledge_base)} knowledge base questions "
+        f"({servable / len(knowledge_base):.0%}); the rest always miss and run the graph"
+    )
+
+    if not LIVE:
+        print("Set OPENAI_API_KEY to compare with the LLM router.")
+        return 0
+
+    llm, llm_latencies = [], []
+    for question, _ in CASES:
+        started = time.perf_counter()
+        llm.append(question_router.invoke({"question": question, "conversation_history": "No previous conversation."}).datasource)
+        llm_latencies.append((time.perf_counter() - started) * 1000)
+
+    hybrid, hybrid_latencies = [], []
+    for (datasource, margin), llm_datasource, local_us, llm_ms in zip(local, llm, latencies, llm_latencies):
+        if margin >= min_margin:
+            hybrid.append(datasource)
+            hybrid_latencies.append(local_us / 1000)
+        else:
+            hybrid.append(llm_datasource)
+            hybrid_latencies.append(local_us / 1000 + llm_ms)
+
+    labels = [label for _, label in CASES]
+    print(f"{'router':<10}{'accuracy':>10}{'mean ms':>10}{'p50 ms':>10}")
+    for name, decisions, times in (("llm", llm, llm_latencies), ("hybrid", hybrid, hybrid_latencies)):
+        accuracy = sum(d == label for d, label in zip(decisions, labels)) / len(labels)
+        print(f"{name:<10}{accuracy:>10.0%}{statistics.mean(times):>10.1f}{statistics.median(times):>10.1f}")
+    agreement = sum(a == b for a, b in zip(hybrid, llm)) / len(llm)
+    print(f"Hybrid agrees with the LLM router on {agreement:.0%} of messages")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
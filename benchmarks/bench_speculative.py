@@ -0,0 +1,101 @@
+"""
+Time to first token with and without speculative retrieval.
+
+Uses the fake chains from bench_async_graph: the router, grader and
+generation calls each wait a fixed latency and the retriever returns fixed
+documents after its own latency. Time to first token is measured from
+invoking the graph to the generation chain being called, which is when a
+real model would start streaming.
+
+Modes: "off" (route, then retrieve, then grade), "retrieve" (retrieval
+runs alongside routing) and "grade" (retrieval and grading run alongside
+routing). Simulated-generation turns are measured too, to show that the
+discarded speculative work does not delay them.
+
+Usage:
+    python -m benchmarks.bench_speculative --turns 10 --router-latency 0.4 --retrieval-latency 0.1
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import statistics
+import sys
+import time
+from typing import Callable, List
+
+from langchain_core.runnables import RunnableLambda
+
+from benchmarks.bench_async_graph import _fake, _install_fakes, _state
+from src.chains.router import RouteQuery
+import src.graph as graph
+
+MODES = ("off", "retrieve", "grade")
+
+
+def _record_first_call(result, latency: float, calls: List[float]) -> RunnableLambda:
+    def func(_):
+        calls.append(time.perf_counter())
+        time.sleep(latency)
+        return result
+
+    async def afunc(_):
+        calls.append(time.perf_counter())
+        await asyncio.sleep(latency)
+        return result
+
+    return RunnableLambda(func, afunc=afunc)
+
+
+def _ttft(run: Callable[[dict], None], turns: int, calls: List[float]) -> List[float]:
+    samples = []
+    for i in range(turns):
+        calls.clear()
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            run(_state(i))
+        samples.append((calls[0] - started) * 1000)
+    return samples
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--router-latency", type=float, default=0.4, help="seconds per router call")
+    parser.add_argument("--retrieval-latency", type=float, default=0.1, help="seconds per retriever call")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="seconds per grading/generation call")
+    args = parser.parse_args()
+
+    _install_fakes(args.llm_latency, retrieval_latency=args.retrieval_latency)
+    calls: List[float] = []
+    nodes = {name: sys.modules[f"src.nodes.{name}"] for name in ("route_question", "generate", "simulated_generate")}
+    nodes["generate"].generation_chain = _record_first_call("answer", args.llm_latency, calls)
+    nodes["simulated_generate"].simulated_generation_chain = _record_first_call("answer", args.llm_latency, calls)
+
+    print(
+        f"📊 Speculative retrieval benchmark: {args.turns} turns per row, router {args.router_latency * 1000:.0f} ms, "
+        f"retrieval {args.retrieval_latency * 1000:.0f} ms, grading/generation {args.llm_latency * 1000:.0f} ms"
+    )
+    print(f"{'path':<12}{'graph':<8}{'mode':<10}{'p50 TTFT ms':>13}{'saving ms':>11}")
+    for datasource in ("vectorstore", "simulated_generation"):
+        nodes["route_question"].question_router = _fake(RouteQuery(datasource=datasource), args.router_latency)
+        path = "RAG" if datasource == "vectorstore" else "simulated"
+        for asynchronous in (False, True):
+            baseline = None
+            for mode in MODES:
+                app = graph.build_workflow(asynchronous=asynchronous, speculative=mode).compile()
+                if asynchronous:
+                    run = lambda state, app=app: asyncio.run(app.ainvoke(state))
+                else:
+                    run = app.invoke
+                p50 = statistics.median(_ttft(run, args.turns, calls))
+                baseline = p50 if baseline is None else baseline
+                print(
+                    f"{path:<12}{'async' if asynchronous else 'sync':<8}{mode:<10}{p50:>13.0f}{baseline - p50:>11.0f}"
+                )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
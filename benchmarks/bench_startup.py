@@ -0,0 +1,73 @@
+"""
+Cold-start cost of importing the compiled conversation graph.
+
+Each run imports src.graph in a fresh Python process and reports the import
+time, so the numbers include module loading and graph compilation but not
+interpreter start-up. With --render each child also renders graph.png
+through the Mermaid web service, which is what every import used to do.
+
+No LLM is called; a placeholder OPENAI_API_KEY is set when none is
+configured because the chat model clients require one at construction.
+
+Usage:
+    python -m benchmarks.bench_startup --runs 5
+    python -m benchmarks.bench_startup --runs 5 --render   # needs network
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+CHILD = """
+import time
+started = time.perf_counter()
+from src.graph import app
+imported = time.perf_counter() - started
+rendered, ok = 0.0, 1
+if {render}:
+    started = time.perf_counter()
+    try:
+        app.get_graph().draw_mermaid_png(output_file_path={output!r})
+    except Exception:
+        ok = 0
+    rendered = time.perf_counter() - started
+print(imported, rendered, ok)
+"""
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--render", action="store_true", help="also time the PNG render the import used to do")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault("OPENAI_API_KEY", "sk-placeholder")
+    output = os.path.join(tempfile.mkdtemp(), "graph.png")
+    code = CHILD.format(render=args.render, output=output)
+
+    imports, renders, failures = [], [], 0
+    for _ in range(args.runs):
+        result = subprocess.run(
+            [sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True
+        )
+        imported, rendered, ok = map(float, result.stdout.split()[-3:])
+        imports.append(imported * 1000)
+        renders.append(rendered * 1000)
+        failures += not ok
+
+    print(f"📊 Startup benchmark: import src.graph, {args.runs} cold processes")
+    print(f"{'phase':<22}{'p50 ms':>10}{'min ms':>10}{'max ms':>10}")
+    print(f"{'import + compile':<22}{statistics.median(imports):>10.1f}{min(imports):>10.1f}{max(imports):>10.1f}")
+    if args.render:
+        print(f"{'mermaid png render':<22}{statistics.median(renders):>10.1f}{min(renders):>10.1f}{max(renders):>10.1f}")
+        if failures:
+            print(f"Render failed in {failures}/{args.runs} runs (no network?); an import that renders would have raised.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""
+Time to first visible token: app.invoke vs stream_answer.
+
+The router and graders are the fixed-latency fakes from bench_async_graph;
+the generation chain is a fake chat model tagged like the real one, which
+waits --token-latency per token. With app.invoke nothing can be shown until
+the whole pipeline (generation and both generation graders) is done; with
+stream_answer the first token is shown as soon as generation starts.
+
+Usage:
+    python -m benchmarks.bench_streaming --turns 5 --latency 0.3 --token-latency 0.02
+"""
+
+import argparse
+import contextlib
+import io
+import statistics
+import sys
+import time
+
+from langchain_core.language_models import FakeListChatModel
+from langchain_core.messages import AIMessageChunk
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.outputs import ChatGenerationChunk
+from langchain_core.runnables import RunnableLambda
+
+from benchmarks.bench_async_graph import _install_fakes, _state
+from src.chains.generation import GENERATION_TAG
+import src.graph as graph
+
+ANSWER = " ".join(f"word{i}" for i in range(60))
+
+
+class WordStreamingModel(FakeListChatModel):
+    """Pays `sleep` seconds per word whether the answer is streamed or returned whole."""
+
+    def _call(self, *args, **kwargs) -> str:
+        time.sleep(self.sleep * len(ANSWER.split()))
+        return ANSWER
+
+    def _stream(self, *args, **kwargs):
+        for word in ANSWER.split(" "):
+            time.sleep(self.sleep)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.3, help="seconds per router/grader call")
+    parser.add_argument("--token-latency", type=float, default=0.02, help="seconds per generated token")
+    args = parser.parse_args()
+
+    _install_fakes(args.latency)
+    model = WordStreamingModel(responses=[ANSWER], sleep=args.token_latency, tags=[GENERATION_TAG])
+    sys.modules["src.nodes.generate"].generation_chain = (
+        RunnableLambda(lambda _: ANSWER) | model | StrOutputParser()
+    )
+
+    invoke, first_token, complete = [], [], []
+    for i in range(args.turns):
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            graph.app.invoke(_state(i))
+            invoke.append((time.perf_counter() - started) * 1000)
+
+            started = time.perf_counter()
+            first = None
+            for event, _ in graph.stream_answer(_state(i)):
+                if event == "token" and first is None:
+                    first = time.perf_counter() - started
+            first_token.append(first * 1000)
+            complete.append((time.perf_counter() - started) * 1000)
+
+    print(
+        f"📊 Streaming benchmark: {args.turns} RAG turns, {args.latency * 1000:.0f} ms per router/grader call, "
+        f"{len(ANSWER.split())} tokens at {args.token_latency * 1000:.0f} ms"
+    )
+    print(f"{'interface':<16}{'p50 first text ms':>19}{'p50 complete ms':>17}")
+    print(f"{'app.invoke':<16}{statistics.median(invoke):>19.0f}{statistics.median(invoke):>17.0f}")
+    print(f"{'stream_answer':<16}{statistics.median(first_token):>19.0f}{statistics.median(complete):>17.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
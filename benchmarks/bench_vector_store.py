@@ -0,0 +1,137 @@
+"""
+Compare the Chroma and NumPy vector store backends on query latency and memory.
+
+Each backend is built once in a child process, then reopened from disk in a
+fresh child process that measures open time, top-3 query latency and the
+resident memory added by the store, so numbers are not polluted by imports
+or by the build phase.
+
+Usage:
+    python -m benchmarks.bench_vector_store --rows 2000 --dim 3072
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BACKENDS = ["chroma", "numpy-float32", "numpy-float16"]
+
+
+def _rss_mb() -> float:
+    """Current resident set size in MB (Linux), falling back to peak RSS."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+
+
+def _vectors(rows: int, dim: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((rows, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _open_store(backend: str, workdir: str, embedding):
+    if backend == "chroma":
+        from langchain_chroma import Chroma
+        return Chroma(collection_name="bench", embedding_function=embedding, persist_directory=workdir)
+
+    from src.numpy_store import NumpyVectorStore
+    return NumpyVectorStore(embedding, persist_directory=workdir, dtype=backend.split("-")[1])
+
+
+def _child(args) -> dict:
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+
+    embedding = DeterministicFakeEmbedding(size=args.dim)
+
+    if args.phase == "build":
+        vectors = _vectors(args.rows, args.dim, seed=0)
+        store = _open_store(args.backend, args.workdir, embedding)
+        ids = [f"doc-{i}" for i in range(args.rows)]
+        texts = [f"document {i}" for i in range(args.rows)]
+        started = time.perf_counter()
+        for start in range(0, args.rows, 1000):
+            end = start + 1000
+            if args.backend == "chroma":
+                store._collection.upsert(ids=ids[start:end], embeddings=vectors[start:end].tolist(), documents=texts[start:end])
+            else:
+                store.add_embeddings(ids[start:end], vectors[start:end], texts[start:end])
+        if args.backend != "chroma":
+            store.persist()
+        return {"build_s": time.perf_counter() - started}
+
+    queries = _vectors(args.queries, args.dim, seed=1)
+    rss_before = _rss_mb()
+    started = time.perf_counter()
+    store = _open_store(args.backend, args.workdir, embedding)
+    open_s = time.perf_counter() - started
+
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        store.similarity_search_by_vector(query.tolist(), k=3)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    latencies.sort()
+    return {
+        "open_s": open_s,
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1],
+        "rss_mb": _rss_mb() - rss_before,
+    }
+
+
+def _run_child(backend: str, phase: str, workdir: str, args) -> dict:
+    output = subprocess.run(
+        [
+            sys.executable, "-m", "benchmarks.bench_vector_store",
+            "--child", "--backend", backend, "--phase", phase, "--workdir", workdir,
+            "--rows", str(args.rows), "--dim", str(args.dim), "--queries", str(args.queries),
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--dim", type=int, default=3072)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--backend", choices=BACKENDS, help=argparse.SUPPRESS)
+    parser.add_argument("--phase", choices=["build", "query"], help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(_child(args)))
+        return 0
+
+    print(f"📊 Vector store benchmark: {args.rows} rows x {args.dim} dims, {args.queries} queries, k=3")
+    print(f"{'backend':<15}{'build s':>10}{'open s':>10}{'p50 ms':>10}{'p95 ms':>10}{'RSS MB':>10}")
+    for backend in BACKENDS:
+        with tempfile.TemporaryDirectory() as workdir:
+            result = _run_child(backend, "build", workdir, args)
+            result.update(_run_child(backend, "query", workdir, args))
+        print(
+            f"{backend:<15}{result['build_s']:>10.2f}{result['open_s']:>10.3f}"
+            f"{result['p50_ms']:>10.3f}{result['p95_ms']:>10.3f}{result['rss_mb']:>10.1f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
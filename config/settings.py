@@ -9,6 +9,31 @@ from pathlib import Path
 BASE_DIR = Path(__file__).parent.parent
 DATA_DIR = BASE_DIR / "data"
 CHROMA_DIR = BASE_DIR / ".chroma"
+CACHE_DIR = BASE_DIR / ".cache"
+
+# Written once the retriever is warm; checked by the Docker healthcheck
+READY_FILE = Path(os.getenv("READY_FILE", "/tmp/hospital_chatbot.ready"))
+
+# Conversation memory: older turns are folded into a running summary, the most
+# recent messages are kept verbatim up to this many tokens (see src/memory.py).
+# Token counts use tiktoken's o200k_base, read from tiktoken_cache_dir (baked
+# into the Docker image) or downloaded at warm-up; a failed load is retried
+# in the background every tokenizer_retry_seconds.
+MEMORY_CONFIG = {
+    "history_token_budget": int(os.getenv("MEMORY_HISTORY_TOKENS", "600")),
+    "tiktoken_cache_dir": Path(os.getenv("TIKTOKEN_CACHE_DIR", str(CACHE_DIR / "tiktoken"))),
+    "tokenizer_retry_seconds": float(os.getenv("TOKENIZER_RETRY_SECONDS", "300"))
+}
+
+# Retrieved documents in prompts (see src/context.py): total token budget, and the
+# fewest tokens worth keeping of a document that has to be truncated
+CONTEXT_CONFIG = {
+    "max_tokens": int(os.getenv("CONTEXT_MAX_TOKENS", "1000")),
+    "min_truncated_tokens": 60
+}
+
+# Conversation state per thread (LangGraph SQLite checkpointer), kept across restarts
+CHECKPOINT_DB = Path(os.getenv("CHECKPOINT_DB", str(CACHE_DIR / "checkpoints.sqlite3")))
 
 # Data files
 FAQ_DATA_FILE = DATA_DIR / "hospital_faq.csv"
@@ -42,6 +67,117 @@ LLM_CONFIG = {
     "max_generation_retries": 3
 }
 
+# Generation model tiers (see src/model_tiers.py), opt-in: simple knowledge base turns
+# are answered by the fast model; the rest, any turn whose earlier answer failed
+# grading, and every simulated generation turn by the strong one
+MODEL_TIERS_CONFIG = {
+    "enabled": os.getenv("MODEL_TIERING", "false").lower() == "true",
+    "fast_model": os.getenv("FAST_MODEL", "gpt-4.1-mini"),
+    "strong_model": os.getenv("STRONG_MODEL", "gpt-4.1"),
+    # A turn is simple with at most this many relevant documents, question words and earlier turns
+    "max_simple_documents": int(os.getenv("TIER_MAX_SIMPLE_DOCUMENTS", "2")),
+    "max_simple_question_words": int(os.getenv("TIER_MAX_SIMPLE_QUESTION_WORDS", "20")),
+    "max_simple_turns": int(os.getenv("TIER_MAX_SIMPLE_TURNS", "3")),
+    # USD per million tokens (input, cached input, output), for the per-tier cost breakdown
+    "prices": {
+        "gpt-4.1": (2.00, 0.50, 8.00),
+        "gpt-4.1-mini": (0.40, 0.10, 1.60),
+        "gpt-4.1-nano": (0.10, 0.025, 0.40)
+    }
+}
+
+# Grading Configuration
+GRADING_CONFIG = {
+    # Retrieved documents graded in parallel (one LLM call each)
+    "max_concurrency": int(os.getenv("GRADING_MAX_CONCURRENCY", "8")),
+    # Generation check: "separate" (hallucination grader, then answer grader)
+    # or "combined" (both scores from one structured-output call)
+    "generation_grader": os.getenv("GENERATION_GRADER", "separate")
+}
+
+# Ingestion Configuration
+INGESTION_CONFIG = {
+    # "incremental" embeds only new/changed rows, "rebuild" re-embeds everything
+    "mode": os.getenv("INGESTION_MODE", "incremental"),
+    "collection_name": "rag-chroma",
+    # Streaming pipeline: rows per embedding request, concurrent requests,
+    # request rate limit (0 = unlimited) and rows per vector store write
+    "chunk_size": int(os.getenv("INGESTION_CHUNK_SIZE", "256")),
+    "max_workers": int(os.getenv("INGESTION_MAX_WORKERS", "4")),
+    "requests_per_minute": float(os.getenv("INGESTION_REQUESTS_PER_MINUTE", "0")),
+    "write_batch_size": int(os.getenv("INGESTION_WRITE_BATCH_SIZE", "1000"))
+}
+
+# Knowledge base hot reload: watch the CSV and swap in a rebuilt retriever on change
+KB_RELOAD_CONFIG = {
+    "enabled": os.getenv("KB_HOT_RELOAD", "true").lower() == "true",
+    # Wait for writes to settle before rebuilding
+    "debounce_seconds": float(os.getenv("KB_RELOAD_DEBOUNCE_SECONDS", "2")),
+    # Poll instead of inotify/FSEvents (needed for some bind mounts, e.g. Docker Desktop)
+    "polling": os.getenv("KB_RELOAD_POLLING", "false").lower() == "true",
+    # How long a reload waits for queries on the old index before dropping its Chroma collection
+    "drain_timeout_seconds": float(os.getenv("KB_RELOAD_DRAIN_TIMEOUT_SECONDS", "30"))
+}
+
+# Question routing: "hybrid" tries the local router first and asks the LLM router only
+# when it is unsure, "llm" always asks the LLM router (see src/local_router.py)
+ROUTER_CONFIG = {
+    "mode": os.getenv("ROUTER_MODE", "hybrid"),
+    # Minimum gap between the two datasource scores for a local decision
+    "local_min_margin": float(os.getenv("ROUTER_LOCAL_MIN_MARGIN", "0.1")),
+    # Closest seed questions averaged per datasource
+    "local_neighbours": 3
+}
+
+# Semantic answer cache in front of the graph (see src/answer_cache.py)
+ANSWER_CACHE_CONFIG = {
+    "enabled": os.getenv("ANSWER_CACHE", "true").lower() == "true",
+    # Cosine similarity between normalised-question embeddings needed for a hit
+    "similarity_threshold": float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.95")),
+    "ttl_seconds": float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600")),
+    "max_entries": int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1000"))
+}
+
+# Vector Store Configuration
+VECTOR_STORE_CONFIG = {
+    # "chroma" or "numpy" (brute-force scan over a memory-mapped matrix)
+    "backend": os.getenv("VECTOR_STORE", "chroma"),
+    "numpy_dir": CACHE_DIR / "numpy_index",
+    # "float32", "float16" or "int8" (per-vector scale factors)
+    "numpy_dtype": os.getenv("VECTOR_STORE_DTYPE", "float32"),
+    # Quantised indexes only: candidates rescored with exact float32 vectors (0 = off)
+    "numpy_rescore_candidates": int(os.getenv("VECTOR_STORE_RESCORE_CANDIDATES", "0")),
+    # Two-stage search: scan the first N dimensions (0 = single stage), then
+    # rescore this many candidates at full dimension
+    "numpy_truncate_dim": int(os.getenv("VECTOR_STORE_TRUNCATE_DIM", "0")),
+    "numpy_candidate_pool": int(os.getenv("VECTOR_STORE_CANDIDATE_POOL", "50"))
+}
+
+# Embedding Configuration
+EMBEDDING_CONFIG = {
+    # "openai" or "local" (offline hashed character n-grams, no API key needed)
+    "provider": os.getenv("EMBEDDING_PROVIDER", "openai"),
+    "model": "text-embedding-3-large",
+    "local_dim": int(os.getenv("LOCAL_EMBEDDING_DIM", "1024")),
+    # "sqlite" (persistent), "memory" (per process) or "none"
+    "cache_backend": os.getenv("EMBEDDING_CACHE", "sqlite"),
+    "cache_path": CACHE_DIR / "embeddings.sqlite3",
+    "cache_max_entries": int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "50000"))
+}
+
+# Retrieval Configuration
+RETRIEVAL_CONFIG = {
+    # Start work before the router answers: "off", "retrieve" (retrieval runs
+    # alongside routing) or "grade" (retrieval and document grading do)
+    "speculative": os.getenv("SPECULATIVE_RETRIEVAL", "off"),
+    "k": 3,
+    # "hybrid" fuses BM25 and dense results with reciprocal rank fusion, "dense" is vector search only
+    "mode": os.getenv("RETRIEVAL_MODE", "hybrid"),
+    # Candidates taken from each retriever before fusion, and the RRF rank constant
+    "candidate_k": 10,
+    "rrf_k": 60
+}
+
 # Hospital Services
 HOSPITAL_SERVICES = [
     "🚨 الرعاية الطارئة",
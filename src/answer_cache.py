@@ -0,0 +1,267 @@
+"""
+Semantic answer cache in front of the conversation graph.
+
+Patients ask the same handful of standalone questions (clinics, working
+hours, insurance, prices) over and over. A repeat is answered from an
+earlier turn instead of running retrieval, grading, generation and the
+generation graders again:
+
+- questions match on the cosine similarity of their normalised-text
+  embeddings (ANSWER_CACHE_CONFIG["similarity_threshold"]);
+- a candidate is only served once the local router (no API call) is
+  confident the new question takes the route stored with the entry, so
+  the routing decision is part of the key; when it is not confident the
+  turn runs the graph as a miss;
+- entries belong to the knowledge base version they were answered from and
+  are dropped when a reload swaps in a new one;
+- entries expire after ttl_seconds and the least recently used are evicted
+  beyond max_entries.
+
+Only knowledge base answers accepted by the graders are stored; simulated
+answers can be personal (bookings, complaints). Turns that depend on the
+conversation bypass the cache (see normalization.is_follow_up).
+
+Coverage is limited to what the local router decides on its own: a
+question it leaves to the LLM router is never served, however often it is
+repeated. On bench_router's labelled messages at the default margin (0.1)
+it decides 26 of 52, and repeats of 21 of the 27 knowledge base questions
+(78%) can hit; the other six always miss and run the graph.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from config.settings import ANSWER_CACHE_CONFIG
+from src.embeddings import get_embeddings
+from src.graph import (
+    AnswerEvent,
+    is_threaded,
+    app,
+    append_turn,
+    get_persistent_app,
+    stream_answer,
+    thread_history,
+)
+from src.local_router import confident_route
+from src.metrics import metrics
+from src.normalization import is_follow_up, normalize_text
+from src.retriever import kb_version
+
+class _Entry:
+    def __init__(self, question: str, route: str, version: int, state: Dict[str, Any]):
+        self.question = question
+        self.route = route
+        self.version = version
+        self.state = state
+        self.created = time.monotonic()
+
+
+class AnswerCache:
+    """Thread-safe semantic cache of final graph states, keyed by question embedding, route and KB version."""
+
+    def __init__(
+        self,
+        similarity_threshold: float = ANSWER_CACHE_CONFIG["similarity_threshold"],
+        ttl_seconds: float = ANSWER_CACHE_CONFIG["ttl_seconds"],
+        max_entries: int = ANSWER_CACHE_CONFIG["max_entries"],
+    ):
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._vectors: Dict[int, np.ndarray] = {}
+        self._next_id = 0
+        self._version: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def embed(question: str) -> np.ndarray:
+        vector = np.asarray(get_embeddings().embed_query(normalize_text(question)), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _drop(self, entry_id: int) -> None:
+        del self._entries[entry_id]
+        del self._vectors[entry_id]
+
+    def _sync_version(self, version: int) -> None:
+        # Answers from another knowledge base version may be stale
+        if self._version != version:
+            if self._entries:
+                metrics.increment("answer_cache.invalidations")
+                print(f"---ANSWER CACHE: KB VERSION {version}, DROPPED {len(self._entries)} ENTRIES---")
+            self._entries.clear()
+            self._vectors.clear()
+            self._version = version
+
+    def candidate(self, vector: np.ndarray, version: int) -> Optional[Tuple[int, _Entry, float]]:
+        """Most similar live entry at or above the threshold, as (id, entry, similarity)."""
+        with self._lock:
+            self._sync_version(version)
+            now = time.monotonic()
+            for entry_id in [i for i, e in self._entries.items() if now - e.created > self.ttl_seconds]:
+                self._drop(entry_id)
+                metrics.increment("answer_cache.expirations")
+            if not self._entries:
+                return None
+
+            ids = list(self._vectors)
+            similarities = np.stack([self._vectors[i] for i in ids]) @ vector
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.similarity_threshold:
+                return None
+            return ids[best], self._entries[ids[best]], float(similarities[best])
+
+    def touch(self, entry_id: int) -> None:
+        with self._lock:
+            if entry_id in self._entries:
+                self._entries.move_to_end(entry_id)
+
+    def put(self, question: str, vector: np.ndarray, route: str, version: int, state: Dict[str, Any]) -> None:
+        with self._lock:
+            if self._version is not None and version < self._version:
+                return
+            self._sync_version(version)
+            self._entries[self._next_id] = _Entry(question, route, version, state)
+            self._vectors[self._next_id] = vector
+            self._next_id += 1
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                metrics.increment("answer_cache.evictions")
+            metrics.set_gauge("answer_cache.entries", len(self._entries))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._vectors.clear()
+            metrics.set_gauge("answer_cache.entries", 0)
+
+
+# Process-wide cache used by cached_invoke / cached_stream_answer
+answer_cache = AnswerCache()
+
+# The answer itself; the rest of a final state (history, retry counters) belongs to its conversation
+_CACHED_FIELDS = ("generation", "documents", "datasource", "categories", "answered_by")
+
+
+# Hits and misses since start-up, for the hit rate gauge
+_outcomes = {"hits": 0, "misses": 0}
+_outcomes_lock = threading.Lock()
+
+
+def _record(outcome: str) -> None:
+    metrics.increment(f"answer_cache.{outcome}")
+    if outcome not in _outcomes:
+        return
+    with _outcomes_lock:
+        _outcomes[outcome] += 1
+        hit_rate = _outcomes["hits"] / (_outcomes["hits"] + _outcomes["misses"])
+    metrics.set_gauge("answer_cache.hit_rate", hit_rate)
+
+
+class _Lookup:
+    """One turn's pass through the cache: lookup before the graph runs, store after."""
+
+    def __init__(self, inputs: Dict[str, Any], config: Optional[Dict[str, Any]], cacheable: bool, cache: AnswerCache):
+        self.inputs = inputs
+        self.config = config
+        self.cache = cache
+        self.started = time.perf_counter()
+        self.vector: Optional[np.ndarray] = None
+        self.version = kb_version()
+        self.hit = False
+        self.state: Dict[str, Any] = {}
+
+        question = inputs["question"]
+        if not ANSWER_CACHE_CONFIG["enabled"] or not cacheable:
+            _record("bypasses")
+            return
+        history = self._history()
+        if is_follow_up(question, history):
+            _record("bypasses")
+            return
+
+        with metrics.timed("answer_cache.lookup"):
+            self.vector = cache.embed(question)
+            found = cache.candidate(self.vector, self.version)
+            # Only a near-duplicate is routed; an unsure local router means a miss, never an LLM call
+            if found is not None:
+                route = confident_route(question, history)
+                self.hit = route == found[1].route
+                if route is None:
+                    metrics.increment("answer_cache.unconfirmed")
+
+        if self.hit:
+            entry_id, entry, similarity = found
+            cache.touch(entry_id)
+            print(f"---ANSWER CACHE HIT ({similarity:.3f}): {entry.question!r}---")
+            self.state = {**inputs, **entry.state}
+            if is_threaded(config):
+                append_turn(config, inputs.get("user_message") or question, entry.state["generation"])
+            _record("hits")
+            metrics.observe("answer_cache.turn_hit", time.perf_counter() - self.started)
+        else:
+            _record("misses")
+
+    def _history(self) -> List[dict]:
+        if "conversation_history" in self.inputs or not is_threaded(self.config):
+            return self.inputs.get("conversation_history") or []
+        return thread_history(self.config)
+
+    def store(self, state: Dict[str, Any]) -> None:
+        if self.vector is None:
+            return
+        metrics.observe("answer_cache.turn_miss", time.perf_counter() - self.started)
+        # Knowledge base answers only, and only if the knowledge base did not change mid-turn
+        if state.get("answered_by") == "generate" and kb_version() == self.version:
+            answer = {field: state.get(field) for field in _CACHED_FIELDS}
+            self.cache.put(self.inputs["question"], self.vector, state["datasource"], self.version, answer)
+
+
+def cached_invoke(
+    inputs: Dict[str, Any],
+    config: Optional[Dict[str, Any]] = None,
+    cacheable: bool = True,
+    cache: AnswerCache = answer_cache,
+) -> Dict[str, Any]:
+    """
+    app.invoke behind the answer cache (the checkpointed app for a config with a thread_id).
+
+    Pass cacheable=False for turns the caller knows depend on earlier ones
+    (e.g. a follow-up to a FAQ answer rewritten with its context). A hit on
+    a thread is still recorded in its history.
+    """
+    lookup = _Lookup(inputs, config, cacheable, cache)
+    if lookup.hit:
+        return lookup.state
+    state = (get_persistent_app() if is_threaded(config) else app).invoke(inputs, config)
+    lookup.store(state)
+    return state
+
+
+def cached_stream_answer(
+    inputs: Dict[str, Any],
+    config: Optional[Dict[str, Any]] = None,
+    cacheable: bool = True,
+    cache: AnswerCache = answer_cache,
+) -> Iterator[AnswerEvent]:
+    """stream_answer behind the answer cache; a hit is yielded as a single token."""
+    lookup = _Lookup(inputs, config, cacheable, cache)
+    if lookup.hit:
+        yield "token", lookup.state["generation"]
+        yield "end", lookup.state
+        return
+
+    state: Dict[str, Any] = {}
+    for event, value in stream_answer(inputs, config):
+        if event == "end":
+            state = value
+        yield event, value
+    lookup.store(state)
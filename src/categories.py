@@ -0,0 +1,110 @@
+"""
+Knowledge base partitions matching the router's five categories.
+
+The CSV's Category column mixes these (e.g. consultation fees sit under
+"Information about Clinic / Specialty (doctors and prices)" and lab tests
+have no column value of their own), so rows are assigned from their
+Category and Question text. A row can belong to several partitions; a row
+matching none belongs to all of them so a filter never hides it.
+
+Membership is stored as one boolean metadata flag per category
+(category_clinics, category_prices, ...), which both Chroma's `where`
+filters and NumpyVectorStore understand.
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.documents import Document
+
+from src.normalization import normalize_text
+
+CATEGORIES = ("clinics", "prices", "insurance", "lab_radiology", "departments")
+
+# Keywords in normalised form (see normalize_text), matched as whole words:
+# a word may carry an Arabic clitic prefix (و, ب, ال, ...) and a suffix from
+# _SUFFIXES, so "والتامين" and "clinics" match but "فيتامين" and "feedback" do not.
+# Keywords of several words match as a phrase.
+_KEYWORDS = {
+    "clinics": (
+        "عياده", "عيادات", "تخصص", "تخصصات", "دكاتره", "اطباء", "مواعيد",
+        "clinic", "specialty", "specialties", "specialist", "doctor", "appointment",
+    ),
+    "prices": ("سعر", "اسعار", "تكلفه", "عمليات الجراحيه", "price", "cost", "fee", "surgical"),
+    "insurance": ("تامين", "insurance"),
+    "lab_radiology": (
+        "اشعه", "تحاليل", "تحليل", "معمل", "مختبر", "radiology", "laboratory", "laboratories", "x ray",
+    ),
+    "departments": ("قسم", "اقسام", "وحدات", "طوارئ", "department", "units", "emergency"),
+}
+
+# Longest first, so "وال" is stripped before "و"
+_PREFIXES = ("وال", "بال", "فال", "كال", "لل", "ال", "و", "ف", "ب", "ل", "ك")
+# English plurals and Arabic possessive pronouns
+_SUFFIXES = ("", "s", "es", "ي", "ك", "كم", "ه", "ها", "هم", "نا")
+
+
+def _word_forms(word: str) -> List[str]:
+    """The word itself and the word with each matching clitic prefix removed."""
+    return [word] + [word[len(prefix):] for prefix in _PREFIXES if word.startswith(prefix) and len(word) - len(prefix) > 1]
+
+
+def _has_keyword(words: List[str], padded: str, keyword: str) -> bool:
+    if " " in keyword:
+        return f" {keyword} " in padded
+    return any(
+        form.startswith(keyword) and form[len(keyword):] in _SUFFIXES
+        for word in words
+        for form in _word_forms(word)
+    )
+
+
+_FIELD = re.compile(r"^(Category|Question): (.*)$", re.MULTILINE)
+
+
+def metadata_key(category: str) -> str:
+    return f"category_{category}"
+
+
+def text_categories(text: str) -> List[str]:
+    """Categories whose keywords occur in the text (possibly none)."""
+    text = normalize_text(text)
+    words, padded = text.split(), f" {text} "
+    return [
+        category for category in CATEGORIES
+        if any(_has_keyword(words, padded, keyword) for keyword in _KEYWORDS[category])
+    ]
+
+
+def categorize(document: Document) -> List[str]:
+    """Categories a knowledge base row belongs to, from its Category and Question fields."""
+    text = " ".join(value for _, value in _FIELD.findall(document.page_content))
+    return text_categories(text) or list(CATEGORIES)
+
+
+def with_categories(document: Document) -> Document:
+    """Set one boolean metadata flag per category on the document (in place) and return it."""
+    member = set(categorize(document))
+    for category in CATEGORIES:
+        document.metadata[metadata_key(category)] = category in member
+    return document
+
+
+def category_flags(metadata: Dict[str, Any]) -> Dict[str, bool]:
+    """The category flags in a row's metadata, i.e. the fields retrieval filters on."""
+    return {metadata_key(category): bool(metadata.get(metadata_key(category))) for category in CATEGORIES}
+
+
+def category_filter(categories: Sequence[str]) -> Optional[Dict[str, Any]]:
+    """Chroma-style `where` filter selecting rows in any of the given categories (None = no filter)."""
+    clauses = [{metadata_key(category): True} for category in dict.fromkeys(categories) if category in CATEGORIES]
+    if not clauses:
+        return None
+    if len(clauses) == 1:
+        return clauses[0]
+    return {"$or": clauses}
+
+
+def in_categories(document: Document, categories: Sequence[str]) -> bool:
+    """Whether the document belongs to any of the given categories."""
+    return any(document.metadata.get(metadata_key(category)) for category in categories)
@@ -3,6 +3,8 @@ from langchain_core.runnables import RunnableSequence
 from langchain_openai import ChatOpenAI
 from pydantic import BaseModel, Field
 
+from src.llm_usage import PromptCacheUsage
+
 
 class GradeAnswer(BaseModel):
 
@@ -11,7 +13,7 @@ class GradeAnswer(BaseModel):
     )
 
 
-llm = ChatOpenAI(model="gpt-4.1-mini", temperature=0)
+llm = ChatOpenAI(model="gpt-4.1-mini", temperature=0, callbacks=[PromptCacheUsage("answer_grader")])
 structured_llm_grader = llm.with_structured_output(GradeAnswer)
 
 system = """You are a grader assessing whether an answer addresses / resolves a question \n 
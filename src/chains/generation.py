@@ -1,25 +1,38 @@
-from langchain_core.prompts import PromptTemplate
+from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_openai import ChatOpenAI
 
-llm = ChatOpenAI(model="gpt-4.1", temperature=0)
+from src.context import with_formatted_context
+from src.llm_usage import PromptCacheUsage, TierUsage
+from src.model_tiers import tier_model, tiered
 
+# Tokens from LLMs carrying this tag are the answer; src.graph streams them to the UI
+GENERATION_TAG = "answer_generation"
 
-prompt_template = PromptTemplate.from_template("""
+
+def _llm(tier: str) -> ChatOpenAI:
+    return ChatOpenAI(
+        model=tier_model(tier),
+        temperature=0,
+        tags=[GENERATION_TAG],
+        callbacks=[PromptCacheUsage("generation"), TierUsage(tier, tier_model(tier))],
+    )
+
+
+# Strong model unless the call's config selects another tier (see src/model_tiers.py)
+llm = tiered(_llm)
+
+
+# Static instructions first and the per-request variables last, so the provider
+# can serve the repeated prefix from its prompt cache (see src/llm_usage.py)
+system = """
 You are a Medical Assistant with a access to the hospital knowledge base, a factual answer engine for hospital information.  
-Your ONLY knowledge source is the **document snippets provided below**.  
+Your ONLY knowledge source is the **document snippets provided in the Context**.  
 If the answer is not fully contained in those snippets, simulate the answer as you have the knowledge with the context provided.  
 Always give a concise and organized markdown answer first, and then ask if they need more details or assistance, using at the beginning clear symbols like ❓ or ‼️ for questions and ✅ for confirmation.
 
-### Context ###
-Previous Conversation:
-{conversation_history}
-
-Question: {question} 
-Context: {context} 
-
 ### Instructions ###
-1. Read the **user question** and the **Context** and the **Previous Conversation** above.  
+1. Read the **user question**, the **Context** and the **Previous Conversation** in the user message.  
 2. Draft an answer **solely** from the Context. Quote or paraphrase accurately.    
 3. If parts of the question cannot be answered with the Context, simulate the answer as you have the knowledge with the context provided.  
 4. Safety: never provide diagnostic or prescriptive medical advice; suggest consulting a qualified clinician for personal guidance.  
@@ -27,9 +40,16 @@ Context: {context}
 
 
 Answer <one-to-three-markdown sentence answer> in the language/dialect of the question.
-""")
+"""
+
+prompt_template = ChatPromptTemplate.from_messages(
+    [
+        ("system", system),
+        ("human", "### Context ###\nPrevious Conversation:\n{conversation_history}\n\nContext: {context}\n\nQuestion: {question}"),
+    ]
+)
 
 
 output_parser = StrOutputParser()
 
-generation_chain = prompt_template | llm | output_parser
+generation_chain = with_formatted_context("context") | prompt_template | llm | output_parser
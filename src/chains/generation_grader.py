@@ -0,0 +1,39 @@
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableSequence
+from langchain_openai import ChatOpenAI
+from pydantic import BaseModel, Field
+
+from src.context import with_formatted_context
+from src.llm_usage import PromptCacheUsage
+
+llm = ChatOpenAI(model="gpt-4.1-mini", temperature=0, callbacks=[PromptCacheUsage("generation_grader")])
+
+
+class GradeGeneration(BaseModel):
+    """Binary scores for groundedness and answer relevance of a generation, graded together."""
+
+    grounded: bool = Field(
+        description="Answer is grounded in the facts, 'yes' or 'no'"
+    )
+    addresses_question: bool = Field(
+        description="Answer addresses the question, 'yes' or 'no'"
+    )
+
+
+structured_llm_grader = llm.with_structured_output(GradeGeneration)
+
+system = """You are a grader assessing an LLM generation against a set of retrieved facts and a user question. \n 
+     Give two independent binary scores 'yes' or 'no': \n
+     - grounded: 'yes' means that the answer is grounded in / supported by the set of facts. \n
+     - addresses_question: 'yes' means that the answer resolves the question."""
+generation_grader_prompt = ChatPromptTemplate.from_messages(
+    [
+        ("system", system),
+        ("human", "Set of facts: \n\n {documents} \n\n User question: \n\n {question} \n\n LLM generation: {generation}"),
+    ]
+)
+
+# One call instead of hallucination_grader followed by answer_grader
+generation_grader: RunnableSequence = (
+    with_formatted_context("documents") | generation_grader_prompt | structured_llm_grader
+)
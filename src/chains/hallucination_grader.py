@@ -3,7 +3,10 @@ from langchain_core.runnables import RunnableSequence
 from langchain_openai import ChatOpenAI
 from pydantic import BaseModel, Field
 
-llm = ChatOpenAI(model="gpt-4.1-mini", temperature=0)
+from src.context import with_formatted_context
+from src.llm_usage import PromptCacheUsage
+
+llm = ChatOpenAI(model="gpt-4.1-mini", temperature=0, callbacks=[PromptCacheUsage("hallucination_grader")])
 
 
 class GradeHallucinations(BaseModel):
@@ -25,4 +28,4 @@ hallucination_prompt = ChatPromptTemplate.from_messages(
     ]
 )
 
-hallucination_grader: RunnableSequence = hallucination_prompt | structured_llm_grader
+hallucination_grader: RunnableSequence = with_formatted_context("documents") | hallucination_prompt | structured_llm_grader
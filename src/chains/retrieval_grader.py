@@ -2,7 +2,10 @@ from langchain_core.prompts import ChatPromptTemplate
 from langchain_openai import ChatOpenAI
 from pydantic import BaseModel, Field
 
-llm = ChatOpenAI(model="gpt-4.1-mini", temperature=0)
+from src.context import with_formatted_context
+from src.llm_usage import PromptCacheUsage
+
+llm = ChatOpenAI(model="gpt-4.1-mini", temperature=0, callbacks=[PromptCacheUsage("retrieval_grader")])
 
 
 class GradeDocuments(BaseModel):
@@ -25,4 +28,4 @@ grade_prompt = ChatPromptTemplate.from_messages(
     ]
 )
 
-retrieval_grader = grade_prompt | structured_llm_grader
+retrieval_grader = with_formatted_context("document") | grade_prompt | structured_llm_grader
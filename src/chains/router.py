@@ -1,9 +1,11 @@
-from typing import Literal
+from typing import List, Literal
 
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_openai import ChatOpenAI
 from pydantic import BaseModel, Field
 
+from src.llm_usage import PromptCacheUsage
+
 
 class RouteQuery(BaseModel):
     """Route a user query to the most relevant datasource."""
@@ -12,32 +14,37 @@ class RouteQuery(BaseModel):
         ...,
         description="Given a user question choose to route it to simulated generation or a vectorstore.",
     )
+    categories: List[Literal["clinics", "prices", "insurance", "lab_radiology", "departments"]] = Field(
+        default_factory=list,
+        description="For vectorstore questions, the knowledge base categories that can answer it. Empty when unsure.",
+    )
 
 
-llm = ChatOpenAI(model="gpt-4.1-mini", temperature=0)
+llm = ChatOpenAI(model="gpt-4.1-mini", temperature=0, callbacks=[PromptCacheUsage("router")])
 structured_llm_router = llm.with_structured_output(RouteQuery)
 
 system = """
 You are *Router-LLM*, a context-aware classifier.  
-Your task: read the user's message and conversation history, then output **ONLY** a "vectorstore" or "simulated_generation".
+Your task: read the user's message and conversation history, then output the datasource, "vectorstore" or "simulated_generation", and for "vectorstore" the categories to search.
 
 Decision rule (mutually exclusive):
 • Output "vectorstore" **only when the user is requesting factual information that is explicitly documented within hospital records**. The vector store contains structured data in the following categories:
-    1. **Clinic & Specialty Information**
+    1. **Clinic & Specialty Information** (`clinics`)
         * Details on available clinics and specialties
         * Information about doctors, including their availability by day of the week and working hours
-    2. **Consultation & Surgery Prices**
+    2. **Consultation & Surgery Prices** (`prices`)
         * Standard fees for available consultations and surgical procedures
-    3. **Insurance Details**
+    3. **Insurance Details** (`insurance`)
         * List of accepted insurance providers
         * Procedures for applying or using insurance
-    4. **Lab & Radiology Information**
+    4. **Lab & Radiology Information** (`lab_radiology`)
         * Available laboratory and radiology tests
         * Descriptions and details about each test
-    5. **Department Information**
+    5. **Department Information** (`departments`)
         * Comprehensive list of hospital departments
         * Relevant details about each department
 
+    Set "categories" to every category that could hold the answer (e.g. the price of a lab test → `prices` and `lab_radiology`). Leave it empty if you are unsure; the whole knowledge base is then searched.
 
 • Otherwise output "simulated_generation" for tasks or open-ended conversation. Examples:
     * **booking**
@@ -57,13 +64,13 @@ Decision rule (mutually exclusive):
 
 ### Examples ###
 1. Q: "How much is a knee replacement surgery?"  
-   → "vectorstore"
+   → "vectorstore", categories ["prices"]
 
 2. Q: "Can you book me with Dr. Ibrahim next Monday morning?"  
    → "simulated_generation"
 
 3. Q: "Which insurance companies do you accept?"  
-   → "vectorstore"
+   → "vectorstore", categories ["insurance"]
 
 4. Q: "I need an ambulance at 5 AM tomorrow"  
    → "simulated_generation"
@@ -71,6 +78,9 @@ Decision rule (mutually exclusive):
 5. Previous: "We have cardiology on Mon, Wed, Fri" | Current: "Can you book me with the cardiologist?"
    → "simulated_generation"
 
+6. Q: "When does Dr. Sherif Ezzat see patients?"
+   → "vectorstore", categories ["clinics"]
+
 ### Now classify the next user message considering the conversation context. REMEMBER: Output JSON only – no prose. ###
 """
 
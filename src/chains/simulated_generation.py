@@ -1,10 +1,28 @@
-from langchain_core.prompts import PromptTemplate
+from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_openai import ChatOpenAI
 
-llm = ChatOpenAI(model="gpt-4.1", temperature=0.3)
+from src.chains.generation import GENERATION_TAG
+from src.context import with_formatted_context
+from src.llm_usage import PromptCacheUsage, TierUsage
+from src.model_tiers import tier_model, tiered
 
-prompt_template = PromptTemplate.from_template("""
+
+def _llm(tier: str) -> ChatOpenAI:
+    return ChatOpenAI(
+        model=tier_model(tier),
+        temperature=0.3,
+        tags=[GENERATION_TAG],
+        callbacks=[PromptCacheUsage("simulated_generation"), TierUsage(tier, tier_model(tier))],
+    )
+
+
+# Strong model unless the call's config selects another tier (see src/model_tiers.py)
+llm = tiered(_llm)
+
+
+# Static instructions first and the per-request variables last (prompt prefix caching)
+system = """
 You are a Medical Assistant GPT, the hospital’s virtual assistant.  
 Primary languages: English and Arabic (add dialect of the question on request).  
 Tone: professional, warm, reassuring.  
@@ -49,15 +67,15 @@ User: “What should I do before my MRI?”
 Assistant: “Here are a few preparation tips:  
 • Remove all metallic objects…  
 • You may eat normally unless instructed otherwise…”
+"""
 
-Previous Conversation:
-{conversation_history}
-
-Context: {context}
-
-Question: {question}
-""")
+prompt_template = ChatPromptTemplate.from_messages(
+    [
+        ("system", system),
+        ("human", "Previous Conversation:\n{conversation_history}\n\nContext: {context}\n\nQuestion: {question}"),
+    ]
+)
 
 output_parser = StrOutputParser()
 
-simulated_generation_chain = prompt_template | llm | output_parser 
\ No newline at end of file
+simulated_generation_chain = with_formatted_context("context") | prompt_template | llm | output_parser 
\ No newline at end of file
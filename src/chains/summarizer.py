@@ -0,0 +1,21 @@
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_openai import ChatOpenAI
+
+from src.llm_usage import PromptCacheUsage
+
+llm = ChatOpenAI(model="gpt-4.1-mini", temperature=0, callbacks=[PromptCacheUsage("summarizer")])
+
+system = """You maintain the running summary of a conversation between a patient and a hospital assistant.
+Fold the new messages into the current summary and return the updated summary only.
+Keep what later turns may rely on: the patient's name and details they gave, clinics, doctors, dates,
+prices and insurance mentioned, bookings or requests in progress and anything still unresolved.
+Drop greetings and repeated information. Write at most 120 words, in the language of the conversation."""
+summary_prompt = ChatPromptTemplate.from_messages(
+    [
+        ("system", system),
+        ("human", "Current summary:\n{summary}\n\nNew messages:\n{messages}"),
+    ]
+)
+
+summarizer_chain = summary_prompt | llm | StrOutputParser()
@@ -0,0 +1,101 @@
+"""
+Compact rendering of retrieved documents for prompts.
+
+Every chain that reads documents (generation, simulated generation and the
+three graders) formats them here instead of receiving a list of Document
+objects, whose repr carries page_content=/metadata= noise and the loader's
+"Category: ... Question: ... Answer: ..." scaffolding. Documents become
+
+    [1] Q: <question>
+    A: <answer>
+
+in retrieval order. Repeated answers are kept once, and the whole context
+stays within CONTEXT_CONFIG["max_tokens"]: documents are added whole while
+they fit, the first one that does not is cut at a line boundary (marked
+with "…") if enough of it fits to be useful, and the rest are dropped.
+"""
+
+import re
+from typing import Any, List
+
+from langchain_core.documents import Document
+from langchain_core.runnables import Runnable, RunnablePassthrough
+
+from config.settings import CONTEXT_CONFIG
+from src.memory import count_tokens
+from src.normalization import normalize_text
+
+_FIELD = re.compile(r"^(Category|Question|Answer): ?", re.MULTILINE)
+TRUNCATED = "…"
+
+
+def format_document(document: Document) -> str:
+    """A knowledge base row as "Q: ...\\nA: ...", without the Category line; other content as is."""
+    content = document.page_content.strip()
+    parts = _FIELD.split(content)
+    if len(parts) < 3:
+        return content
+    fields = dict(zip(parts[1::2], (value.strip() for value in parts[2::2])))
+    lines = []
+    if fields.get("Question"):
+        lines.append(f"Q: {fields['Question']}")
+    if fields.get("Answer"):
+        lines.append(f"A: {fields['Answer']}")
+    return "\n".join(lines) or content
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    """Leading lines of text (the last one cut by characters if needed) within max_tokens, marked with "…"."""
+    kept = ""
+    for line in text.splitlines(keepends=True):
+        if count_tokens(kept + line + TRUNCATED) <= max_tokens:
+            kept += line
+            continue
+        # Shrink the line until it fits, at word boundaries
+        words = line.split(" ")
+        while words and count_tokens(kept + " ".join(words) + TRUNCATED) > max_tokens:
+            words = words[:-max(1, len(words) // 4)]
+        kept += " ".join(words)
+        break
+    return kept.rstrip() + TRUNCATED
+
+
+def format_documents(
+    documents: List[Document],
+    max_tokens: int = CONTEXT_CONFIG["max_tokens"],
+    min_truncated_tokens: int = CONTEXT_CONFIG["min_truncated_tokens"],
+) -> str:
+    """Numbered, de-duplicated documents within max_tokens (see module docstring)."""
+    blocks, seen, used = [], set(), 0
+    for document in documents:
+        text = format_document(document)
+        key = normalize_text(text.split("\nA: ", 1)[-1])
+        if key in seen:
+            continue
+        seen.add(key)
+
+        block = f"[{len(blocks) + 1}] {text}\n"
+        tokens = count_tokens(block)
+        if used + tokens <= max_tokens:
+            blocks.append(block)
+            used += tokens
+            continue
+        remaining = max_tokens - used
+        if remaining >= min_truncated_tokens or not blocks:
+            blocks.append(_truncate(block, remaining) + "\n")
+        break
+    return "".join(blocks).rstrip()
+
+
+def format_context(value: Any) -> str:
+    """Prompt text for a document, a list of documents, or text that is already formatted."""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, Document):
+        value = [value]
+    return format_documents(list(value))
+
+
+def with_formatted_context(*keys: str) -> Runnable:
+    """First step for a chain whose inputs carry documents under `keys`: replaces them with format_context text."""
+    return RunnablePassthrough.assign(**{key: (lambda inputs, key=key: format_context(inputs[key])) for key in keys})
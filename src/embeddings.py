@@ -0,0 +1,273 @@
+"""
+Embedding providers with a persistent, size-bounded cache.
+
+The same cached embeddings object is used for ingestion and for query-time
+retrieval, so a repeated question (or an unchanged knowledge base row) is
+embedded once and then served locally. A network-free hashing provider
+can replace OpenAI for tests, offline benchmarks and a low-latency mode.
+"""
+
+import hashlib
+import math
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from array import array
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_openai import OpenAIEmbeddings
+
+from config.settings import EMBEDDING_CONFIG
+from src.normalization import normalize_text
+
+
+def cache_key(model: str, text: str) -> str:
+    """Cache key for a text embedded with the given model."""
+    return hashlib.sha256(f"{model}\x00{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Deterministic local embeddings from hashed character n-grams.
+
+    Each normalised text is split into padded character n-grams, every n-gram
+    is hashed (crc32, stable across processes) into one of `dim` buckets with
+    a hash-derived sign, counts are log-scaled (sublinear TF) and the vector is
+    L2-normalised. No model download, no network, well under a millisecond
+    for a short question.
+    """
+
+    def __init__(self, dim: int = 1024, ngram_range: tuple = (2, 4)):
+        self.dim = dim
+        self.ngram_range = ngram_range
+
+    @property
+    def model(self) -> str:
+        low, high = self.ngram_range
+        return f"local-hashing-{self.dim}-{low}{high}"
+
+    def _ngrams(self, text: str) -> Counter:
+        counts: Counter = Counter()
+        low, high = self.ngram_range
+        for word in normalize_text(text).split():
+            padded = f" {word} "
+            for n in range(low, high + 1):
+                for start in range(max(len(padded) - n + 1, 1)):
+                    counts[padded[start:start + n]] += 1
+        return counts
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for gram, count in self._ngrams(text).items():
+            bucket = zlib.crc32(gram.encode("utf-8"))
+            sign = 1.0 if bucket & 0x80000000 else -1.0
+            vector[bucket % self.dim] += sign * (1.0 + math.log(count))
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector /= norm
+        return vector.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+class EmbeddingCache:
+    """Interface for embedding cache backends."""
+
+    def get_many(self, keys: List[str]) -> List[Optional[List[float]]]:
+        raise NotImplementedError
+
+    def put_many(self, items: Dict[str, List[float]]) -> None:
+        raise NotImplementedError
+
+
+class InMemoryEmbeddingCache(EmbeddingCache):
+    """Process-local LRU cache."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: List[str]) -> List[Optional[List[float]]]:
+        with self._lock:
+            vectors = []
+            for key in keys:
+                vector = self._entries.get(key)
+                if vector is not None:
+                    self._entries.move_to_end(key)
+                vectors.append(vector)
+            return vectors
+
+    def put_many(self, items: Dict[str, List[float]]) -> None:
+        with self._lock:
+            for key, vector in items.items():
+                self._entries[key] = vector
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class SQLiteEmbeddingCache(EmbeddingCache):
+    """
+    On-disk cache in a single SQLite file, shared across processes and restarts.
+
+    Vectors are stored as float32 blobs. When the cache grows past max_entries
+    the least recently used rows are evicted.
+    """
+
+    def __init__(self, path: str, max_entries: int):
+        self.max_entries = max_entries
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings "
+            "(key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+
+    def get_many(self, keys: List[str]) -> List[Optional[List[float]]]:
+        if not keys:
+            return []
+        found = {}
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+                self._conn.commit()
+        return [found.get(key) for key in keys]
+
+    def put_many(self, items: Dict[str, List[float]]) -> None:
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [(key, array("f", vector).tobytes(), now) for key, vector in items.items()],
+            )
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE key IN "
+                    "(SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+            self._conn.commit()
+
+
+class CachedEmbeddings(Embeddings):
+    """Wraps an embeddings object and serves repeated texts from a cache."""
+
+    def __init__(self, embeddings: Embeddings, model: str, cache: EmbeddingCache):
+        self.embeddings = embeddings
+        self.model = model
+        self.cache = cache
+        self.hits = 0
+        self.misses = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [cache_key(self.model, text) for text in texts]
+        vectors = self.cache.get_many(keys)
+
+        # Embed each distinct missing text once
+        missing: Dict[str, str] = {}
+        for key, text, vector in zip(keys, texts, vectors):
+            if vector is None:
+                missing.setdefault(key, text)
+
+        self.hits += len(texts) - sum(vector is None for vector in vectors)
+        self.misses += len(missing)
+
+        if missing:
+            embedded = dict(zip(missing, self.embeddings.embed_documents(list(missing.values()))))
+            self.cache.put_many(embedded)
+            vectors = [vector if vector is not None else embedded[key] for key, vector in zip(keys, vectors)]
+
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        key = cache_key(self.model, text)
+        (vector,) = self.cache.get_many([key])
+        if vector is not None:
+            self.hits += 1
+            return vector
+
+        self.misses += 1
+        vector = self.embeddings.embed_query(text)
+        self.cache.put_many({key: vector})
+        return vector
+
+
+def create_cache(backend: str = EMBEDDING_CONFIG["cache_backend"]) -> Optional[EmbeddingCache]:
+    """Create the configured cache backend ("sqlite", "memory" or "none")."""
+    max_entries = EMBEDDING_CONFIG["cache_max_entries"]
+    if backend == "none":
+        return None
+    if backend == "memory":
+        return InMemoryEmbeddingCache(max_entries)
+    if backend == "sqlite":
+        try:
+            return SQLiteEmbeddingCache(str(EMBEDDING_CONFIG["cache_path"]), max_entries)
+        except (OSError, sqlite3.Error) as e:
+            print(f"Failed to open embedding cache: {e}")
+            print("Falling back to in-memory embedding cache...")
+            return InMemoryEmbeddingCache(max_entries)
+    raise ValueError(f"Unknown embedding cache backend '{backend}'. Use 'sqlite', 'memory' or 'none'.")
+
+
+_embeddings: Optional[Embeddings] = None
+_embeddings_lock = threading.Lock()
+
+
+def embedding_model_name() -> str:
+    """Identifier of the configured embedding model, used to keep indexes per model apart."""
+    if EMBEDDING_CONFIG["provider"] == "local":
+        return HashingEmbeddings(EMBEDDING_CONFIG["local_dim"]).model
+    return EMBEDDING_CONFIG["model"]
+
+
+def get_embeddings() -> Embeddings:
+    """Process-wide embeddings object shared by ingestion and retrieval."""
+    global _embeddings
+
+    with _embeddings_lock:
+        if _embeddings is None:
+            provider = EMBEDDING_CONFIG["provider"]
+            if provider == "local":
+                # Cheaper to recompute than to look up, so never cached
+                _embeddings = HashingEmbeddings(EMBEDDING_CONFIG["local_dim"])
+            elif provider == "openai":
+                model = EMBEDDING_CONFIG["model"]
+                embeddings: Embeddings = OpenAIEmbeddings(model=model)
+                cache = create_cache()
+                if cache is not None:
+                    embeddings = CachedEmbeddings(embeddings, model, cache)
+                _embeddings = embeddings
+            else:
+                raise ValueError(f"Unknown embedding provider '{provider}'. Use 'openai' or 'local'.")
+
+    return _embeddings
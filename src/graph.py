@@ -1,18 +1,47 @@
+import sqlite3
+import threading
+from functools import partial
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
 from dotenv import load_dotenv
+from langgraph.checkpoint.sqlite import SqliteSaver
 from langgraph.graph import END, StateGraph
+from langgraph.graph.state import CompiledStateGraph
 
+from config.settings import CHECKPOINT_DB, GRADING_CONFIG, RETRIEVAL_CONFIG
 from src.chains.answer_grader import answer_grader
+from src.chains.generation import GENERATION_TAG
+from src.chains.generation_grader import generation_grader
 from src.chains.hallucination_grader import hallucination_grader
-from src.chains.router import RouteQuery, question_router
-from src.nodes import generate, grade_documents, retrieve, simulated_generate
+from src.nodes import (
+    agenerate,
+    agrade_documents,
+    arecord_turn,
+    aretrieve,
+    aroute_question,
+    aroute_question_speculative,
+    asimulated_generate,
+    generate,
+    grade_documents,
+    prepare_turn,
+    record_turn,
+    retrieve,
+    route_question,
+    route_question_speculative,
+    simulated_generate,
+)
+from src.nodes.turn import turn_messages
 from src.state import GraphState
 
 load_dotenv()
 
+PREPARE_TURN = "prepare_turn"
+ROUTE_QUESTION = "route_question"
 RETRIEVE = "retrieve"
 GRADE_DOCUMENTS = "grade_documents"
 GENERATE = "generate"
 SIMULATED_GENERATE = "simulated_generate"
+RECORD_TURN = "record_turn"
 
 
 def decide_to_generate(state):
@@ -28,23 +57,14 @@ def decide_to_generate(state):
         return GENERATE
 
 
-def grade_generation_grounded_in_documents_and_question(state: GraphState) -> str:
-    print("---CHECK HALLUCINATIONS---")
-    question = state["question"]
-    documents = state["documents"]
-    generation = state["generation"]
+def _generation_decision(state: GraphState, grounded: bool, addresses_question: bool) -> str:
     retry_count = state.get("generation_retry_count", 0)
     max_retries = state.get("max_generation_retries", 3)  # Default max retries: 3
 
-    score = hallucination_grader.invoke(
-        {"documents": documents, "generation": generation}
-    )
-
-    if hallucination_grade := score.binary_score:
+    if grounded:
         print("---DECISION: GENERATION IS GROUNDED IN DOCUMENTS---")
         print("---GRADE GENERATION vs QUESTION---")
-        score = answer_grader.invoke({"question": question, "generation": generation})
-        if answer_grade := score.binary_score:
+        if addresses_question:
             print("---DECISION: GENERATION ADDRESSES QUESTION---")
             return "useful"
         else:
@@ -60,73 +80,241 @@ def grade_generation_grounded_in_documents_and_question(state: GraphState) -> st
             return "not supported"
 
 
-def route_question(state: GraphState) -> str:
-    print("\n\n---ROUTE QUESTION---")
-    question = state["question"]
-    conversation_history = state.get("conversation_history", [])
-    
-    # Format conversation history for the router
-    formatted_history = ""
-    if conversation_history:
-        for msg in conversation_history[-6:]:  # Last 6 messages for context
-            role = msg.get("role", "")
-            content = msg.get("content", "")
-            if role == "user":
-                formatted_history += f"User: {content}\n"
-            elif role == "assistant":
-                formatted_history += f"Assistant: {content}\n"
-    else:
-        formatted_history = "No previous conversation."
-    
-    source: RouteQuery = question_router.invoke({
-        "question": question,
-        "conversation_history": formatted_history
-    })
-    
-    if source.datasource == "simulated_generation":
+def grade_generation_grounded_in_documents_and_question(state: GraphState) -> str:
+    print("---CHECK HALLUCINATIONS---")
+    inputs = {"documents": state["documents"], "question": state["question"], "generation": state["generation"]}
+
+    if GRADING_CONFIG["generation_grader"] == "combined":
+        # Both scores from a single LLM call
+        score = generation_grader.invoke(inputs)
+        return _generation_decision(state, score.grounded, score.addresses_question)
+
+    grounded = hallucination_grader.invoke(inputs).binary_score
+    # The answer grader only runs for grounded generations
+    addresses_question = grounded and answer_grader.invoke(inputs).binary_score
+    return _generation_decision(state, grounded, addresses_question)
+
+
+async def agrade_generation_grounded_in_documents_and_question(state: GraphState) -> str:
+    print("---CHECK HALLUCINATIONS---")
+    inputs = {"documents": state["documents"], "question": state["question"], "generation": state["generation"]}
+
+    if GRADING_CONFIG["generation_grader"] == "combined":
+        score = await generation_grader.ainvoke(inputs)
+        return _generation_decision(state, score.grounded, score.addresses_question)
+
+    grounded = (await hallucination_grader.ainvoke(inputs)).binary_score
+    addresses_question = grounded and (await answer_grader.ainvoke(inputs)).binary_score
+    return _generation_decision(state, grounded, addresses_question)
+
+
+def decide_route(state: GraphState) -> str:
+    if state["datasource"] == "simulated_generation":
         print("---ROUTE QUESTION TO SIMULATED GENERATION---")
         return SIMULATED_GENERATE
-    elif source.datasource == "vectorstore":
+    else:
         print("---ROUTE QUESTION TO RAG---")
+        # Work already done alongside routing is not repeated
+        speculation = state.get("speculation")
+        if speculation == "graded":
+            return decide_to_generate(state)
+        if speculation == "retrieved":
+            return GRADE_DOCUMENTS
         return RETRIEVE
 
 
-workflow = StateGraph(GraphState)
+def build_workflow(asynchronous: bool = False, speculative: Optional[str] = None) -> StateGraph:
+    """
+    Wire the conversation graph.
 
-workflow.add_node(RETRIEVE, retrieve)
-workflow.add_node(GRADE_DOCUMENTS, grade_documents)
-workflow.add_node(GENERATE, generate)
-workflow.add_node(SIMULATED_GENERATE, simulated_generate)
+    With asynchronous=True the async node variants are used, so the compiled
+    graph runs every LLM call with ainvoke on the caller's event loop (use
+    ainvoke/astream on it); otherwise the blocking variants are used.
 
-workflow.set_conditional_entry_point(
-    route_question,
-    {
-        SIMULATED_GENERATE: SIMULATED_GENERATE,
-        RETRIEVE: RETRIEVE,
-    },
-)
-workflow.add_edge(RETRIEVE, GRADE_DOCUMENTS)
-workflow.add_conditional_edges(
-    GRADE_DOCUMENTS,
-    decide_to_generate,
-    {
-        SIMULATED_GENERATE: SIMULATED_GENERATE,
-        GENERATE: GENERATE,
-    },
-)
+    speculative ("off", "retrieve" or "grade", default
+    RETRIEVAL_CONFIG["speculative"]) starts retrieval, and optionally
+    document grading, while the router is still deciding.
+    """
+    speculative = speculative or RETRIEVAL_CONFIG["speculative"]
+    if speculative not in ("off", "retrieve", "grade"):
+        raise ValueError(f"Unknown speculative mode '{speculative}'. Use 'off', 'retrieve' or 'grade'.")
 
-workflow.add_conditional_edges(
-    GENERATE,
-    grade_generation_grounded_in_documents_and_question,
-    {
-        "not supported": GENERATE,
-        "useful": END,
-        "not useful": SIMULATED_GENERATE,
-    },
-)
-workflow.add_edge(SIMULATED_GENERATE, END)
-workflow.add_edge(GENERATE, END)
+    workflow = StateGraph(GraphState)
+
+    workflow.add_node(PREPARE_TURN, prepare_turn)
+    if speculative == "off":
+        router_node = aroute_question if asynchronous else route_question
+    else:
+        router_node = partial(
+            aroute_question_speculative if asynchronous else route_question_speculative,
+            grade=speculative == "grade",
+        )
+    workflow.add_node(ROUTE_QUESTION, router_node)
+    workflow.add_node(RETRIEVE, aretrieve if asynchronous else retrieve)
+    workflow.add_node(GRADE_DOCUMENTS, agrade_documents if asynchronous else grade_documents)
+    workflow.add_node(GENERATE, agenerate if asynchronous else generate)
+    workflow.add_node(SIMULATED_GENERATE, asimulated_generate if asynchronous else simulated_generate)
+    workflow.add_node(RECORD_TURN, arecord_turn if asynchronous else record_turn)
+
+    workflow.set_entry_point(PREPARE_TURN)
+    workflow.add_edge(PREPARE_TURN, ROUTE_QUESTION)
+    routes = {SIMULATED_GENERATE: SIMULATED_GENERATE, RETRIEVE: RETRIEVE}
+    if speculative != "off":
+        routes.update({GRADE_DOCUMENTS: GRADE_DOCUMENTS, GENERATE: GENERATE})
+    workflow.add_conditional_edges(ROUTE_QUESTION, decide_route, routes)
+    workflow.add_edge(RETRIEVE, GRADE_DOCUMENTS)
+    workflow.add_conditional_edges(
+        GRADE_DOCUMENTS,
+        decide_to_generate,
+        {
+            SIMULATED_GENERATE: SIMULATED_GENERATE,
+            GENERATE: GENERATE,
+        },
+    )
+
+    workflow.add_conditional_edges(
+        GENERATE,
+        (
+            agrade_generation_grounded_in_documents_and_question
+            if asynchronous
+            else grade_generation_grounded_in_documents_and_question
+        ),
+        {
+            "not supported": GENERATE,
+            "useful": RECORD_TURN,
+            "not useful": SIMULATED_GENERATE,
+        },
+    )
+    workflow.add_edge(SIMULATED_GENERATE, RECORD_TURN)
+    workflow.add_edge(GENERATE, END)
+    workflow.add_edge(RECORD_TURN, END)
 
+    return workflow
+
+
+workflow = build_workflow()
+# Stateless: every call passes the conversation_history it wants considered
 app = workflow.compile()
+# For async servers: many conversations can share one event loop
+async_app = build_workflow(asynchronous=True).compile()
+
+_persistent_app: Optional[CompiledStateGraph] = None
+_persistent_lock = threading.Lock()
+
+
+def get_persistent_app() -> CompiledStateGraph:
+    """
+    The graph compiled with a SQLite checkpointer (CHECKPOINT_DB).
+
+    State is kept per thread (config={"configurable": {"thread_id": ...}}),
+    so a turn only sends {"question": ...}; the history is read from the
+    checkpoint, extended by the graph and survives restarts. Opened on first
+    use so importing this module touches no files.
+    """
+    global _persistent_app
+
+    with _persistent_lock:
+        if _persistent_app is None:
+            CHECKPOINT_DB.parent.mkdir(parents=True, exist_ok=True)
+            # One connection shared by Streamlit's script threads; SqliteSaver serialises access
+            connection = sqlite3.connect(str(CHECKPOINT_DB), check_same_thread=False)
+            _persistent_app = workflow.compile(checkpointer=SqliteSaver(connection))
+        return _persistent_app
+
+
+def thread_config(thread_id: str) -> Dict[str, Any]:
+    return {"configurable": {"thread_id": thread_id}}
+
+
+def is_threaded(config: Optional[Dict[str, Any]]) -> bool:
+    """Whether the config names a conversation thread, i.e. runs the checkpointed graph."""
+    return bool(config and config.get("configurable", {}).get("thread_id"))
+
+
+def thread_history(config: Dict[str, Any]) -> List[dict]:
+    """Conversation history checkpointed for the thread (empty for a new thread)."""
+    return get_persistent_app().get_state(config).values.get("conversation_history", [])
+
+
+def append_turn(config: Dict[str, Any], question: str, answer: str) -> None:
+    """Record a turn answered outside the graph (static FAQ answers, cache hits) in the thread's history."""
+    get_persistent_app().update_state(
+        config, {"conversation_history": turn_messages(question, answer)}, as_node=RECORD_TURN
+    )
 
-app.get_graph().draw_mermaid_png(output_file_path="graph.png")
+# stream_answer events: ("token", text), ("reset", None) when a new answer
+# replaces the tokens streamed so far, and ("end", final state) last
+AnswerEvent = Tuple[str, Any]
+STREAM_MODES = ["messages", "values"]
+
+
+class _AnswerStream:
+    """Turns (mode, payload) pairs from a multi-mode graph stream into answer events."""
+
+    def __init__(self):
+        self.message_id = None
+        self.state: Dict[str, Any] = {}
+
+    def feed(self, mode: str, payload: Any) -> List[AnswerEvent]:
+        if mode == "values":
+            self.state = payload
+            return []
+
+        chunk, metadata = payload
+        # Router and grader calls stream messages too; only the answer LLMs are tagged
+        if GENERATION_TAG not in metadata.get("tags", []) or not chunk.content:
+            return []
+        events = []
+        if chunk.id != self.message_id:
+            # A retry after a failed hallucination check, or the simulated fallback
+            if self.message_id is not None:
+                events.append(("reset", None))
+            self.message_id = chunk.id
+        events.append(("token", chunk.content))
+        return events
+
+
+def stream_answer(inputs: Dict[str, Any], config: Optional[Dict[str, Any]] = None) -> Iterator[AnswerEvent]:
+    """
+    Run the graph and yield answer tokens as the generation LLM produces them.
+
+    Tokens from an answer that the graders reject are followed by a "reset"
+    event before the next answer streams; the final "end" event carries the
+    same state app.invoke would have returned. A config with a thread_id
+    runs the checkpointed graph (see get_persistent_app).
+    """
+    stream = _AnswerStream()
+    graph = get_persistent_app() if is_threaded(config) else app
+    for mode, payload in graph.stream(inputs, config, stream_mode=STREAM_MODES):
+        yield from stream.feed(mode, payload)
+    yield "end", stream.state
+
+
+async def astream_answer(inputs: Dict[str, Any], config: Optional[Dict[str, Any]] = None) -> AsyncIterator[AnswerEvent]:
+    """Async stream_answer, running the stateless async_app."""
+    stream = _AnswerStream()
+    async for mode, payload in async_app.astream(inputs, config, stream_mode=STREAM_MODES):
+        for event in stream.feed(mode, payload):
+            yield event
+    yield "end", stream.state
+
+
+if __name__ == "__main__":
+    # Visualise the graph on demand; importing this module only compiles it
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Print or render the conversation graph.")
+    parser.add_argument("--output", help="write Mermaid text (.mmd) or, with --png, the rendered image here")
+    parser.add_argument("--png", action="store_true", help="render a PNG through the mermaid.ink web service (needs network)")
+    args = parser.parse_args()
+
+    graph = app.get_graph()
+    if args.png:
+        graph.draw_mermaid_png(output_file_path=args.output or "graph.png")
+        print(f"Graph written to {args.output or 'graph.png'}")
+    elif args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(graph.draw_mermaid())
+        print(f"Mermaid graph written to {args.output}")
+    else:
+        print(graph.draw_mermaid())
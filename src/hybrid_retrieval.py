@@ -0,0 +1,181 @@
+"""
+Hybrid lexical + dense retrieval.
+
+A BM25 index over the Category/Question/Answer columns catches exact doctor
+and test names that dense similarity misses, and its ranking is fused with
+the dense retriever's through reciprocal rank fusion (RRF).
+
+Both sides can be restricted to the router's predicted categories (see
+src/categories.py): the dense side through a metadata filter, BM25 through
+per-category document sets.
+"""
+
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStoreRetriever
+
+from src.categories import CATEGORIES, category_filter, in_categories
+from src.knowledge_base import document_id
+from src.normalization import normalize_text
+
+_TOKEN = re.compile(r"\w+")
+# Definite article, optionally preceded by a conjunction/preposition (و، ب، ف، ك، ل)
+_ARABIC_ARTICLE = re.compile(r"^(?:[وبفك]?ال|لل)(?=\w{2,})")
+_FIELD_LABEL = re.compile(r"^(?:Category|Question|Answer): ", re.MULTILINE)
+
+STOPWORDS = frozenset(
+    """
+    ما ماذا هي هو هل من في علي عن الي ان او مع هذا هذه ذلك التي الذي لديكم عندكم كم كيف اين متي
+    a an and are do does for from have how i in is it me my of on or the to we what when where which who you your
+    """.split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case, Arabic-normalised word tokens with stopwords and the definite article removed."""
+    tokens = []
+    for token in _TOKEN.findall(normalize_text(text)):
+        token = _ARABIC_ARTICLE.sub("", token)
+        if token not in STOPWORDS:
+            tokens.append(token)
+    return tokens
+
+
+def _index_text(document: Document) -> str:
+    """Row text without the CSVLoader column labels, with the Question field boosted."""
+    text = _FIELD_LABEL.sub("", document.page_content)
+    question = re.search(r"^Question: (.*)$", document.page_content, re.MULTILINE)
+    return f"{text}\n{question.group(1)}" if question else text
+
+
+class BM25Index:
+    """Okapi BM25 over knowledge base rows, kept in memory as an inverted index."""
+
+    def __init__(self, documents: Iterable[Document], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.documents: List[Document] = []
+        self._postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self._partitions: Dict[str, Set[int]] = {category: set() for category in CATEGORIES}
+        lengths = []
+
+        for index, document in enumerate(documents):
+            term_counts = Counter(tokenize(_index_text(document)))
+            for term, count in term_counts.items():
+                self._postings[term].append((index, count))
+            for category in CATEGORIES:
+                if in_categories(document, [category]):
+                    self._partitions[category].add(index)
+            self.documents.append(document)
+            lengths.append(sum(term_counts.values()))
+
+        self._lengths = lengths
+        self._avg_length = sum(lengths) / len(lengths) if lengths else 0.0
+        n = len(self.documents)
+        self._idf = {
+            term: math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self._postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def search(self, query: str, k: int, categories: Optional[Sequence[str]] = None) -> List[Tuple[Document, float]]:
+        """Top k rows by BM25 score, only among rows in `categories` when given."""
+        allowed = set().union(*(self._partitions.get(category, ()) for category in categories)) if categories else None
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self._idf.get(term)
+            if idf is None:
+                continue
+            for index, count in self._postings[term]:
+                if allowed is not None and index not in allowed:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[index] / self._avg_length)
+                scores[index] += idf * count * (self.k1 + 1) / (count + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [(self.documents[index], score) for index, score in ranked]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[Document]], k: int, rrf_k: int = 60) -> List[Document]:
+    """Fuse ranked lists: each document scores sum(1 / (rrf_k + rank)) over the lists it appears in."""
+    scores: Dict[str, float] = defaultdict(float)
+    documents: Dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, document in enumerate(ranking, start=1):
+            key = document_id(document)
+            scores[key] += 1.0 / (rrf_k + rank)
+            documents.setdefault(key, document)
+
+    ranked = sorted(scores, key=scores.get, reverse=True)[:k]
+    return [documents[key] for key in ranked]
+
+
+class DenseRetriever(VectorStoreRetriever):
+    """Vector store retriever that turns a `categories` argument into a metadata filter."""
+
+    def _get_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: CallbackManagerForRetrieverRun,
+        categories: Optional[Sequence[str]] = None,
+        **kwargs,
+    ) -> List[Document]:
+        if categories:
+            kwargs["filter"] = category_filter(categories)
+        return super()._get_relevant_documents(query, run_manager=run_manager, **kwargs)
+
+    async def _aget_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: AsyncCallbackManagerForRetrieverRun,
+        categories: Optional[Sequence[str]] = None,
+        **kwargs,
+    ) -> List[Document]:
+        if categories:
+            kwargs["filter"] = category_filter(categories)
+        return await super()._aget_relevant_documents(query, run_manager=run_manager, **kwargs)
+
+
+class HybridRetriever(BaseRetriever):
+    """Runs the dense retriever and BM25 over a larger candidate pool and keeps the top k after RRF."""
+
+    dense: DenseRetriever
+    lexical: BM25Index
+    k: int = 3
+    candidate_k: int = 10
+    rrf_k: int = 60
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    def _get_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: CallbackManagerForRetrieverRun,
+        categories: Optional[Sequence[str]] = None,
+    ) -> List[Document]:
+        dense_docs = self.dense.invoke(query, config={"callbacks": run_manager.get_child()}, categories=categories)
+        lexical_docs = [doc for doc, _ in self.lexical.search(query, self.candidate_k, categories)]
+        return reciprocal_rank_fusion([dense_docs, lexical_docs], self.k, self.rrf_k)
+
+    async def _aget_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: AsyncCallbackManagerForRetrieverRun,
+        categories: Optional[Sequence[str]] = None,
+    ) -> List[Document]:
+        dense_docs = await self.dense.ainvoke(query, config={"callbacks": run_manager.get_child()}, categories=categories)
+        # In-memory BM25 is CPU-only and fast enough to run on the event loop
+        lexical_docs = [doc for doc, _ in self.lexical.search(query, self.candidate_k, categories)]
+        return reciprocal_rank_fusion([dense_docs, lexical_docs], self.k, self.rrf_k)
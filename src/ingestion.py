@@ -1,47 +1,353 @@
 import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+import chromadb
+from chromadb.api import ClientAPI
 from dotenv import load_dotenv
 from langchain_chroma import Chroma
-from langchain_community.document_loaders.csv_loader import CSVLoader
-from langchain_openai import OpenAIEmbeddings
-from config.settings import KNOWLEDGE_BASE_FILE
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from config.settings import CHROMA_DIR, INGESTION_CONFIG, KNOWLEDGE_BASE_FILE, VECTOR_STORE_CONFIG
+from src.categories import category_flags
+from src.embeddings import embedding_model_name, get_embeddings
+from src.knowledge_base import document_id, iter_documents
+from src.metrics import metrics
+from src.numpy_store import NumpyVectorStore
 
 load_dotenv()
 
-# Use the specified CSV file path
-csv_file = str(KNOWLEDGE_BASE_FILE)
 
-if not os.path.exists(csv_file):
-    raise FileNotFoundError(f"CSV file '{csv_file}' not found. Please ensure it exists.")
+class RateLimiter:
+    """Thread-safe limiter spacing calls evenly at a maximum rate per minute (0 = unlimited)."""
+
+    def __init__(self, requests_per_minute: float):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute > 0 else 0.0
+        self._next_slot = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if wait > 0:
+            time.sleep(wait)
 
-loader = CSVLoader(file_path=csv_file)
-doc_splits = loader.load_and_split()
 
-print(f"Loaded {len(doc_splits)} documents from {csv_file}")
+def iter_chunks(documents: Iterable[Document], chunk_size: int) -> Iterator[List[Document]]:
+    """Yield lists of at most chunk_size documents without materialising the input."""
+    iterator = iter(documents)
+    while chunk := list(islice(iterator, chunk_size)):
+        yield chunk
 
-# Create the chroma directory if it doesn't exist
-chroma_dir = "./.chroma"
-os.makedirs(chroma_dir, exist_ok=True)
 
-# Try to initialize ChromaDB, fall back to in-memory if file permissions fail
-try:
-    vectorstore = Chroma.from_documents(
-        documents=doc_splits,
-        collection_name="rag-chroma",
-        embedding=OpenAIEmbeddings(model="text-embedding-3-large"),
-        persist_directory=chroma_dir,
+def _write_batch(vectorstore: NumpyVectorStore, batch: List[Tuple[str, Document, List[float]]]) -> None:
+    """Write pre-computed embeddings to the NumPy index in one call."""
+    ids, docs, vectors = zip(*batch)
+    vectorstore.add_embeddings(
+        list(ids), list(vectors), [doc.page_content for doc in docs], [doc.metadata for doc in docs]
     )
-    print(f"ChromaDB initialized with persistent storage at {chroma_dir}")
-except Exception as e:
-    print(f"Failed to initialize persistent ChromaDB: {e}")
-    print("Falling back to in-memory ChromaDB...")
-    vectorstore = Chroma.from_documents(
-        documents=doc_splits,
-        collection_name="rag-chroma",
-        embedding=OpenAIEmbeddings(model="text-embedding-3-large"),
+
+
+def _update_metadata(vectorstore: VectorStore, batch: List[Tuple[str, Document]]) -> None:
+    """
+    Rewrite the metadata of stored rows.
+
+    The NumPy index keeps the vectors; Chroma's public update_documents
+    embeds the rows again (served by the embedding cache when enabled).
+    """
+    ids = [doc_id for doc_id, _ in batch]
+    if isinstance(vectorstore, NumpyVectorStore):
+        vectorstore.update_metadata(ids, [doc.metadata for _, doc in batch])
+    else:
+        vectorstore.update_documents(ids=ids, documents=[doc for _, doc in batch])
+
+
+def sync_vectorstore(
+    vectorstore: VectorStore,
+    documents: Iterable[Document],
+    mode: str = INGESTION_CONFIG["mode"],
+    chunk_size: int = INGESTION_CONFIG["chunk_size"],
+    max_workers: int = INGESTION_CONFIG["max_workers"],
+    requests_per_minute: float = INGESTION_CONFIG["requests_per_minute"],
+    write_batch_size: int = INGESTION_CONFIG["write_batch_size"],
+) -> Dict[str, float]:
+    """
+    Stream documents into the vector store, embedding only what changed.
+
+    Rows are keyed by their content hash, so only new or changed rows are
+    embedded and rows that disappeared from the CSV are deleted. A warm
+    persisted index with unchanged content costs no embedding calls; rows
+    whose category flags alone changed are updated in place. Other metadata
+    is not compared, so moving a row within the CSV or loading it from
+    another path changes nothing.
+
+    Documents are consumed in chunks; each chunk of new rows is embedded on a
+    bounded thread pool (at most 2 * max_workers chunks in flight, one
+    rate-limited embedding request per chunk), so memory stays flat
+    regardless of the size of the CSV. Only row ids and the stored metadata
+    are kept for the whole run. A Chroma collection embeds and upserts each
+    chunk (by id) in one add_documents call on the worker; the NumPy index
+    gets the vectors back and writes them in batches.
+
+    Args:
+        vectorstore: the Chroma collection or NumpyVectorStore to update
+        documents: the current knowledge base rows (any iterable, e.g. CSVLoader.lazy_load())
+        mode: "incremental" or "rebuild" to drop and re-embed everything
+        chunk_size: rows per embedding request
+        max_workers: concurrent embedding requests
+        requests_per_minute: embedding request rate limit (0 = unlimited)
+        write_batch_size: rows per vector store write
+
+    Returns:
+        counts of read, added, updated, deleted and unchanged rows, elapsed seconds and rows/s
+    """
+    if mode == "rebuild":
+        vectorstore.reset_collection()
+    elif mode != "incremental":
+        raise ValueError(f"Unknown ingestion mode '{mode}'. Use 'incremental' or 'rebuild'.")
+
+    embeddings = vectorstore.embeddings
+    rate_limiter = RateLimiter(requests_per_minute)
+    existing = vectorstore.get(include=["metadatas"])
+    existing_metadata = dict(zip(existing["ids"], existing["metadatas"]))
+    existing_ids = set(existing_metadata)
+    seen_ids = set()
+    stats = {"read": 0, "added": 0, "updated": 0, "deleted": 0, "unchanged": 0}
+    pending_writes: List[Tuple[str, Document, List[float]]] = []
+    pending_updates: List[Tuple[str, Document]] = []
+    started = time.perf_counter()
+
+    def embed_chunk(chunk: List[Tuple[str, Document]]) -> Tuple[int, List[Tuple[str, Document, List[float]]]]:
+        """Embed a chunk of new rows; returns its size and the rows still to be written."""
+        rate_limiter.acquire()
+        if not isinstance(vectorstore, NumpyVectorStore):
+            vectorstore.add_documents([doc for _, doc in chunk], ids=[doc_id for doc_id, _ in chunk])
+            return len(chunk), []
+        vectors = embeddings.embed_documents([doc.page_content for _, doc in chunk])
+        return len(chunk), [(doc_id, doc, vector) for (doc_id, doc), vector in zip(chunk, vectors)]
+
+    def collect(futures) -> None:
+        for future in futures:
+            added, rows = future.result()
+            pending_writes.extend(rows)
+            stats["added"] += added
+        while len(pending_writes) >= write_batch_size:
+            _write_batch(vectorstore, pending_writes[:write_batch_size])
+            del pending_writes[:write_batch_size]
+
+    def report() -> None:
+        elapsed = time.perf_counter() - started
+        print(
+            f"---INGEST: {stats['read']} rows read, {stats['added']} embedded, "
+            f"{stats['read'] / elapsed if elapsed else 0:.1f} rows/s---"
+        )
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        in_flight = set()
+        for chunk in iter_chunks(documents, chunk_size):
+            stats["read"] += len(chunk)
+            new_rows = []
+            for doc in chunk:
+                doc_id = document_id(doc)
+                # Identical rows share a hash; keep the first occurrence only
+                if doc_id in seen_ids:
+                    continue
+                seen_ids.add(doc_id)
+                if doc_id in existing_ids:
+                    # Only the category flags matter; anything else stored with an
+                    # older index (e.g. CSVLoader's row position) is ignored
+                    if category_flags(existing_metadata[doc_id]) == category_flags(doc.metadata):
+                        stats["unchanged"] += 1
+                    else:
+                        pending_updates.append((doc_id, doc))
+                else:
+                    new_rows.append((doc_id, doc))
+
+            if len(pending_updates) >= write_batch_size:
+                _update_metadata(vectorstore, pending_updates)
+                stats["updated"] += len(pending_updates)
+                pending_updates.clear()
+            if new_rows:
+                in_flight.add(executor.submit(embed_chunk, new_rows))
+            if len(in_flight) >= 2 * max_workers:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done)
+                report()
+
+        collect(in_flight)
+
+    if pending_writes:
+        _write_batch(vectorstore, pending_writes)
+    if pending_updates:
+        _update_metadata(vectorstore, pending_updates)
+        stats["updated"] += len(pending_updates)
+
+    removed_ids = list(existing_ids - seen_ids)
+    for start in range(0, len(removed_ids), write_batch_size):
+        vectorstore.delete(ids=removed_ids[start:start + write_batch_size])
+    stats["deleted"] = len(removed_ids)
+
+    stats["seconds"] = time.perf_counter() - started
+    stats["rows_per_second"] = stats["read"] / stats["seconds"] if stats["seconds"] else 0.0
+    report()
+    for key in ("read", "added", "updated", "deleted", "unchanged"):
+        metrics.increment(f"ingest.rows_{key}", stats[key])
+    metrics.observe("ingest.sync", stats["seconds"])
+    return stats
+
+
+def build_numpy_vectorstore(csv_file: str = str(KNOWLEDGE_BASE_FILE)) -> NumpyVectorStore:
+    """Load the knowledge base and sync it into the NumPy index."""
+    documents = iter_documents(csv_file)
+    embeddings = get_embeddings()
+    # One index per embedding model: vectors from different models never mix
+    index_dir = str(VECTOR_STORE_CONFIG["numpy_dir"] / embedding_model_name())
+    options = {
+        "dtype": VECTOR_STORE_CONFIG["numpy_dtype"],
+        "rescore_candidates": VECTOR_STORE_CONFIG["numpy_rescore_candidates"],
+        "truncate_dim": VECTOR_STORE_CONFIG["numpy_truncate_dim"],
+        "candidate_pool": VECTOR_STORE_CONFIG["numpy_candidate_pool"],
+    }
+
+    try:
+        vectorstore = NumpyVectorStore(embeddings, persist_directory=index_dir, **options)
+        stats = sync_vectorstore(vectorstore, documents)
+        vectorstore.persist()
+        print(f"NumPy index initialized with persistent storage at {index_dir}")
+    except OSError as e:
+        print(f"Failed to persist NumPy index: {e}")
+        print("Falling back to in-memory NumPy index...")
+        vectorstore = NumpyVectorStore(embeddings, **options)
+        stats = sync_vectorstore(vectorstore, iter_documents(csv_file), mode="incremental")
+
+    print(
+        f"Index sync from {csv_file}: {stats['read']} rows, {stats['added']} embedded, "
+        f"{stats['updated']} updated, {stats['deleted']} deleted, {stats['unchanged']} unchanged "
+        f"({stats['rows_per_second']:.1f} rows/s)"
+    )
+    return vectorstore
+
+
+def _collection_version(name: str, base: str) -> int:
+    """n for a collection named "<base>_v<n>", else 0."""
+    prefix = f"{base}_v"
+    suffix = name[len(prefix):]
+    return int(suffix) if name.startswith(prefix) and suffix.isdigit() else 0
+
+
+def _drop_unversioned(client: ClientAPI, prefix: str) -> None:
+    """
+    Delete collections named prefix or "<prefix>-<model>" without a "_v<n>"
+    suffix, left by builds from before versioning, so they do not stay in
+    CHROMA_DIR forever. Called once a versioned build has succeeded.
+    """
+    for collection in client.list_collections():
+        name = collection.name
+        if name != prefix and not name.startswith(f"{prefix}-"):
+            continue
+        base, _, version = name.rpartition("_v")
+        if base and version.isdigit():
+            continue
+        client.delete_collection(name)
+        print(f"Dropped unversioned legacy collection '{name}'")
+
+
+def _copy_collection(
+    client: ClientAPI, source: str, target: str, batch_size: int = INGESTION_CONFIG["write_batch_size"]
+) -> None:
+    """Create collection `target` holding the ids, embeddings, documents and metadata of `source`."""
+    origin = client.get_collection(source)
+    copy = client.create_collection(target, metadata=origin.metadata)
+    for offset in range(0, origin.count(), batch_size):
+        rows = origin.get(include=["embeddings", "documents", "metadatas"], limit=batch_size, offset=offset)
+        copy.add(
+            ids=rows["ids"],
+            embeddings=rows["embeddings"],
+            documents=rows["documents"],
+            metadatas=rows["metadatas"],
+        )
+
+
+def _open_chroma(client: ClientAPI, base: str, embeddings: Embeddings, new_version: bool) -> Chroma:
+    """
+    Open the versioned collection "<base>_v<n>" to sync into.
+
+    Normally the latest version is reused (and older ones left behind by an
+    interrupted reload are dropped). With new_version a fresh "<base>_v<n+1>"
+    is created, seeded with the stored vectors of the latest version, so the
+    collection being served is never written to and the sync that follows
+    embeds and reports only the rows that actually changed.
+    """
+    versions = sorted(
+        version for version in (_collection_version(collection.name, base) for collection in client.list_collections())
+        if version
     )
-    print("ChromaDB initialized in-memory mode")
+    latest = versions[-1] if versions else 0
+    if not new_version:
+        for version in versions[:-1]:
+            client.delete_collection(f"{base}_v{version}")
+    version = latest + 1 if new_version or not latest else latest
+    if version != latest and latest:
+        _copy_collection(client, f"{base}_v{latest}", f"{base}_v{version}")
+    return Chroma(client=client, collection_name=f"{base}_v{version}", embedding_function=embeddings)
+
+
+def build_vectorstore(csv_file: str = str(KNOWLEDGE_BASE_FILE), new_version: bool = False) -> VectorStore:
+    """
+    Load the knowledge base and sync it into the configured vector store.
+
+    Nothing happens at import time; callers (see src/retriever.py) decide
+    when to pay for loading and embedding.
+
+    Chroma keeps one collection per version of the knowledge base. With
+    new_version (a reload) the current collection's vectors are copied into
+    a new one and only the CSV's changes are synced into it, while the
+    current one keeps serving. The caller drops the old collection once
+    nothing reads from it. Unversioned collections left by older builds are
+    deleted after a successful sync. The NumPy index is always replaced
+    atomically on disk.
+    """
+    if VECTOR_STORE_CONFIG["backend"] == "numpy":
+        return build_numpy_vectorstore(csv_file)
+    if VECTOR_STORE_CONFIG["backend"] != "chroma":
+        raise ValueError(f"Unknown vector store backend '{VECTOR_STORE_CONFIG['backend']}'. Use 'chroma' or 'numpy'.")
 
-retriever = vectorstore.as_retriever(
-    search_kwargs={"k": 3},
-    search_type="similarity",
-)
+    documents = iter_documents(csv_file)
+
+    # Create the chroma directory if it doesn't exist
+    chroma_dir = str(CHROMA_DIR)
+    os.makedirs(chroma_dir, exist_ok=True)
+
+    # Shared with query-time retrieval, so repeated texts hit the embedding cache
+    embeddings = get_embeddings()
+    # One set of collections per embedding model: vectors from different models never mix
+    collection_name = f"{INGESTION_CONFIG['collection_name']}-{embedding_model_name()}"
+
+    # Try to initialize ChromaDB, fall back to in-memory if file permissions fail
+    try:
+        client = chromadb.PersistentClient(path=chroma_dir)
+        vectorstore = _open_chroma(client, collection_name, embeddings, new_version)
+        stats = sync_vectorstore(vectorstore, documents)
+        _drop_unversioned(client, INGESTION_CONFIG["collection_name"])
+        print(f"ChromaDB initialized with persistent storage at {chroma_dir}")
+    except Exception as e:
+        print(f"Failed to initialize persistent ChromaDB: {e}")
+        print("Falling back to in-memory ChromaDB...")
+        vectorstore = _open_chroma(chromadb.EphemeralClient(), collection_name, embeddings, new_version)
+        stats = sync_vectorstore(vectorstore, iter_documents(csv_file), mode="incremental")
+        print("ChromaDB initialized in-memory mode")
+
+    print(
+        f"Index sync from {csv_file}: {stats['read']} rows, {stats['added']} embedded, "
+        f"{stats['updated']} updated, {stats['deleted']} deleted, {stats['unchanged']} unchanged "
+        f"({stats['rows_per_second']:.1f} rows/s)"
+    )
+    return vectorstore
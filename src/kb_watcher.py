@@ -0,0 +1,100 @@
+"""
+Knowledge base hot reload.
+
+A watchdog observer watches the directory holding the knowledge base CSV
+(editors and `docker cp` replace files by rename, which a watch on the file
+itself would miss). Once the file has been quiet for debounce_seconds and
+its content actually changed, retriever.reload() rebuilds the index on the
+timer thread and swaps it in; requests keep being served meanwhile.
+"""
+
+import hashlib
+import os
+import threading
+from typing import Callable, Optional
+
+from watchdog.events import FileSystemEvent, FileSystemEventHandler
+from watchdog.observers import Observer
+from watchdog.observers.polling import PollingObserver
+
+from config.settings import KB_RELOAD_CONFIG, KNOWLEDGE_BASE_FILE
+
+
+def file_digest(path: str) -> Optional[str]:
+    """sha256 of the file's content, or None while it does not exist."""
+    try:
+        with open(path, "rb") as f:
+            return hashlib.file_digest(f, "sha256").hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+class KnowledgeBaseWatcher(FileSystemEventHandler):
+    """Calls on_change (debounced, off the observer thread) when the watched file's content changes."""
+
+    def __init__(self, path: str, on_change: Callable[[], object], debounce_seconds: float = 2.0):
+        self.path = os.path.abspath(path)
+        self.on_change = on_change
+        self.debounce_seconds = debounce_seconds
+        self._digest = file_digest(self.path)
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+
+    def on_any_event(self, event: FileSystemEvent) -> None:
+        paths = {os.path.abspath(os.fsdecode(event.src_path))}
+        if getattr(event, "dest_path", ""):
+            paths.add(os.path.abspath(os.fsdecode(event.dest_path)))
+        if self.path not in paths or event.event_type in ("opened", "closed_no_write"):
+            return
+
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.debounce_seconds, self._fire)
+            self._timer.name = "kb-reload"
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _fire(self) -> None:
+        digest = file_digest(self.path)
+        if digest is None or digest == self._digest:
+            # Deleted mid-replace, or touched without a content change
+            return
+
+        print(f"---KB CHANGE DETECTED: {self.path}---")
+        try:
+            self.on_change()
+        except Exception as e:
+            # The previous index stays live; the next change retries
+            print(f"Knowledge base reload failed: {e}")
+            return
+        self._digest = digest
+
+
+_observer: Optional[Observer] = None
+_observer_lock = threading.Lock()
+
+
+def start_kb_watcher(csv_file: str = str(KNOWLEDGE_BASE_FILE)) -> Optional[Observer]:
+    """Start watching the knowledge base CSV (once per process); None when hot reload is disabled."""
+    global _observer
+
+    if not KB_RELOAD_CONFIG["enabled"]:
+        return None
+
+    with _observer_lock:
+        if _observer is None:
+            # Imported here so that importing this module stays cheap
+            from src.retriever import reload
+
+            handler = KnowledgeBaseWatcher(
+                csv_file, lambda: reload(csv_file), KB_RELOAD_CONFIG["debounce_seconds"]
+            )
+            observer = PollingObserver() if KB_RELOAD_CONFIG["polling"] else Observer()
+            observer.schedule(handler, os.path.dirname(handler.path), recursive=False)
+            observer.daemon = True
+            observer.start()
+            _observer = observer
+            print(f"Watching {handler.path} for knowledge base changes")
+
+    return _observer
@@ -0,0 +1,37 @@
+"""
+Knowledge base rows as documents.
+
+Kept apart from src/ingestion.py so that code which only needs the rows or
+their ids (the local router's seed questions, BM25 indexing) does not
+import chromadb and the ingestion pipeline when the graph is imported.
+"""
+
+import hashlib
+import os
+from typing import Iterator
+
+from langchain_community.document_loaders.csv_loader import CSVLoader
+from langchain_core.documents import Document
+
+from config.settings import KNOWLEDGE_BASE_FILE
+from src.categories import with_categories
+
+
+def document_id(document: Document) -> str:
+    """Stable content hash of a knowledge base row, used as its vector id."""
+    return hashlib.sha256(document.page_content.encode("utf-8")).hexdigest()
+
+
+def _without_position(document: Document) -> Document:
+    """Drop CSVLoader's "row" and "source": rows are identified by content, not by where they sit."""
+    document.metadata.pop("row", None)
+    document.metadata.pop("source", None)
+    return document
+
+
+def iter_documents(csv_file: str = str(KNOWLEDGE_BASE_FILE)) -> Iterator[Document]:
+    """Stream the knowledge base CSV, one document per row, tagged with its categories."""
+    if not os.path.exists(csv_file):
+        raise FileNotFoundError(f"CSV file '{csv_file}' not found. Please ensure it exists.")
+
+    return (with_categories(_without_position(doc)) for doc in CSVLoader(file_path=csv_file).lazy_load())
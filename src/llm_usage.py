@@ -0,0 +1,147 @@
+"""
+Prompt token accounting for the chat model calls.
+
+OpenAI caches the longest previously seen prompt prefix (for prompts of
+1024 tokens or more), and reports the cached part as usage_metadata
+["input_token_details"]["cache_read"]. Each chain's model carries a
+PromptCacheUsage callback that records, per chain and in total:
+
+    llm.<chain>.calls / prompt_tokens / cached_tokens / uncached_tokens
+
+prompt_cache_report() reads them back with the cache hit rate per chain.
+
+The answer generating models also carry a TierUsage callback for their
+model tier (see src/model_tiers.py), recording per tier
+
+    llm.tier.<tier>.calls / input_tokens / cached_tokens / output_tokens / cost_usd   counters
+    llm.tier.<tier>                                                                    timing (call latency)
+
+with cost from MODEL_TIERS_CONFIG["prices"]; tier_report() reads them back.
+
+The prompts put their static instructions first (system message) and the
+per-request variables last, so the prefix repeats across calls.
+"""
+
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import LLMResult
+
+from config.settings import MODEL_TIERS_CONFIG
+from src.metrics import metrics
+
+TOTAL = "total"
+_FIELDS = ("calls", "prompt_tokens", "cached_tokens", "uncached_tokens")
+_TIER_FIELDS = ("calls", "input_tokens", "cached_tokens", "output_tokens", "cost_usd")
+
+
+def _usage(response: LLMResult) -> Optional[dict]:
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                return usage
+    return None
+
+
+def record_prompt_usage(chain: str, usage: dict) -> None:
+    """Add one call's prompt tokens (usage_metadata) to the chain's and the total counters."""
+    prompt_tokens = usage.get("input_tokens") or 0
+    cached_tokens = (usage.get("input_token_details") or {}).get("cache_read") or 0
+    for name in (chain, TOTAL):
+        metrics.increment(f"llm.{name}.calls")
+        metrics.increment(f"llm.{name}.prompt_tokens", prompt_tokens)
+        metrics.increment(f"llm.{name}.cached_tokens", cached_tokens)
+        metrics.increment(f"llm.{name}.uncached_tokens", prompt_tokens - cached_tokens)
+
+
+def prompt_cache_report(snapshot: Optional[Dict[str, Any]] = None) -> Dict[str, Dict[str, float]]:
+    """Per chain (and "total"): calls, prompt/cached/uncached tokens and cache_hit_rate (cached / prompt tokens)."""
+    counters = (snapshot or metrics.snapshot())["counters"]
+    report: Dict[str, Dict[str, float]] = {}
+    for name, value in counters.items():
+        parts = name.split(".")
+        if len(parts) == 3 and parts[0] == "llm" and parts[2] in _FIELDS:
+            report.setdefault(parts[1], dict.fromkeys(_FIELDS, 0))[parts[2]] = value
+    for row in report.values():
+        row["cache_hit_rate"] = row["cached_tokens"] / row["prompt_tokens"] if row["prompt_tokens"] else 0.0
+    return report
+
+
+class PromptCacheUsage(BaseCallbackHandler):
+    """Records cached vs uncached prompt tokens of every call made by the model it is attached to."""
+
+    def __init__(self, chain: str):
+        self.chain = chain
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        usage = _usage(response)
+        if usage:
+            record_prompt_usage(self.chain, usage)
+
+
+def call_cost(model: str, usage: dict) -> float:
+    """USD cost of one call (0 for models without a price in MODEL_TIERS_CONFIG["prices"])."""
+    prices = MODEL_TIERS_CONFIG["prices"].get(model)
+    if not prices:
+        return 0.0
+    input_price, cached_price, output_price = prices
+    input_tokens = usage.get("input_tokens") or 0
+    cached_tokens = (usage.get("input_token_details") or {}).get("cache_read") or 0
+    output_tokens = usage.get("output_tokens") or 0
+    return (
+        (input_tokens - cached_tokens) * input_price + cached_tokens * cached_price + output_tokens * output_price
+    ) / 1_000_000
+
+
+class TierUsage(BaseCallbackHandler):
+    """Records latency, tokens and cost of every call made by the model of one tier."""
+
+    def __init__(self, tier: str, model: str):
+        self.tier = tier
+        self.model = model
+        self._lock = threading.Lock()
+        self._started: Dict[UUID, float] = {}
+
+    def on_chat_model_start(
+        self, serialized: Dict[str, Any], messages: List[List[BaseMessage]], *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        with self._lock:
+            self._started[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            started = self._started.pop(run_id, None)
+        name = f"llm.tier.{self.tier}"
+        if started is not None:
+            metrics.observe(name, time.perf_counter() - started)
+        metrics.increment(f"{name}.calls")
+        usage = _usage(response)
+        if usage:
+            metrics.increment(f"{name}.input_tokens", usage.get("input_tokens") or 0)
+            metrics.increment(f"{name}.cached_tokens", (usage.get("input_token_details") or {}).get("cache_read") or 0)
+            metrics.increment(f"{name}.output_tokens", usage.get("output_tokens") or 0)
+            metrics.increment(f"{name}.cost_usd", call_cost(self.model, usage))
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            self._started.pop(run_id, None)
+
+
+def tier_report(snapshot: Optional[Dict[str, Any]] = None) -> Dict[str, Dict[str, float]]:
+    """Per model tier: calls, input/cached/output tokens, cost_usd, and mean/p50 call latency in seconds."""
+    snapshot = snapshot or metrics.snapshot()
+    report: Dict[str, Dict[str, float]] = {}
+    for name, value in snapshot["counters"].items():
+        parts = name.split(".")
+        if len(parts) == 4 and parts[:2] == ["llm", "tier"] and parts[3] in _TIER_FIELDS:
+            report.setdefault(parts[2], dict.fromkeys(_TIER_FIELDS, 0))[parts[3]] = value
+    for tier, row in report.items():
+        timing = snapshot["timings"].get(f"llm.tier.{tier}")
+        row["mean_seconds"] = timing["mean"] if timing else 0.0
+        row["p50_seconds"] = timing["p50"] if timing else 0.0
+    return report
@@ -0,0 +1,197 @@
+"""
+Local first-stage question router.
+
+Most turns are easy to route: a price, clinic or insurance question goes to
+the knowledge base, a booking or ambulance request to simulated generation.
+LocalRouter decides those without an API call, by comparing the question's
+hashed character n-gram embedding (see embeddings.HashingEmbeddings) with
+labelled seed questions:
+
+- vectorstore: every knowledge base question (its Arabic and English
+  halves separately) and the router prompt's vectorstore examples;
+- simulated_generation: the prompt's other examples and _SIMULATED_SEEDS.
+
+Each class scores the mean similarity of its closest seeds; confidence is
+the gap between the two scores. Below ROUTER_CONFIG["local_min_margin"],
+for follow-ups that need the conversation to be understood, and when the
+decision contradicts the question's keywords (see keyword_conflict), the
+LLM router decides. N-gram similarity cannot tell which intent wins in a
+mixed message such as "how much does booking a cardiologist cost?".
+"""
+
+import re
+import threading
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from config.settings import ROUTER_CONFIG
+from src.categories import text_categories
+from src.chains.router import RouteQuery, system as router_prompt
+from src.embeddings import HashingEmbeddings
+from src.knowledge_base import iter_documents
+from src.normalization import is_follow_up, normalize_text
+
+DATASOURCES = ("vectorstore", "simulated_generation")
+
+# Requests the knowledge base cannot answer: bookings, results, emergencies, complaints, reminders,
+# preparation instructions and small talk, phrased the way patients write them
+_SIMULATED_SEEDS = (
+    "Book me an appointment with the dermatologist tomorrow",
+    "I want to book a consultation with an orthopedic doctor",
+    "I want to reschedule my appointment to next week",
+    "Please change my appointment time",
+    "Cancel my appointment on Sunday",
+    "Are my lab results ready?",
+    "Send me my blood test results",
+    "I need an ambulance at my home now",
+    "I want to file a complaint about the reception staff",
+    "Remind me to take my medication at 9 pm",
+    "Set a reminder for my appointment",
+    "How should I prepare for my surgery tomorrow?",
+    "Do I need to fast before the blood test?",
+    "Please confirm my booking",
+    "Send me the reschedule link by SMS",
+    "I have severe chest pain",
+    "Can I talk to a human agent?",
+    "Hello, good morning",
+    "Thank you so much",
+    "احجز لي موعد مع دكتور الجلدية بكرة",
+    "عايز احجز كشف عند دكتور العظام",
+    "أريد حجز موعد يوم الاثنين",
+    "عاوز اغير ميعاد الكشف",
+    "أريد تأجيل موعدي للأسبوع القادم",
+    "الغي الحجز بتاع بكرة",
+    "أريد إلغاء موعدي",
+    "هل نتيجة التحاليل طلعت؟",
+    "ابعتلي نتيجة الأشعة",
+    "محتاج إسعاف حالا على البيت",
+    "أريد تقديم شكوى على موظف الاستقبال",
+    "عندي شكوى",
+    "ذكرني بموعد الدواء الساعة ٩",
+    "إزاي أجهز نفسي للعملية؟",
+    "لازم أكون صايم قبل التحليل؟",
+    "أكد الحجز من فضلك",
+    "عندي ألم شديد في صدري",
+    "ممكن أكلم حد من خدمة العملاء",
+    "السلام عليكم",
+    "شكرا جزيلا",
+)
+
+# Action verbs (normalised, matched as substrings) of requests the knowledge base cannot fulfil
+_ACTION_KEYWORDS = (
+    "book", "reserv", "reschedul", "cancel", "remind",
+    "حجز", "الغي", "الغاء", "تاجيل", "ااجل", "ذكرني", "فكرني",
+)
+
+# Few-shot examples in the router prompt: Q: "..." (or Current: "...") followed by → "datasource"
+_PROMPT_EXAMPLE = re.compile(r'(?:Q|Current): "([^"]+)"\s*→ "(vectorstore|simulated_generation)"')
+_QUESTION = re.compile(r"^Question: (.*)$", re.MULTILINE)
+_LATIN = re.compile(r"[A-Za-z]+")
+_ARABIC = re.compile(r"[؀-ۿ]+")
+
+
+def _kb_questions() -> List[str]:
+    """Knowledge base questions, with bilingual ones split into their Arabic and English halves."""
+    questions = []
+    for document in iter_documents():
+        match = _QUESTION.search(document.page_content)
+        if not match:
+            continue
+        for half in (_LATIN.sub(" ", match.group(1)), _ARABIC.sub(" ", match.group(1))):
+            if len(normalize_text(half).split()) >= 2:
+                questions.append(half)
+    return list(dict.fromkeys(questions))
+
+
+def seed_questions() -> List[Tuple[str, str]]:
+    """(question, datasource) pairs the local router is built from."""
+    seeds = [(question, datasource) for question, datasource in _PROMPT_EXAMPLE.findall(router_prompt)]
+    seeds += [(question, "vectorstore") for question in _kb_questions()]
+    seeds += [(question, "simulated_generation") for question in _SIMULATED_SEEDS]
+    return seeds
+
+
+class LocalRouter:
+    """Nearest-seed classifier over hashed n-gram embeddings."""
+
+    def __init__(self, seeds: List[Tuple[str, str]], neighbours: int = ROUTER_CONFIG["local_neighbours"]):
+        self.embeddings = HashingEmbeddings()
+        self.neighbours = neighbours
+        self._matrices = {}
+        for datasource in DATASOURCES:
+            questions = [question for question, label in seeds if label == datasource]
+            self._matrices[datasource] = np.array(self.embeddings.embed_documents(questions), dtype=np.float32)
+
+    def classify(self, question: str) -> Tuple[str, float]:
+        """Best datasource and its margin over the other one (0 to 1)."""
+        vector = np.asarray(self.embeddings.embed_query(question), dtype=np.float32)
+        scores = {}
+        for datasource, matrix in self._matrices.items():
+            similarities = matrix @ vector
+            k = min(self.neighbours, len(similarities))
+            scores[datasource] = float(np.partition(similarities, -k)[-k:].mean())
+        best, other = sorted(DATASOURCES, key=scores.get, reverse=True)
+        return best, scores[best] - scores[other]
+
+
+def keyword_conflict(question: str, datasource: str) -> bool:
+    """
+    Whether the question's keywords point the other way: knowledge base
+    category keywords in a simulated_generation decision, or a booking,
+    cancellation or reminder verb in a vectorstore decision.
+    """
+    if datasource == "simulated_generation":
+        return bool(text_categories(question))
+    text = normalize_text(question)
+    return any(keyword in text for keyword in _ACTION_KEYWORDS)
+
+
+_router: Optional[LocalRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_local_router() -> LocalRouter:
+    """Process-wide LocalRouter, built from the seeds on first use."""
+    global _router
+
+    with _router_lock:
+        if _router is None:
+            _router = LocalRouter(seed_questions())
+        return _router
+
+
+def confident_route(question: str, conversation_history: Optional[List[dict]] = None) -> Optional[str]:
+    """
+    The datasource the local router is confident about, or None: a
+    follow-up, a margin below ROUTER_CONFIG["local_min_margin"], or a
+    decision the keywords contradict. Ignores ROUTER_CONFIG["mode"].
+    """
+    if is_follow_up(question, conversation_history):
+        return None
+
+    datasource, margin = get_local_router().classify(question)
+    if margin < ROUTER_CONFIG["local_min_margin"]:
+        print(f"---LOCAL ROUTER UNSURE ({datasource}, margin {margin:.3f})---")
+        return None
+    if keyword_conflict(question, datasource):
+        print(f"---LOCAL ROUTER: {datasource} CONTRADICTS THE KEYWORDS---")
+        return None
+    print(f"---LOCAL ROUTER: {datasource} (margin {margin:.3f})---")
+    return datasource
+
+
+def local_route(question: str, conversation_history: Optional[List[dict]] = None) -> Optional[RouteQuery]:
+    """
+    Route the question locally, or return None to leave it to the LLM router.
+
+    A confident vectorstore decision predicts categories from their keywords
+    (none found = search everything).
+    """
+    if ROUTER_CONFIG["mode"] == "llm":
+        return None
+    datasource = confident_route(question, conversation_history)
+    if datasource is None:
+        return None
+    categories = text_categories(question) if datasource == "vectorstore" else []
+    return RouteQuery(datasource=datasource, categories=categories)
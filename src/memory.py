@@ -0,0 +1,130 @@
+"""
+Token-budgeted conversation memory.
+
+Prompts see the conversation as a running summary of older turns plus the
+most recent messages verbatim, as many as fit MEMORY_CONFIG
+["history_token_budget"]. A long answer therefore pushes older messages
+into the summary instead of inflating every prompt, and nothing falls off
+the end unsummarised.
+
+The summary is updated incrementally: after each turn the messages that no
+longer fit the verbatim tail are folded into it (see nodes.turn.record_turn)
+and the state remembers how many messages it covers, so earlier turns are
+never summarised twice.
+"""
+
+import os
+import threading
+from typing import Callable, List, Optional, Tuple
+
+from config.settings import MEMORY_CONFIG
+from src.metrics import metrics
+
+_encode: Optional[Callable[[str], list]] = None
+_load_lock = threading.Lock()
+_load_attempted = False
+_retry: Optional[threading.Timer] = None
+
+
+def load_token_counter() -> bool:
+    """
+    Load tiktoken's o200k_base encoding; True once it is available.
+
+    The encoding is read from MEMORY_CONFIG["tiktoken_cache_dir"], or
+    downloaded into it on first use, so this is called at warm-up rather
+    than inside a turn. If it cannot be loaded the failure is logged, token
+    counts fall back to estimate_tokens, and loading is retried in the
+    background every MEMORY_CONFIG["tokenizer_retry_seconds"].
+    """
+    global _encode, _load_attempted, _retry
+
+    with _load_lock:
+        _load_attempted = True
+        if _encode is not None:
+            return True
+        try:
+            os.environ.setdefault("TIKTOKEN_CACHE_DIR", str(MEMORY_CONFIG["tiktoken_cache_dir"]))
+            import tiktoken
+            _encode = tiktoken.get_encoding("o200k_base").encode
+            metrics.set_gauge("memory.tokens_estimated", 0)
+            print("---TOKEN COUNTER: o200k_base LOADED---")
+            return True
+        except Exception as e:
+            retry_seconds = MEMORY_CONFIG["tokenizer_retry_seconds"]
+            print(
+                f"---TOKEN COUNTER: o200k_base UNAVAILABLE ({type(e).__name__}), "
+                f"ESTIMATING TOKENS, RETRYING IN {retry_seconds:.0f}s---"
+            )
+            metrics.increment("memory.tokenizer_load_failures")
+            metrics.set_gauge("memory.tokens_estimated", 1)
+            # A retry that fails schedules the next one from its own thread
+            if retry_seconds > 0 and (_retry is None or _retry is threading.current_thread() or not _retry.is_alive()):
+                _retry = threading.Timer(retry_seconds, load_token_counter)
+                _retry.daemon = True
+                _retry.start()
+            return False
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Upper-leaning token estimate used while the encoding is unavailable.
+
+    ASCII text averages about 4 characters per token, but Arabic packs far
+    fewer characters into a token, so other characters are counted at 2 per
+    token. Erring high keeps the real count of a prompt trimmed to a budget
+    with the estimate within that budget.
+    """
+    ascii_chars = sum(1 for char in text if char < "\x80")
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars + 1) // 2
+
+
+def count_tokens(text: str) -> int:
+    """Tokens in text (tiktoken o200k_base; see load_token_counter and estimate_tokens)."""
+    if _encode is None and not _load_attempted:
+        # Not warmed up (scripts, tests): load on first use
+        load_token_counter()
+    if _encode is None:
+        return estimate_tokens(text)
+    return len(_encode(text))
+
+
+def format_message(message: dict) -> str:
+    role = message.get("role", "")
+    if role == "user":
+        return f"User: {message.get('content', '')}\n"
+    if role == "assistant":
+        return f"Assistant: {message.get('content', '')}\n"
+    return ""
+
+
+def format_messages(messages: List[dict]) -> str:
+    return "".join(format_message(message) for message in messages)
+
+
+def split_history(
+    history: List[dict], summarized_count: int = 0, budget: int = MEMORY_CONFIG["history_token_budget"]
+) -> Tuple[List[dict], List[dict]]:
+    """
+    Split the messages not yet in the summary into (older, tail).
+
+    tail is the longest run of most recent messages whose formatted lines
+    fit the token budget; older is what should be folded into the summary.
+    """
+    pending = history[summarized_count:]
+    start, used = len(pending), 0
+    while start > 0:
+        tokens = count_tokens(format_message(pending[start - 1]))
+        if used + tokens > budget:
+            break
+        used += tokens
+        start -= 1
+    return pending[:start], pending[start:]
+
+
+def format_memory(summary: Optional[str], tail: List[dict]) -> str:
+    """History text for the prompts: the summary of older turns, then the verbatim tail."""
+    formatted_history = ""
+    if summary:
+        formatted_history += f"Summary of earlier conversation: {summary}\n"
+    formatted_history += format_messages(tail)
+    return formatted_history or "No previous conversation."
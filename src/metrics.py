@@ -0,0 +1,73 @@
+"""
+In-process metrics registry.
+
+Counters, gauges and timings are recorded from any thread (graph nodes,
+the warm-up thread, the knowledge base watcher) and read back as a plain
+dict with snapshot(), for logs, benchmarks or a debug panel.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List
+
+
+class Metrics:
+    """Thread-safe counters, gauges and timings keyed by dotted names."""
+
+    def __init__(self, max_samples: int = 1000):
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, float] = {}
+        self._timings: Dict[str, List[float]] = {}
+
+    def increment(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name: str, seconds: float) -> None:
+        """Record a duration; only the most recent max_samples are kept per name."""
+        with self._lock:
+            samples = self._timings.setdefault(name, [])
+            samples.append(seconds)
+            if len(samples) > self.max_samples:
+                del samples[:len(samples) - self.max_samples]
+
+    @contextmanager
+    def timed(self, name: str) -> Iterator[None]:
+        """Record the wall time of the with-block under `name`, even if it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Copy of all counters and gauges, plus count/last/mean/p50/max seconds per timing."""
+        with self._lock:
+            timings = {}
+            for name, samples in self._timings.items():
+                ordered = sorted(samples)
+                timings[name] = {
+                    "count": len(samples),
+                    "last": samples[-1],
+                    "mean": sum(samples) / len(samples),
+                    "p50": ordered[len(ordered) // 2],
+                    "max": ordered[-1],
+                }
+            return {"counters": dict(self._counters), "gauges": dict(self._gauges), "timings": timings}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._timings.clear()
+
+
+# Process-wide registry
+metrics = Metrics()
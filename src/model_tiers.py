@@ -0,0 +1,70 @@
+"""
+Model tier selection for the answer generating chains.
+
+generation_chain and simulated_generation_chain hold two chat models, the
+fast tier (MODEL_TIERS_CONFIG["fast_model"]) and the strong tier
+(["strong_model"], the default), and the node picks one per call with
+tier_config(). Tiering is opt-in (MODEL_TIERING=true); when it is off every
+turn uses the strong tier.
+
+simulated_generate always uses the strong tier: its turns are bookings,
+complaints and emergencies ("ابني وقع وراسه بتنزف"), and knowledge base
+questions none of whose documents were relevant, all answered without a
+row to ground them. For the generate node select_tier() decides from
+signals the graph already has:
+
+- an earlier generation this turn failed grading (the retry loop): strong,
+  always
+- more relevant documents, a longer question or a deeper conversation than
+  the max_simple_* limits: strong
+- otherwise (short opening questions, a row or two of context): fast
+
+A fast answer that the hallucination grader rejects is regenerated by the
+strong tier, so a wrong "simple" call costs one cheap generation.
+"""
+
+from typing import Callable, Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.runnables import ConfigurableField, Runnable, RunnableConfig
+from langchain_core.runnables.config import merge_configs
+
+from config.settings import MODEL_TIERS_CONFIG
+from src.state import GraphState
+
+FAST, STRONG = "fast", "strong"
+TIER_FIELD = "model_tier"
+
+
+def tier_model(tier: str) -> str:
+    return MODEL_TIERS_CONFIG[f"{tier}_model"]
+
+
+def tiered(build: Callable[[str], BaseChatModel]) -> Runnable:
+    """The model build(tier) for the tier named in the config's "model_tier" (strong by default)."""
+    return build(STRONG).configurable_alternatives(
+        ConfigurableField(id=TIER_FIELD), default_key=STRONG, **{FAST: build(FAST)}
+    )
+
+
+def select_tier(state: GraphState) -> str:
+    """The tier for a knowledge base answer (see module docstring)."""
+    if not MODEL_TIERS_CONFIG["enabled"]:
+        return STRONG
+    # Set by the generate node, so above zero only after a generation this turn was rejected
+    if state.get("generation_retry_count"):
+        return STRONG
+    documents = state.get("documents") or []
+    turns = len(state.get("conversation_history") or []) // 2
+    if (
+        len(documents) > MODEL_TIERS_CONFIG["max_simple_documents"]
+        or len(state["question"].split()) > MODEL_TIERS_CONFIG["max_simple_question_words"]
+        or turns > MODEL_TIERS_CONFIG["max_simple_turns"]
+    ):
+        return STRONG
+    return FAST
+
+
+def tier_config(config: Optional[RunnableConfig], tier: str) -> RunnableConfig:
+    """The node's config with the chat model tier selected."""
+    return merge_configs(config, {"configurable": {TIER_FIELD: tier}})
@@ -1,6 +1,29 @@
-from src.nodes.generate import generate
-from src.nodes.grade_documents import grade_documents
-from src.nodes.retrieve import retrieve
-from src.nodes.simulated_generate import simulated_generate
+from src.nodes.generate import agenerate, generate
+from src.nodes.grade_documents import agrade_documents, grade_documents
+from src.nodes.retrieve import aretrieve, retrieve
+from src.nodes.route_question import (
+    aroute_question,
+    aroute_question_speculative,
+    route_question,
+    route_question_speculative,
+)
+from src.nodes.simulated_generate import asimulated_generate, simulated_generate
+from src.nodes.turn import arecord_turn, prepare_turn, record_turn
 
-__all__ = ["generate", "grade_documents", "retrieve", "simulated_generate"]
+__all__ = [
+    "agenerate",
+    "agrade_documents",
+    "arecord_turn",
+    "aretrieve",
+    "aroute_question",
+    "aroute_question_speculative",
+    "asimulated_generate",
+    "generate",
+    "grade_documents",
+    "prepare_turn",
+    "record_turn",
+    "retrieve",
+    "route_question",
+    "route_question_speculative",
+    "simulated_generate",
+]
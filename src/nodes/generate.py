@@ -1,44 +1,46 @@
 from typing import Any, Dict
 
+from langchain_core.runnables import RunnableConfig
+
 from src.chains.generation import generation_chain
+from src.model_tiers import select_tier, tier_config
+from src.nodes.turn import history_text
 from src.state import GraphState
 
 
-def generate(state: GraphState) -> Dict[str, Any]:
-    print("---GENERATE---")
-    question = state["question"]
-    documents = state["documents"]
-    conversation_history = state.get("conversation_history", [])
+def _inputs(state: GraphState) -> Dict[str, Any]:
+    return {
+        "context": state["documents"], 
+        "question": state["question"],
+        "conversation_history": history_text(state)
+    }
+
+
+def _update(state: GraphState, generation: str, tier: str) -> Dict[str, Any]:
     retry_count = state.get("generation_retry_count", 0)
     max_retries = state.get("max_generation_retries", 3)
     
-    # Format conversation history for the prompt
-    formatted_history = ""
-    if conversation_history:
-        for msg in conversation_history[-6:]:  # Last 6 messages for context
-            role = msg.get("role", "")
-            content = msg.get("content", "")
-            if role == "user":
-                formatted_history += f"User: {content}\n"
-            elif role == "assistant":
-                formatted_history += f"Assistant: {content}\n"
-    
-    if not formatted_history:
-        formatted_history = "No previous conversation."
-
-    generation = generation_chain.invoke({
-        "context": documents, 
-        "question": question,
-        "conversation_history": formatted_history
-    })
-    
     # Increment retry count for next iteration if this gets retried
     new_retry_count = retry_count + 1
     
     return {
-        "documents": documents, 
-        "question": question, 
+        "documents": state["documents"], 
+        "question": state["question"], 
         "generation": generation,
+        "answered_by": "generate",
+        "model_tier": tier,
         "generation_retry_count": new_retry_count,
         "max_generation_retries": max_retries
     }
+
+
+def generate(state: GraphState, config: RunnableConfig) -> Dict[str, Any]:
+    tier = select_tier(state)
+    print(f"---GENERATE ({tier.upper()} MODEL)---")
+    return _update(state, generation_chain.invoke(_inputs(state), tier_config(config, tier)), tier)
+
+
+async def agenerate(state: GraphState, config: RunnableConfig) -> Dict[str, Any]:
+    tier = select_tier(state)
+    print(f"---GENERATE ({tier.upper()} MODEL)---")
+    return _update(state, await generation_chain.ainvoke(_inputs(state), tier_config(config, tier)), tier)
@@ -1,30 +1,23 @@
-from typing import Any, Dict
+import time
+from typing import Any, Dict, List
 
-from src.chains.retrieval_grader import retrieval_grader
+from config.settings import GRADING_CONFIG
+from src.chains.retrieval_grader import GradeDocuments, retrieval_grader
+from src.metrics import metrics
 from src.state import GraphState
 
 
-def grade_documents(state: GraphState) -> Dict[str, Any]:
-    """
-    Determines whether the retrieved documents are relevant to the question
-    If all documents are not relevant, we will set a flag to run simulated generation
+def _inputs(state: GraphState) -> List[Dict[str, Any]]:
+    return [{"question": state["question"], "document": d} for d in state["documents"]]
 
-    Args:
-        state (dict): The current graph state
 
-    Returns:
-        state (dict): Filtered out irrelevant documents and updated simulated_generation state
-    """
-
-    print("---CHECK DOCUMENT RELEVANCE TO QUESTION---")
-    question = state["question"]
+def _update(state: GraphState, scores: List[GradeDocuments], elapsed: float) -> Dict[str, Any]:
     documents = state["documents"]
+    metrics.observe("node.grade_documents", elapsed)
+    print(f"---GRADED {len(documents)} DOCUMENTS IN {elapsed:.2f}s---")
 
     filtered_docs = []
-    for i, d in enumerate(documents):
-        score = retrieval_grader.invoke(
-            {"question": question, "document": d.page_content}
-        )
+    for d, score in zip(documents, scores):
         grade = score.binary_score
         
         if grade.lower() == "yes":
@@ -37,4 +30,38 @@ def grade_documents(state: GraphState) -> Dict[str, Any]:
     # Set simulated_generation to True only if ALL documents are not relevant (filtered_docs is empty)
     simulated_generation = len(filtered_docs) == 0
     
-    return {"documents": filtered_docs, "question": question, "simulated_generation": simulated_generation}
+    return {"documents": filtered_docs, "question": state["question"], "simulated_generation": simulated_generation}
+
+
+def grade_documents(state: GraphState) -> Dict[str, Any]:
+    """
+    Determines whether the retrieved documents are relevant to the question
+    If all documents are not relevant, we will set a flag to run simulated generation
+
+    Documents are graded concurrently (up to GRADING_CONFIG["max_concurrency"]
+    LLM calls at once), so grading costs about one round trip instead of one
+    per document. Relevant documents keep their retrieval order.
+
+    Args:
+        state (dict): The current graph state
+
+    Returns:
+        state (dict): Filtered out irrelevant documents and updated simulated_generation state
+    """
+
+    print("---CHECK DOCUMENT RELEVANCE TO QUESTION---")
+    started = time.perf_counter()
+    scores = retrieval_grader.batch(
+        _inputs(state), config={"max_concurrency": GRADING_CONFIG["max_concurrency"]}
+    )
+    return _update(state, scores, time.perf_counter() - started)
+
+
+async def agrade_documents(state: GraphState) -> Dict[str, Any]:
+    """Async grade_documents."""
+    print("---CHECK DOCUMENT RELEVANCE TO QUESTION---")
+    started = time.perf_counter()
+    scores = await retrieval_grader.abatch(
+        _inputs(state), config={"max_concurrency": GRADING_CONFIG["max_concurrency"]}
+    )
+    return _update(state, scores, time.perf_counter() - started)
@@ -1,13 +1,37 @@
+import asyncio
 from typing import Any, Dict
 
 from src.state import GraphState
-from src.ingestion import retriever
+from src.retriever import get_retriever, is_ready, leased_retriever
 
 
 def retrieve(state: GraphState) -> Dict[str, Any]:
     print("---RETRIEVE---")
     question = state["question"]
+    categories = state.get("categories") or []
 
-    documents = retriever.invoke(question)
+    with leased_retriever() as retriever:
+        documents = retriever.invoke(question, categories=categories)
+        if categories and not documents:
+            # Empty partition (or a wrong prediction with no matches): search everything
+            print("---NO DOCUMENTS IN PREDICTED CATEGORIES, SEARCHING ALL---")
+            documents = retriever.invoke(question)
     
     return {"documents": documents, "question": question}
+
+
+async def aretrieve(state: GraphState) -> Dict[str, Any]:
+    print("---RETRIEVE---")
+    question = state["question"]
+    categories = state.get("categories") or []
+
+    # Waiting for the warm-up blocks, so keep it off the event loop
+    if not is_ready():
+        await asyncio.to_thread(get_retriever)
+    with leased_retriever() as retriever:
+        documents = await retriever.ainvoke(question, categories=categories)
+        if categories and not documents:
+            print("---NO DOCUMENTS IN PREDICTED CATEGORIES, SEARCHING ALL---")
+            documents = await retriever.ainvoke(question)
+
+    return {"documents": documents, "question": question}
@@ -0,0 +1,116 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from src.categories import in_categories
+from src.chains.router import RouteQuery, question_router
+from src.local_router import local_route
+from src.metrics import metrics
+from src.nodes.grade_documents import agrade_documents, grade_documents
+from src.nodes.retrieve import aretrieve, retrieve
+from src.nodes.turn import history_text
+from src.state import GraphState
+
+# Speculative work outlives the node when the router discards it, so it runs
+# on a shared pool rather than one the node would have to wait to shut down
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="speculative")
+
+
+def _inputs(state: GraphState) -> Dict[str, Any]:
+    return {
+        "question": state["question"],
+        "conversation_history": history_text(state)
+    }
+
+
+def _update(source: RouteQuery) -> Dict[str, Any]:
+    if source.datasource == "vectorstore" and source.categories:
+        print(f"---PREDICTED CATEGORIES: {', '.join(source.categories)}---")
+
+    return {"datasource": source.datasource, "categories": list(source.categories), "speculation": None}
+
+
+def _local(state: GraphState) -> Optional[RouteQuery]:
+    # Confident local decisions skip the LLM router entirely
+    source = local_route(state["question"], state.get("conversation_history"))
+    metrics.increment("router.local" if source else "router.llm")
+    return source
+
+
+def route_question(state: GraphState) -> Dict[str, Any]:
+    print("\n\n---ROUTE QUESTION---")
+    return _update(_local(state) or question_router.invoke(_inputs(state)))
+
+
+async def aroute_question(state: GraphState) -> Dict[str, Any]:
+    print("\n\n---ROUTE QUESTION---")
+    return _update(_local(state) or await question_router.ainvoke(_inputs(state)))
+
+
+def _speculative_state(state: GraphState) -> GraphState:
+    # The categories are not predicted yet, so the speculative search covers everything
+    return {**state, "categories": []}
+
+
+def _speculate(state: GraphState, grade: bool) -> Dict[str, Any]:
+    state = _speculative_state(state)
+    update = retrieve(state)
+    if grade:
+        update = grade_documents({**state, **update})
+    return update
+
+
+async def _aspeculate(state: GraphState, grade: bool) -> Dict[str, Any]:
+    state = _speculative_state(state)
+    update = await aretrieve(state)
+    if grade:
+        update = await agrade_documents({**state, **update})
+    return update
+
+
+def _merge(routed: Dict[str, Any], speculative: Dict[str, Any], grade: bool) -> Dict[str, Any]:
+    documents = speculative["documents"]
+    categories = routed["categories"]
+    if categories:
+        # Same narrowing the category filter would have done; keep everything if nothing matches
+        documents = [d for d in documents if in_categories(d, categories)] or documents
+
+    update = {**routed, "documents": documents, "speculation": "graded" if grade else "retrieved"}
+    if grade:
+        update["simulated_generation"] = len(documents) == 0
+    print(f"---USING SPECULATIVE {'RETRIEVAL AND GRADING' if grade else 'RETRIEVAL'}---")
+    return update
+
+
+def route_question_speculative(state: GraphState, grade: bool = False) -> Dict[str, Any]:
+    """
+    Route the question while retrieval (and, with grade=True, document
+    grading) runs on a worker thread.
+
+    On the RAG path the retrieve (and grade) nodes are skipped, so generation
+    starts as soon as the slower of the router and the speculative work
+    finishes. The speculative result is discarded when the question is routed
+    to simulated generation.
+    """
+    future = _executor.submit(_speculate, state, grade)
+    routed = route_question(state)
+    if routed["datasource"] != "vectorstore":
+        print("---DISCARDING SPECULATIVE RETRIEVAL---")
+        future.cancel()
+        return routed
+    return _merge(routed, future.result(), grade)
+
+
+async def aroute_question_speculative(state: GraphState, grade: bool = False) -> Dict[str, Any]:
+    """Async route_question_speculative; discarded work is cancelled."""
+    task = asyncio.create_task(_aspeculate(state, grade))
+    try:
+        routed = await aroute_question(state)
+    except BaseException:
+        task.cancel()
+        raise
+    if routed["datasource"] != "vectorstore":
+        print("---DISCARDING SPECULATIVE RETRIEVAL---")
+        task.cancel()
+        return routed
+    return _merge(routed, await task, grade)
@@ -1,51 +1,52 @@
 from typing import Any, Dict
 
+from langchain_core.runnables import RunnableConfig
+
 from src.chains.simulated_generation import simulated_generation_chain
+from src.model_tiers import STRONG, tier_config
+from src.nodes.turn import history_text
 from src.state import GraphState
 
 
-def simulated_generate(state: GraphState) -> Dict[str, Any]:
-    """
-    Generate answer using simulated hospital knowledge and capabilities.
-    
-    This node replaces web search by acting as if it has access to comprehensive
-    hospital information systems and can perform various hospital-related actions.
-    """
-    print("---SIMULATED KNOWLEDGE GENERATION---")
-    question = state["question"]
+def _inputs(state: GraphState) -> Dict[str, Any]:
     documents = state.get("documents", [])
-    conversation_history = state.get("conversation_history", [])
     
     # Use available context if any, otherwise rely on simulated knowledge
     context = documents if documents else "No specific context available - using comprehensive hospital knowledge base"
     
-    # Format conversation history for the prompt
-    formatted_history = ""
-    if conversation_history:
-        for msg in conversation_history[-6:]:  # Last 6 messages for context
-            role = msg.get("role", "")
-            content = msg.get("content", "")
-            if role == "user":
-                formatted_history += f"User: {content}\n"
-            elif role == "assistant":
-                formatted_history += f"Assistant: {content}\n"
-    
-    if not formatted_history:
-        formatted_history = "No previous conversation."
-    
-    generation = simulated_generation_chain.invoke({
+    return {
         "context": context, 
-        "question": question,
-        "conversation_history": formatted_history
-    })
-    
-    
+        "question": state["question"],
+        "conversation_history": history_text(state)
+    }
+
+
+def _update(state: GraphState, generation: str, tier: str) -> Dict[str, Any]:
     # Ensure documents is always a list for state consistency
-    if not documents:
-        documents = []
-    
     return {
-        "documents": documents, 
-        "question": question, 
-        "generation": generation
-    } 
\ No newline at end of file
+        "documents": state.get("documents") or [], 
+        "question": state["question"], 
+        "generation": generation,
+        "answered_by": "simulated_generate",
+        "model_tier": tier
+    }
+
+
+def simulated_generate(state: GraphState, config: RunnableConfig) -> Dict[str, Any]:
+    """
+    Generate answer using simulated hospital knowledge and capabilities.
+    
+    This node replaces web search by acting as if it has access to comprehensive
+    hospital information systems and can perform various hospital-related actions.
+    Always answered by the strong model tier (see src/model_tiers.py).
+    """
+    tier = STRONG
+    print(f"---SIMULATED KNOWLEDGE GENERATION ({tier.upper()} MODEL)---")
+    return _update(state, simulated_generation_chain.invoke(_inputs(state), tier_config(config, tier)), tier)
+
+
+async def asimulated_generate(state: GraphState, config: RunnableConfig) -> Dict[str, Any]:
+    """Async simulated_generate."""
+    tier = STRONG
+    print(f"---SIMULATED KNOWLEDGE GENERATION ({tier.upper()} MODEL)---")
+    return _update(state, await simulated_generation_chain.ainvoke(_inputs(state), tier_config(config, tier)), tier)
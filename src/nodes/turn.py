@@ -0,0 +1,105 @@
+from typing import Any, Dict, List, Optional
+
+from langchain_core.runnables import RunnableConfig
+
+from config.settings import LLM_CONFIG
+from src.chains.summarizer import summarizer_chain
+from src.memory import format_memory, format_messages, split_history
+from src.state import GraphState
+
+
+def format_history(state: GraphState) -> str:
+    """The conversation as the prompts see it: running summary plus the token-budgeted tail."""
+    _, tail = split_history(state.get("conversation_history") or [], state.get("summarized_count") or 0)
+    return format_memory(state.get("summary"), tail)
+
+
+def history_text(state: GraphState) -> str:
+    """Formatted history for this turn (formatted here when called outside the graph)."""
+    formatted_history = state.get("formatted_history")
+    if formatted_history is None:
+        formatted_history = format_history(state)
+    return formatted_history
+
+
+def prepare_turn(state: GraphState) -> Dict[str, Any]:
+    """
+    Start a turn: format the history once for every prompt and reset the
+    per-turn fields a checkpointed thread still holds from the last turn.
+    """
+    return {
+        "formatted_history": format_history(state),
+        "documents": [],
+        "generation": "",
+        "simulated_generation": False,
+        "generation_retry_count": 0,
+        "max_generation_retries": state.get("max_generation_retries") or LLM_CONFIG["max_generation_retries"],
+        "datasource": None,
+        "categories": [],
+        "speculation": None,
+        "answered_by": None,
+        "model_tier": None,
+    }
+
+
+def turn_messages(question: str, answer: str) -> List[dict]:
+    return [{"role": "user", "content": question}, {"role": "assistant", "content": answer}]
+
+
+def _record(state: GraphState, config: Optional[RunnableConfig]):
+    """The turn's messages, the update recording them, and the messages to fold into the summary."""
+    messages = turn_messages(state.get("user_message") or state["question"], state["generation"])
+    update = {
+        "conversation_history": messages,
+        # Only meant for this turn; a checkpointed thread would otherwise carry it into the next one
+        "user_message": None,
+    }
+    # A stateless run would throw its summary away, so only checkpointed threads summarise
+    if not (config or {}).get("configurable", {}).get("thread_id"):
+        return update, []
+    history = (state.get("conversation_history") or []) + messages
+    older, _ = split_history(history, state.get("summarized_count") or 0)
+    return update, older
+
+
+def _summary_inputs(state: GraphState, older: List[dict]) -> Dict[str, str]:
+    return {"summary": state.get("summary") or "None yet.", "messages": format_messages(older)}
+
+
+def _with_summary(state: GraphState, update: Dict[str, Any], older: List[dict], summary: str) -> Dict[str, Any]:
+    print(f"---SUMMARISED {len(older)} OLDER MESSAGES---")
+    return {**update, "summary": summary, "summarized_count": (state.get("summarized_count") or 0) + len(older)}
+
+
+def record_turn(state: GraphState, config: RunnableConfig) -> Dict[str, Any]:
+    """
+    Append the finished turn to the conversation history (the state reducer
+    concatenates) and fold the messages that no longer fit the verbatim
+    tail into the running summary.
+
+    Runs after the answer has been generated, so a streamed answer is on
+    screen before the summariser is called. On a turn that summarises,
+    though, app.invoke / cached_invoke return, and the final state is
+    checkpointed, only after that extra LLM call. If the summariser fails
+    the messages stay pending and are folded in after a later turn.
+    """
+    update, older = _record(state, config)
+    if not older:
+        return update
+    try:
+        return _with_summary(state, update, older, summarizer_chain.invoke(_summary_inputs(state, older)))
+    except Exception as e:
+        print(f"---SUMMARY UPDATE FAILED: {e}---")
+        return update
+
+
+async def arecord_turn(state: GraphState, config: RunnableConfig) -> Dict[str, Any]:
+    """Async record_turn."""
+    update, older = _record(state, config)
+    if not older:
+        return update
+    try:
+        return _with_summary(state, update, older, await summarizer_chain.ainvoke(_summary_inputs(state, older)))
+    except Exception as e:
+        print(f"---SUMMARY UPDATE FAILED: {e}---")
+        return update
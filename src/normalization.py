@@ -0,0 +1,103 @@
+"""
+Arabic-aware text normalisation.
+
+normalize_text() is the canonical key used for FAQ matching, embedding and
+response cache keys, and lexical indexing, so spelling variants such as
+"أين تقع المستشفى؟" / "اين تقع المستشفي" resolve to the same entry.
+is_follow_up() flags questions that only make sense with the earlier turns.
+"""
+
+import re
+import string
+from typing import Iterable, List, Optional
+
+# Harakat, Quranic annotation marks, superscript alef and tatweel
+_DIACRITICS = re.compile(r"[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED\u0640]")
+_WHITESPACE = re.compile(r"\s+")
+
+_TRANSLATION = str.maketrans(
+    {
+        # Alef / hamza variants
+        "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا", "ؤ": "و", "ئ": "ي",
+        # Ta marbuta and alef maqsura
+        "ة": "ه", "ى": "ي",
+        # Arabic-Indic and Eastern Arabic-Indic (Persian) digits
+        **{chr(0x0660 + i): str(i) for i in range(10)},
+        **{chr(0x06F0 + i): str(i) for i in range(10)},
+        # Latin and Arabic punctuation become word breaks
+        **{char: " " for char in string.punctuation + "؟،؛«»…“”‘’"},
+    }
+)
+
+
+def normalize_text(text: str) -> str:
+    """Case-folded text with Arabic letter variants, digits, punctuation and whitespace unified."""
+    text = _DIACRITICS.sub("", text.casefold()).translate(_TRANSLATION)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+# Words this short only match exactly, so "ما" never becomes "لا"
+_MIN_FUZZY_WORD = 3
+
+
+def _within_one_edit(a: str, b: str) -> bool:
+    """Whether b is a with at most one character substituted, inserted or deleted."""
+    if a == b:
+        return True
+    if min(len(a), len(b)) < _MIN_FUZZY_WORD:
+        return False
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    # Skip the differing character in b (insertion) or in both (substitution)
+    return a[i:] == b[i + 1:] or (len(a) == len(b) and a[i + 1:] == b[i + 1:])
+
+
+def match_question(text: str, questions: Iterable[str]) -> Optional[str]:
+    """
+    Return the question from `questions` that `text` refers to, or None.
+
+    Questions match on their normalised form. Failing that, a question with
+    the same number of words where each word differs by at most one
+    character is accepted, which absorbs spellings such as "تقع" / "يقع".
+    An added or missing word ("لا أريد ...") never matches, and neither does
+    a changed word of one or two letters.
+    """
+    key = normalize_text(text)
+    if not key:
+        return None
+
+    questions = list(questions)
+    candidates = [(question, normalize_text(question)) for question in questions]
+    for question, candidate in candidates:
+        if candidate == key:
+            return question
+
+    words = key.split()
+    for question, candidate in candidates:
+        candidate_words = candidate.split()
+        if len(candidate_words) == len(words) and all(map(_within_one_edit, words, candidate_words)):
+            return question
+    return None
+
+
+# Words that point back at earlier turns, in normalize_text form
+_FOLLOW_UP_MARKERS = frozenset(normalize_text(word) for word in """
+    it its that this these those they them there he she his her him same also more else again other another
+    هذا هذه ذلك تلك نفس كمان ايضا برضه برضو كذلك طيب وكمان ولو عنه عنها عنهم
+    فيها منه منها بيه بيها ده دي دا دول
+""".split())
+# With earlier turns, questions this short are usually elliptical ("and the price?")
+_MIN_STANDALONE_WORDS = 3
+
+
+def is_follow_up(question: str, conversation_history: Optional[List[dict]]) -> bool:
+    """Whether the answer to `question` may depend on the earlier turns."""
+    if not conversation_history:
+        return False
+    words = normalize_text(question).split()
+    return len(words) < _MIN_STANDALONE_WORDS or any(word in _FOLLOW_UP_MARKERS for word in words)
@@ -0,0 +1,439 @@
+"""
+Brute-force vector store backed by a NumPy matrix.
+
+At our knowledge base size (hundreds to low thousands of rows) an exact scan
+is a single matrix-vector product, so this avoids Chroma's startup, memory
+and SQLite overhead while keeping the same as_retriever() contract.
+"""
+
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+VECTORS_FILE = "vectors.npy"
+SCALES_FILE = "scales.npy"
+FULL_VECTORS_FILE = "vectors_float32.npy"
+DOCUMENTS_FILE = "documents.json"
+
+DTYPES = ("float32", "float16", "int8")
+
+# Rows upcast to float32 at a time when scoring a quantised matrix; small
+# enough that the scratch block (256 x 3072 float32 = 3 MB) stays far below
+# the size of the index itself
+_SCORE_BLOCK_ROWS = 256
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def quantize(vectors: np.ndarray, dtype: np.dtype) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Convert normalised float32 rows to the storage dtype.
+
+    int8 uses symmetric per-vector scaling: each row is divided by its own
+    max |value| / 127, and that factor is returned so scores can be rescaled.
+    """
+    if dtype == np.int8:
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        quantized = np.rint(vectors / scales[:, None]).astype(np.int8)
+        return quantized, scales.astype(np.float32)
+    return vectors.astype(dtype), None
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    Cosine-similarity search over L2-normalised embeddings.
+
+    Embeddings are kept as one contiguous matrix, either float32 (exact),
+    float16, or int8 with a float32 scale per vector (4x smaller than
+    float32). Quantised rows are upcast block by block at query time, so
+    they save memory but not latency: NumPy's float16 conversion makes a
+    float16 scan several times slower than a float32 one, while int8 stays
+    close to it. With rescore_candidates > 0 a quantised index also keeps the
+    float32 vectors, and the top candidates from the quantised scan are
+    rescored exactly so the final ranking matches the float32 one. Persisted,
+    those float32 vectors stay memory-mapped and only the candidate rows are
+    read.
+
+    With truncate_dim > 0 search runs in two stages (Matryoshka embeddings
+    such as text-embedding-3-large keep most of their signal in a prefix):
+    a scan over the first truncate_dim dimensions, renormalised, selects
+    candidate_pool rows, and only those are rescored at full dimension.
+
+    Searches accept a Chroma-style `filter` on metadata equality (optionally
+    combined with "$or"). Row indices per (key, value) are computed once and
+    cached, so a filtered query scores only the rows of its partitions.
+
+    When a persist_directory is given the matrices are saved as .npy files
+    and loaded back memory-mapped, so opening a warm index reads no vectors
+    up front.
+    """
+
+    def __init__(
+        self,
+        embedding: Embeddings,
+        persist_directory: Optional[str] = None,
+        dtype: str = "float32",
+        rescore_candidates: int = 0,
+        truncate_dim: int = 0,
+        candidate_pool: int = 50,
+    ):
+        if dtype not in DTYPES:
+            raise ValueError(f"Unsupported dtype '{dtype}'. Use one of {', '.join(DTYPES)}.")
+
+        self._embedding = embedding
+        self.persist_directory = persist_directory
+        self.dtype = np.dtype(dtype)
+        # Rescoring only means something when the scan itself is approximate
+        self.rescore_candidates = rescore_candidates if self.dtype != np.float32 else 0
+        self.truncate_dim = truncate_dim
+        self.candidate_pool = candidate_pool
+        self._ids: List[str] = []
+        self._texts: List[str] = []
+        self._metadatas: List[Dict[str, Any]] = []
+        self._vectors = np.empty((0, 0), dtype=self.dtype)
+        self._scales: Optional[np.ndarray] = None
+        self._full: Optional[np.ndarray] = None
+        # (quantized, scales, normalized) batches added since the matrices were last
+        # assembled; concatenated once by _flush() instead of on every add
+        self._pending: List[Tuple[np.ndarray, Optional[np.ndarray], np.ndarray]] = []
+        # Truncated, renormalised first-stage matrix; rebuilt lazily after writes
+        self._prefix: Optional[np.ndarray] = None
+        # Row indices per (metadata key, value); rebuilt lazily after writes
+        self._partitions: Dict[Tuple[str, Any], np.ndarray] = {}
+
+        if persist_directory:
+            self._load()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes scanned per query: the stored matrix plus int8 scale factors."""
+        self._flush()
+        return self._vectors.nbytes + (self._scales.nbytes if self._scales is not None else 0)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.persist_directory, name)
+
+    def _load(self) -> None:
+        if not (os.path.exists(self._path(VECTORS_FILE)) and os.path.exists(self._path(DOCUMENTS_FILE))):
+            return
+
+        with open(self._path(DOCUMENTS_FILE), encoding="utf-8") as f:
+            records = json.load(f)
+        vectors = np.load(self._path(VECTORS_FILE), mmap_mode="r")
+        scales = None
+        if self.dtype == np.int8 and os.path.exists(self._path(SCALES_FILE)):
+            scales = np.load(self._path(SCALES_FILE))
+        full = None
+        if self.rescore_candidates and os.path.exists(self._path(FULL_VECTORS_FILE)):
+            full = np.load(self._path(FULL_VECTORS_FILE), mmap_mode="r")
+
+        # A half-written index (e.g. interrupted persist) or one saved with other
+        # settings is treated as empty; rows are then re-synced, which the
+        # embedding cache makes cheap.
+        if (
+            len(records) != vectors.shape[0]
+            or vectors.dtype != self.dtype
+            or (self.dtype == np.int8 and (scales is None or len(scales) != len(records)))
+            or (self.rescore_candidates and (full is None or full.shape[0] != len(records)))
+        ):
+            print(f"Ignoring inconsistent vector index at {self.persist_directory}")
+            return
+
+        self._ids = [record["id"] for record in records]
+        self._texts = [record["page_content"] for record in records]
+        self._metadatas = [record["metadata"] for record in records]
+        self._vectors = vectors
+        self._scales = scales
+        self._full = full
+
+    def _save(self, name: str, array: np.ndarray) -> None:
+        with open(self._path(name) + ".tmp", "wb") as f:
+            np.save(f, np.ascontiguousarray(array))
+
+    def persist(self) -> None:
+        """Write the index to persist_directory and reopen it memory-mapped."""
+        if not self.persist_directory:
+            return
+
+        self._flush()
+        os.makedirs(self.persist_directory, exist_ok=True)
+        files = [VECTORS_FILE]
+        self._save(VECTORS_FILE, self._vectors)
+        if self._scales is not None:
+            self._save(SCALES_FILE, self._scales)
+            files.append(SCALES_FILE)
+        if self._full is not None:
+            self._save(FULL_VECTORS_FILE, self._full)
+            files.append(FULL_VECTORS_FILE)
+        with open(self._path(DOCUMENTS_FILE) + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(
+                [
+                    {"id": doc_id, "page_content": text, "metadata": metadata}
+                    for doc_id, text, metadata in zip(self._ids, self._texts, self._metadatas)
+                ],
+                f,
+                ensure_ascii=False,
+            )
+        for name in files + [DOCUMENTS_FILE]:
+            os.replace(self._path(name) + ".tmp", self._path(name))
+
+        self._vectors = np.load(self._path(VECTORS_FILE), mmap_mode="r")
+        if self._full is not None:
+            self._full = np.load(self._path(FULL_VECTORS_FILE), mmap_mode="r")
+
+    def add_embeddings(
+        self,
+        ids: List[str],
+        embeddings: List[List[float]],
+        texts: List[str],
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+    ) -> List[str]:
+        """Add (or replace) rows whose embeddings were computed elsewhere."""
+        metadatas = metadatas or [{} for _ in ids]
+        # Replacing an id behaves like an upsert
+        existing = set(self._ids)
+        self.delete([doc_id for doc_id in ids if doc_id in existing])
+
+        normalized = _normalize(np.asarray(embeddings, dtype=np.float32))
+        quantized, scales = quantize(normalized, self.dtype)
+        self._pending.append((quantized, scales, normalized))
+        self._ids.extend(ids)
+        self._texts.extend(texts)
+        self._metadatas.extend(metadatas)
+        self._prefix = None
+        self._partitions = {}
+        return ids
+
+    def _flush(self) -> None:
+        """Append the pending batches to the matrices, with one concatenation per matrix."""
+        if not self._pending:
+            return
+        quantized, scales, normalized = zip(*self._pending)
+        stored = [self._vectors] if self._vectors.size else []
+        self._vectors = np.concatenate(stored + list(quantized))
+        if scales[0] is not None:
+            self._scales = np.concatenate(([self._scales] if self._scales is not None else []) + list(scales))
+        if self.rescore_candidates:
+            self._full = np.concatenate(([self._full] if self._full is not None else []) + list(normalized))
+        self._pending = []
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        if ids is None:
+            ids = [str(len(self._ids) + i) for i in range(len(texts))]
+        return self.add_embeddings(ids, self._embedding.embed_documents(texts), texts, metadatas)
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if not ids:
+            return True
+        self._flush()
+        remove = set(ids)
+        keep = [i for i, doc_id in enumerate(self._ids) if doc_id not in remove]
+        if len(keep) == len(self._ids):
+            return True
+
+        self._vectors = np.ascontiguousarray(self._vectors[keep])
+        if self._scales is not None:
+            self._scales = self._scales[keep]
+        if self._full is not None:
+            self._full = np.ascontiguousarray(self._full[keep])
+        self._ids = [self._ids[i] for i in keep]
+        self._texts = [self._texts[i] for i in keep]
+        self._metadatas = [self._metadatas[i] for i in keep]
+        self._prefix = None
+        self._partitions = {}
+        return True
+
+    def update_metadata(self, ids: List[str], metadatas: List[Dict[str, Any]]) -> None:
+        """Replace the metadata of existing rows, leaving their vectors untouched."""
+        positions = {doc_id: i for i, doc_id in enumerate(self._ids)}
+        for doc_id, metadata in zip(ids, metadatas):
+            if doc_id in positions:
+                self._metadatas[positions[doc_id]] = metadata
+        self._partitions = {}
+
+    def reset_collection(self) -> None:
+        """Drop every row (mirrors Chroma.reset_collection)."""
+        self._ids, self._texts, self._metadatas = [], [], []
+        self._pending = []
+        self._vectors = np.empty((0, 0), dtype=self.dtype)
+        self._scales = None
+        self._full = None
+        self._prefix = None
+        self._partitions = {}
+
+    def get(self, include: Optional[List[str]] = None, **kwargs: Any) -> Dict[str, Any]:
+        """Minimal Chroma-compatible get() used by ingestion to list stored ids."""
+        result: Dict[str, Any] = {"ids": list(self._ids)}
+        if include and "documents" in include:
+            result["documents"] = list(self._texts)
+        if include and "metadatas" in include:
+            result["metadatas"] = list(self._metadatas)
+        return result
+
+    def _scores(self, query: np.ndarray) -> np.ndarray:
+        """Cosine similarity of the normalised query with every row (approximate when quantised)."""
+        if self._vectors.dtype == np.float32:
+            return self._vectors @ query
+        # Upcast one block at a time into a single reused float32 buffer, so a
+        # query over a quantised index allocates _SCORE_BLOCK_ROWS rows, never
+        # a float32 copy of the whole matrix
+        rows = len(self._ids)
+        scores = np.empty(rows, dtype=np.float32)
+        scratch = np.empty((min(rows, _SCORE_BLOCK_ROWS), self._vectors.shape[1]), dtype=np.float32)
+        for start in range(0, rows, _SCORE_BLOCK_ROWS):
+            block = self._vectors[start:start + _SCORE_BLOCK_ROWS]
+            upcast = scratch[:len(block)]
+            np.copyto(upcast, block)
+            np.dot(upcast, query, out=scores[start:start + len(block)])
+        if self._scales is not None:
+            scores *= self._scales
+        return scores
+
+    def _row_scores(self, indices: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """Full-dimension scores for selected rows, exact whenever float32 vectors are available."""
+        if self._full is not None:
+            return self._full[indices] @ query
+        scores = self._vectors[indices].astype(np.float32) @ query
+        if self._scales is not None:
+            scores *= self._scales[indices]
+        return scores
+
+    def _prefix_matrix(self) -> np.ndarray:
+        """First truncate_dim dimensions of every row, renormalised, built on first use after a write."""
+        if self._prefix is None:
+            source = self._full if self._full is not None else self._vectors
+            blocks = []
+            for start in range(0, len(self._ids), _SCORE_BLOCK_ROWS):
+                rows = slice(start, start + _SCORE_BLOCK_ROWS)
+                block = source[rows, :self.truncate_dim].astype(np.float32)
+                if source is self._vectors and self._scales is not None:
+                    block *= self._scales[rows, None]
+                blocks.append(_normalize(block))
+            self._prefix = np.concatenate(blocks)
+        return self._prefix
+
+    def _partition(self, key: str, value: Any) -> np.ndarray:
+        """Indices of the rows whose metadata[key] equals value."""
+        if (key, value) not in self._partitions:
+            self._partitions[(key, value)] = np.array(
+                [i for i, metadata in enumerate(self._metadatas) if metadata.get(key) == value], dtype=np.int64
+            )
+        return self._partitions[(key, value)]
+
+    def _filter_rows(self, filter: Dict[str, Any]) -> np.ndarray:
+        """Sorted row indices matching a Chroma-style filter: {key: value}, {key: {"$eq": value}} or {"$or": [...]}."""
+        if "$or" in filter:
+            clauses = [self._filter_rows(clause) for clause in filter["$or"]]
+            return np.unique(np.concatenate(clauses)) if clauses else np.empty(0, dtype=np.int64)
+
+        rows = None
+        for key, value in filter.items():
+            if isinstance(value, dict):
+                if set(value) != {"$eq"}:
+                    raise ValueError(f"Unsupported filter operator for '{key}': {value}")
+                value = value["$eq"]
+            matches = self._partition(key, value)
+            rows = matches if rows is None else np.intersect1d(rows, matches)
+        return rows if rows is not None else np.arange(len(self._ids))
+
+    def _top_k(self, scores: np.ndarray, k: int) -> np.ndarray:
+        k = min(k, len(scores))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64)
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        return candidates[np.argsort(-scores[candidates])]
+
+    def _document(self, index: int) -> Document:
+        return Document(
+            id=self._ids[index],
+            page_content=self._texts[index],
+            metadata=dict(self._metadatas[index]),
+        )
+
+    def similarity_search_with_score_by_vector(
+        self, embedding: List[float], k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        if not self._ids:
+            return []
+        self._flush()
+        query = _normalize(np.asarray(embedding, dtype=np.float32))
+        filter = kwargs.get("filter")
+        rows = self._filter_rows(filter) if filter else None
+        if rows is not None and not len(rows):
+            return []
+
+        if self.truncate_dim and self.truncate_dim < query.shape[0]:
+            # Stage 1: truncated-dimension scan for a candidate pool
+            prefix = self._prefix_matrix()
+            prefix_scores = (prefix if rows is None else prefix[rows]) @ _normalize(query[:self.truncate_dim])
+            pool = max(k, self.candidate_pool, self.rescore_candidates)
+            candidates = self._top_k(prefix_scores, pool)
+        elif rows is not None:
+            # Only the partition's rows are scored
+            candidates = self._top_k(self._row_scores(rows, query), max(k, self.rescore_candidates))
+        else:
+            scores = self._scores(query)
+            if self._full is None:
+                return [(self._document(i), float(scores[i])) for i in self._top_k(scores, k)]
+            # Best quantised candidates, to be rescored exactly
+            candidates = self._top_k(scores, max(k, self.rescore_candidates))
+
+        candidates = np.sort(candidates if rows is None else rows[candidates])
+
+        # Stage 2: full-dimension rescoring of the candidates only
+        rescored = self._row_scores(candidates, query)
+        order = np.argsort(-rescored)[:k]
+        return [(self._document(candidates[j]), float(rescored[j])) for j in order]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self._embedding.embed_query(query), k, **kwargs)
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, **kwargs)]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, **kwargs)]
+
+    def _select_relevance_score_fn(self):
+        # Cosine similarity in [-1, 1] mapped to [0, 1]
+        return lambda score: (score + 1.0) / 2.0
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> "NumpyVectorStore":
+        store = cls(embedding, **kwargs)
+        store.add_texts(texts, metadatas, ids=ids)
+        store.persist()
+        return store
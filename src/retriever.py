@@ -0,0 +1,255 @@
+"""
+Lazily initialised retriever provider.
+
+Building the index (loading the CSV, embedding new rows, opening Chroma) is
+deferred until the retriever is first needed or warm_up() is called, so
+importing the graph returns immediately.
+
+reload() rebuilds it from an updated CSV while the current one keeps
+serving, then swaps it in (see src/kb_watcher.py). Queries hold the
+retriever through leased_retriever(), so a reload knows when the old index
+has no readers left and can be dropped.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from langchain_core.retrievers import BaseRetriever
+
+from config.settings import KB_RELOAD_CONFIG, KNOWLEDGE_BASE_FILE, READY_FILE, RETRIEVAL_CONFIG
+from src.memory import load_token_counter
+from src.metrics import metrics
+
+_lock = threading.Lock()
+# Notified whenever a lease is released
+_released = threading.Condition(_lock)
+# Queries in flight per knowledge base version
+_leases: Dict[int, int] = {}
+_reload_lock = threading.Lock()
+_ready = threading.Event()
+_retriever: Optional[BaseRetriever] = None
+_warm_up_thread: Optional[threading.Thread] = None
+# Incremented every time a (re)built retriever is swapped in
+_kb_version = 0
+
+
+def build_retriever(csv_file: str = str(KNOWLEDGE_BASE_FILE), new_version: bool = False) -> BaseRetriever:
+    """
+    Build the configured retriever (dense, or hybrid BM25 + dense) from the knowledge base.
+
+    Either kind accepts invoke(question, categories=[...]) to search only
+    the given knowledge base categories. new_version builds into a new
+    Chroma collection instead of the one being served (see build_vectorstore).
+    """
+    # Imported here so that importing this module stays cheap
+    from src.hybrid_retrieval import BM25Index, DenseRetriever, HybridRetriever
+    from src.ingestion import build_vectorstore
+    from src.knowledge_base import iter_documents
+
+    vectorstore = build_vectorstore(csv_file, new_version=new_version)
+    mode = RETRIEVAL_CONFIG["mode"]
+    if mode == "dense":
+        return DenseRetriever(
+            vectorstore=vectorstore,
+            search_kwargs={"k": RETRIEVAL_CONFIG["k"]},
+            search_type="similarity",
+        )
+    if mode != "hybrid":
+        raise ValueError(f"Unknown retrieval mode '{mode}'. Use 'hybrid' or 'dense'.")
+
+    lexical = BM25Index(iter_documents(csv_file))
+    print(f"BM25 index built over {len(lexical)} rows")
+    return HybridRetriever(
+        dense=DenseRetriever(
+            vectorstore=vectorstore,
+            search_kwargs={"k": RETRIEVAL_CONFIG["candidate_k"]},
+            search_type="similarity",
+        ),
+        lexical=lexical,
+        k=RETRIEVAL_CONFIG["k"],
+        candidate_k=RETRIEVAL_CONFIG["candidate_k"],
+        rrf_k=RETRIEVAL_CONFIG["rrf_k"],
+    )
+
+
+def _document_count(retriever: BaseRetriever) -> int:
+    from src.hybrid_retrieval import HybridRetriever
+    from src.numpy_store import NumpyVectorStore
+
+    if isinstance(retriever, HybridRetriever):
+        return len(retriever.lexical)
+    vectorstore = retriever.vectorstore
+    return len(vectorstore) if isinstance(vectorstore, NumpyVectorStore) else len(vectorstore.get(include=[])["ids"])
+
+
+def _retire(retriever: BaseRetriever, version: int) -> None:
+    """Drop the Chroma collection of a replaced retriever once no query is using it."""
+    from langchain_chroma import Chroma
+    from src.hybrid_retrieval import HybridRetriever
+
+    vectorstore = (retriever.dense if isinstance(retriever, HybridRetriever) else retriever).vectorstore
+    if not isinstance(vectorstore, Chroma):
+        # The NumPy index was replaced on disk; the old arrays go with the last reference
+        return
+    with _released:
+        drained = _released.wait_for(lambda: not _leases.get(version), KB_RELOAD_CONFIG["drain_timeout_seconds"])
+    if not drained:
+        # Left for the next start-up, which drops collections older than the latest
+        print(f"---KB RELOAD: VERSION {version} STILL IN USE, KEEPING ITS COLLECTION---")
+        metrics.increment("kb.retire_timeouts")
+        return
+    vectorstore.delete_collection()
+    print(f"---KB RELOAD: DROPPED THE COLLECTION OF VERSION {version}---")
+
+
+def warm_up() -> BaseRetriever:
+    """Load the tokenizer, build the retriever if needed and mark the process as ready. Idempotent."""
+    global _retriever, _kb_version
+
+    if _ready.is_set():
+        return _retriever
+
+    with _lock:
+        if _retriever is None:
+            # Fetch the tokenizer now rather than inside the first turn
+            load_token_counter()
+            print("---WARM UP: BUILDING RETRIEVER---")
+            with metrics.timed("kb.build"):
+                _retriever = build_retriever()
+            _kb_version += 1
+            metrics.set_gauge("kb.version", _kb_version)
+            metrics.set_gauge("kb.documents", _document_count(_retriever))
+            READY_FILE.touch()
+            _ready.set()
+            print("---WARM UP: RETRIEVER READY---")
+
+    return _retriever
+
+
+def start_warm_up() -> threading.Thread:
+    """Start warm_up() in a background thread (once per process) and return it."""
+    global _warm_up_thread
+
+    with _lock:
+        if _warm_up_thread is None:
+            if not _ready.is_set():
+                # A marker left behind by a previous process must not report ready
+                READY_FILE.unlink(missing_ok=True)
+            _warm_up_thread = threading.Thread(target=warm_up, name="retriever-warm-up", daemon=True)
+            _warm_up_thread.start()
+
+    return _warm_up_thread
+
+
+def reload(csv_file: str = str(KNOWLEDGE_BASE_FILE)) -> BaseRetriever:
+    """
+    Rebuild the retriever from the current CSV and swap it in.
+
+    The new retriever is built while the current one keeps serving, and the
+    swap is a single reference assignment: queries already running finish
+    on the retriever they started with, new ones get the new version. If the
+    build fails the current retriever stays live and the error is raised.
+
+    The NumPy index is synced in memory and replaced on disk with os.replace,
+    so readers never see a partial index. For Chroma the served collection
+    is copied into a new versioned one ("<name>_v<n+1>") and only the CSV's
+    changes are synced into it. Nothing reads it until the swap, and the old
+    collection is dropped once the queries leased on it have finished
+    (KB_RELOAD_CONFIG["drain_timeout_seconds"]).
+    """
+    global _retriever, _kb_version
+
+    with _reload_lock:
+        previous = get_retriever()
+        previous_count = _document_count(previous)
+        before = metrics.snapshot()["counters"]
+        started = time.perf_counter()
+        try:
+            retriever = build_retriever(csv_file, new_version=True)
+        except Exception:
+            metrics.increment("kb.reload_failures")
+            print(f"---KB RELOAD FAILED: STILL SERVING VERSION {_kb_version}---")
+            raise
+        seconds = time.perf_counter() - started
+
+        with _lock:
+            _retriever = retriever
+            previous_version = _kb_version
+            _kb_version += 1
+            version = _kb_version
+
+        after = metrics.snapshot()["counters"]
+        rows = {key: after.get(f"ingest.rows_{key}", 0) - before.get(f"ingest.rows_{key}", 0)
+                for key in ("added", "updated", "deleted")}
+        count = _document_count(retriever)
+        metrics.observe("kb.reload", seconds)
+        metrics.increment("kb.reloads")
+        metrics.set_gauge("kb.version", version)
+        metrics.set_gauge("kb.documents", count)
+        print(
+            f"---KB RELOAD: VERSION {version}, {count} DOCUMENTS ({count - previous_count:+d}; "
+            f"{rows['added']:.0f} added, {rows['updated']:.0f} updated, {rows['deleted']:.0f} deleted) "
+            f"IN {seconds:.2f}s---"
+        )
+        _retire(previous, previous_version)
+        return retriever
+
+
+def kb_version() -> int:
+    """Version of the knowledge base being served: 0 before warm-up, then +1 per (re)build."""
+    return _kb_version
+
+
+def is_ready() -> bool:
+    """Whether the retriever has been built in this process."""
+    return _ready.is_set()
+
+
+def get_retriever(timeout: Optional[float] = None) -> BaseRetriever:
+    """
+    Return the retriever, waiting for a background warm-up if one is running.
+
+    Without a running warm-up the retriever is built in the calling thread.
+    """
+    if _ready.is_set():
+        return _retriever
+
+    if _warm_up_thread is not None and _warm_up_thread.is_alive():
+        _warm_up_thread.join(timeout)
+        if _ready.is_set():
+            return _retriever
+        if _warm_up_thread.is_alive():
+            raise TimeoutError("Retriever is not ready yet")
+
+    # No warm-up running (or it failed): build here so errors reach the caller
+    return warm_up()
+
+
+@contextmanager
+def leased_retriever(timeout: Optional[float] = None) -> Iterator[BaseRetriever]:
+    """
+    get_retriever() for the duration of a query.
+
+    A reload does not drop the index of the version leased here until the
+    with-block exits.
+    """
+    retriever = get_retriever(timeout)
+    with _lock:
+        # Re-read under the lock: a reload may have swapped since get_retriever returned
+        retriever, version = _retriever, _kb_version
+        _leases[version] = _leases.get(version, 0) + 1
+    try:
+        yield retriever
+    finally:
+        with _released:
+            _leases[version] -= 1
+            if not _leases[version]:
+                del _leases[version]
+            _released.notify_all()
+
+
+if __name__ == "__main__":
+    # Build (and persist) the index ahead of time
+    warm_up()
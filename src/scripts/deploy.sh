@@ -38,13 +38,20 @@ docker-compose build
 echo "🚀 Starting services..."
 docker-compose up -d
 
-# Wait for services to be ready
+# Wait for services to be ready (the retriever warms up in the background)
 echo "⏳ Waiting for services to start..."
-sleep 10
+for i in $(seq 1 30); do
+    if docker-compose exec -T hospital-chatbot test -f /tmp/hospital_chatbot.ready 2>/dev/null; then
+        break
+    fi
+    curl -s http://localhost:8501/_stcore/script-health-check > /dev/null 2>&1 || true
+    sleep 5
+done
 
 # Check if the service is healthy
 echo "🔍 Checking service health..."
-if curl -f http://localhost:8501/_stcore/health > /dev/null 2>&1; then
+if curl -f http://localhost:8501/_stcore/health > /dev/null 2>&1 && \
+   docker-compose exec -T hospital-chatbot test -f /tmp/hospital_chatbot.ready; then
     echo "✅ Hospital Chatbot is running successfully!"
     echo "🌐 Access the application at: http://localhost:8501"
 else
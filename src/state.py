@@ -1,4 +1,5 @@
-from typing import List, TypedDict, Optional
+import operator
+from typing import Annotated, List, TypedDict, Optional
 
 
 class GraphState(TypedDict):
@@ -7,18 +8,36 @@ class GraphState(TypedDict):
 
     Attributes:
         question: question
+        user_message: the message as the user typed it, when question was rewritten (e.g. with FAQ context)
         generation: LLM generation
         simulated_generation: whether to add simulated generation
         documents: list of documents
-        conversation_history: previous conversation messages for context
+        conversation_history: previous conversation messages; turns are appended, never replaced
+        formatted_history: conversation_history formatted for the prompts, once per turn
+        summary: running summary of the messages older than the verbatim tail
+        summarized_count: how many leading conversation_history messages the summary covers
         generation_retry_count: number of times generation has been retried due to hallucinations
         max_generation_retries: maximum allowed retries for generation (default: 3)
+        datasource: where the router sent the question ("vectorstore" or "simulated_generation")
+        categories: knowledge base categories predicted by the router (empty = search everything)
+        speculation: work done alongside routing this turn (None, "retrieved" or "graded")
+        answered_by: node that produced the final generation ("generate" or "simulated_generate")
+        model_tier: model tier that produced the generation ("fast" or "strong")
     """
 
     question: str
+    user_message: Optional[str]
     generation: str
     simulated_generation: bool
     documents: List[str]
-    conversation_history: Optional[List[dict]]
+    conversation_history: Annotated[List[dict], operator.add]
+    formatted_history: Optional[str]
+    summary: Optional[str]
+    summarized_count: Optional[int]
     generation_retry_count: Optional[int]
     max_generation_retries: Optional[int]
+    datasource: Optional[str]
+    categories: Optional[List[str]]
+    speculation: Optional[str]
+    answered_by: Optional[str]
+    model_tier: Optional[str]
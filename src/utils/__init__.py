@@ -2,9 +2,9 @@
 Utility modules for the Hospital Chatbot Streamlit interface.
 """
 
-from .ui_components import apply_custom_css, stream_response
+from .ui_components import apply_custom_css, render_response
 
 __all__ = [
     "apply_custom_css",
-    "stream_response"
+    "render_response"
 ]
@@ -1,8 +1,8 @@
 import streamlit as st
 from typing import List, Dict, Any
-import time
 import pandas as pd
-from config.settings import FAQ_DATA_FILE
+from config.settings import FAQ_DATA_FILE, SAMPLE_FAQ_QUESTIONS
+from src.normalization import match_question
 
 def get_faq_data() -> Dict[str, str]:
     """Load FAQ data from CSV file."""
@@ -17,7 +17,8 @@ def generate_static_faq_response(faq_question: str, faq_data: Dict[str, str]) ->
     """
     Generate a static response for FAQ using the answer directly from CSV.
     """
-    static_answer = faq_data.get(faq_question, "ليس لدي إجابة محددة لهذا السؤال.")
+    matched_question = match_question(faq_question, faq_data)
+    static_answer = faq_data.get(matched_question, "ليس لدي إجابة محددة لهذا السؤال.")
     
     # Return the answer directly from CSV without adding extra prompts
     return static_answer
@@ -38,11 +39,7 @@ def is_follow_up_to_faq(messages: List[Dict], current_message: str) -> Dict[str,
             
             if (user_msg.get("role") == "user" and 
                 assistant_msg.get("role") == "assistant" and
-                any(faq in user_msg.get("content", "") for faq in [
-                    "كيف يمكنني حجز موعد؟", "ما هي مواعيد الزيارة؟", "هل لديكم صيدلية؟",
-                    "ما هي التأمينات التي تقبلونها؟", "أين يقع المستشفى؟", "ما هي أوقات العمل؟",
-                    "ما هي العيادات المتوفرة؟", "أريد طلب سيارة إسعاف"
-                ])):
+                match_question(user_msg.get("content", ""), SAMPLE_FAQ_QUESTIONS)):
                 
                 return {
                     "faq_question": user_msg.get("content"),
@@ -72,37 +69,11 @@ def create_pipeline_context(faq_question: str, faq_answer: str, user_followup: s
 
 
 
-def stream_response(response: str, placeholder) -> str:
-    """Stream the response text to simulate real-time typing."""
-    
-
-    
-    # Split into lines first to preserve line breaks
-    lines = response.split('\n')
-    full_response = ""
-    
-    # Stream line by line instead of word by word to preserve formatting
-    for line_idx, line in enumerate(lines):
-        for chunk in line.split():
-            full_response += chunk + " "
-            time.sleep(0.05)
-            # Show current progress with preserved line structure and markdown
-            display_content = full_response.replace("\n", "<br>")
-            placeholder.markdown(display_content + "▌", unsafe_allow_html=True)
-        
-        # Add newline after each line (except the last one)
-        if line_idx < len(lines) - 1:
-            full_response += "\n"
-    
-    # Final response without cursor, preserving both newlines and markdown formatting
-    final_text = full_response.strip()
-    
-    # Convert newlines to HTML breaks and use markdown for formatting
-    content_with_breaks = final_text.replace("\n", "<br>")
-    placeholder.empty()
-    placeholder.markdown(content_with_breaks, unsafe_allow_html=True)
-    
-    return final_text
+def render_response(placeholder, text: str, streaming: bool = False) -> str:
+    """Show (partial) response text in a placeholder, with a cursor while tokens are still arriving."""
+    display_content = text.strip().replace("\n", "<br>")
+    placeholder.markdown(display_content + ("▌" if streaming else ""), unsafe_allow_html=True)
+    return text.strip()
 
 
 
@@ -884,18 +855,7 @@ def show_custom_sidebar():
             
             # FAQ section as dropdown
             with st.expander("📋 الأسئلة الشائعة", expanded=False):
-                faq_questions = [
-                    "كيف يمكنني حجز موعد؟",
-                    "ما هي مواعيد الزيارة؟", 
-                    "هل لديكم صيدلية؟",
-                    "أين تقع المستشفى؟",
-                    "ما هي التأمينات التي تقبلونها؟",
-                    "ما هي أوقات العمل؟",
-                    "ما هي العيادات المتوفرة؟",
-                    "أريد طلب سيارة إسعاف"
-                ]
-                
-                for question in faq_questions:
+                for question in SAMPLE_FAQ_QUESTIONS:
                     if st.button(question, key=f"sidebar_faq_{question}", use_container_width=True):
                         # Add the question to chat
                         st.session_state.messages.append({
@@ -1,17 +1,21 @@
 import streamlit as st
+import uuid
 from typing import Dict, Any
-import time
 from dotenv import load_dotenv
-from src.graph import app
+from src.answer_cache import cached_stream_answer
+from src.graph import append_turn, thread_config, thread_history
+from src.kb_watcher import start_kb_watcher
+from src.retriever import start_warm_up
 from src.utils.ui_components import (
     apply_custom_css, 
-    stream_response, 
+    render_response, 
     get_faq_data, 
     generate_static_faq_response,
     is_follow_up_to_faq,
     create_pipeline_context,
     show_custom_sidebar
 )
+from src.normalization import match_question
 from config.settings import (
     STREAMLIT_CONFIG,
     HOSPITAL_INFO,
@@ -27,6 +31,11 @@ load_dotenv()
 # Page configuration
 st.set_page_config(**STREAMLIT_CONFIG)
 
+# Build the retriever in the background; the first RAG question waits for it
+start_warm_up()
+# Rebuild and swap in the index when the knowledge base CSV changes
+start_kb_watcher()
+
 # Apply custom CSS styling
 apply_custom_css()
 
@@ -34,14 +43,21 @@ apply_custom_css()
 show_custom_sidebar()
 
 # Initialize session state
+if "thread_id" not in st.session_state:
+    # The conversation's checkpoint thread; kept in the URL so a reload or restart resumes it
+    st.session_state.thread_id = st.query_params.get("thread") or uuid.uuid4().hex
+    st.query_params["thread"] = st.session_state.thread_id
 if "messages" not in st.session_state:
-    st.session_state.messages = []
+    st.session_state.messages = [
+        {**message, "id": i + 1}
+        for i, message in enumerate(thread_history(thread_config(st.session_state.thread_id)))
+    ]
 if "conversation_count" not in st.session_state:
-    st.session_state.conversation_count = 0
+    st.session_state.conversation_count = len(st.session_state.messages) // 2
 if "user_feedback" not in st.session_state:
     st.session_state.user_feedback = {}
 if "message_counter" not in st.session_state:
-    st.session_state.message_counter = 0
+    st.session_state.message_counter = len(st.session_state.messages)
 if "faq_data" not in st.session_state:
     st.session_state.faq_data = get_faq_data()
 if "pending_faq_response" not in st.session_state:
@@ -87,6 +103,12 @@ if not st.session_state.user_has_interacted and not st.session_state.messages an
 
 # Handle pending FAQ response
 if st.session_state.pending_faq_response:
+    # Static answers skip the graph, so record the turn in the conversation thread directly
+    append_turn(
+        thread_config(st.session_state.thread_id),
+        st.session_state.messages[-1]["content"],
+        st.session_state.pending_faq_response,
+    )
     # Add static response to messages
     st.session_state.message_counter += 1
     st.session_state.messages.append({
@@ -102,19 +124,8 @@ if st.session_state.pending_faq_response:
 if st.session_state.messages:
     last_message = st.session_state.messages[-1]
     if last_message["role"] == "user" and not st.session_state.pending_faq_response:
-        # Check if this is an FAQ question
-        faq_questions = [
-            "كيف يمكنني حجز موعد؟",
-            "ما هي مواعيد الزيارة؟", 
-            "هل لديكم صيدلية؟",
-            "أين تقع المستشفى؟",
-            "ما هي التأمينات التي تقبلونها؟",
-            "ما هي أوقات العمل؟",
-            "ما هي العيادات المتوفرة؟",
-            "أريد طلب سيارة إسعاف"
-        ]
-        
-        if last_message["content"] in faq_questions:
+        # Check if this is an FAQ question (spelling variants included)
+        if match_question(last_message["content"], st.session_state.faq_data):
             # Generate static response for FAQ
             static_response = generate_static_faq_response(last_message["content"], st.session_state.faq_data)
             st.session_state.pending_faq_response = static_response
@@ -158,6 +169,11 @@ if prompt := st.chat_input("اسألني أي شيء عن المستشفى..."):
     st.session_state.message_counter += 1
     st.session_state.messages.append({"role": "user", "content": prompt, "id": st.session_state.message_counter})
     
+    # Typed FAQ questions (or spelling variants of them) take the instant static path
+    if match_question(prompt, st.session_state.faq_data):
+        st.session_state.pending_faq_response = generate_static_faq_response(prompt, st.session_state.faq_data)
+        st.rerun()
+    
     # Display user message
     with st.chat_message("user", avatar="👤"):
         st.markdown(prompt)
@@ -178,24 +194,28 @@ if prompt := st.chat_input("اسألني أي شيء عن المستشفى..."):
                     # Regular question
                     pipeline_input = prompt
                 
-                # Prepare conversation history (exclude current message)
-                conversation_history = [msg for msg in st.session_state.messages[:-1] if msg.get("content")]
-                
-                # Invoke the chatbot
-                result = app.invoke(input={
+                # Run the chatbot, showing answer tokens as the LLM produces them;
+                # repeated standalone questions are answered from the answer cache.
+                # Only the new message is sent: the history lives in the conversation thread
+                message_placeholder = st.empty()
+                response, result = "", {}
+                for event, value in cached_stream_answer({
                     "question": pipeline_input,
-                    "conversation_history": conversation_history,
-                    "generation_retry_count": 0,  # Initialize retry counter
-                    "max_generation_retries": 3   # Set max retries (configurable)
-                })
+                    "user_message": prompt,
+                    "max_generation_retries": LLM_CONFIG["max_generation_retries"]
+                }, thread_config(st.session_state.thread_id), cacheable=not faq_context):
+                    if event == "token":
+                        response += value
+                        render_response(message_placeholder, response, streaming=True)
+                    elif event == "reset":
+                        # The graders rejected the answer streamed so far; a new one follows
+                        response = ""
+                        message_placeholder.empty()
+                    else:
+                        result = value
                 
-                response = result.get("generation", "I'm sorry, I couldn't generate a response. Please try again.")
-                
-
-                
-                # Stream the response
-                message_placeholder = st.empty()
-                full_response = stream_response(response, message_placeholder)
+                response = result.get("generation") or "I'm sorry, I couldn't generate a response. Please try again."
+                full_response = render_response(message_placeholder, response)
                 
                 # Add assistant response to chat history
                 st.session_state.message_counter += 1
@@ -216,6 +236,9 @@ if st.session_state.messages:
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
         if st.button("🗑️ مسح سجل المحادثة", key="clear_chat", type="secondary", use_container_width=True):
+            # Start a new conversation thread; the old one stays in the checkpoint database
+            st.session_state.thread_id = uuid.uuid4().hex
+            st.query_params["thread"] = st.session_state.thread_id
             st.session_state.messages = []
             st.session_state.conversation_count = 0
             st.session_state.user_feedback = {}
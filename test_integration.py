@@ -3,6 +3,7 @@
 Test script to verify hospital chatbot integration
 """
 
+import functools
 import os
 import sys
 from dotenv import load_dotenv
@@ -10,6 +11,24 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
+# Read before any test imports the benchmark fakes, which set a placeholder key
+OPENAI_API_KEY_SET = os.getenv("OPENAI_API_KEY", "sk-placeholder") not in ("", "sk-placeholder")
+SKIPPED = "skipped"
+
+def requires_openai_key(test):
+    """Skip the test when no OpenAI API key is configured, so offline CI runs stay green"""
+    @functools.wraps(test)
+    def wrapper():
+        if OPENAI_API_KEY_SET:
+            return test()
+        print(f"⏭️  Skipping {test.__name__}: OPENAI_API_KEY is not set")
+        if "PYTEST_CURRENT_TEST" in os.environ:
+            import pytest
+            pytest.skip("OPENAI_API_KEY is not set")
+        return SKIPPED
+    return wrapper
+
+@requires_openai_key
 def test_environment():
     """Test that required environment variables are set"""
     print("🔍 Testing environment configuration...")
@@ -29,6 +48,7 @@ def test_environment():
     print("✅ Environment variables configured")
     return True
 
+@requires_openai_key
 def test_imports():
     """Test that all required modules can be imported"""
     print("🔍 Testing imports...")
@@ -56,6 +76,7 @@ def test_imports():
     
     return True
 
+@requires_openai_key
 def test_chatbot():
     """Test the chatbot functionality"""
     print("🔍 Testing chatbot functionality...")
@@ -82,6 +103,126 @@ def test_chatbot():
         print(f"❌ Chatbot test failed: {e}")
         return False
 
+def test_text_normalization():
+    """Test that Arabic spelling variants resolve to the same FAQ entry"""
+    print("🔍 Testing Arabic text normalization...")
+    
+    try:
+        from src.normalization import match_question, normalize_text
+        from config.settings import SAMPLE_FAQ_QUESTIONS
+        
+        if normalize_text("أين تَقَعُ المستشفى؟ ١٢") != normalize_text("اين تقع المستشفي 12"):
+            print("❌ Spelling variants normalize differently")
+            return False
+        
+        if match_question("أين يقع المستشفى؟", SAMPLE_FAQ_QUESTIONS) != "أين تقع المستشفى؟":
+            print("❌ FAQ variant did not match its question")
+            return False
+        
+        if match_question("ما هي مواعيد العمل؟", SAMPLE_FAQ_QUESTIONS) is not None:
+            print("❌ Different question matched an FAQ")
+            return False
+        
+        # An added negation is a different question, however close the spelling
+        for negated in ("لا أريد طلب سيارة إسعاف", "ما هي التأمينات التي لا تقبلونها؟"):
+            if match_question(negated, SAMPLE_FAQ_QUESTIONS) is not None:
+                print(f"❌ Negated question matched an FAQ: {negated}")
+                return False
+        
+        print("✅ Text normalization works")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Text normalization test failed: {e}")
+        return False
+
+def test_offline_retrieval():
+    """Test knowledge base retrieval with the local embedding backend (no API key needed)"""
+    print("🔍 Testing offline retrieval...")
+    
+    try:
+        from src.categories import text_categories
+        from src.embeddings import HashingEmbeddings
+        from src.hybrid_retrieval import DenseRetriever
+        from src.ingestion import sync_vectorstore
+        from src.knowledge_base import iter_documents
+        from src.numpy_store import NumpyVectorStore
+        
+        vectorstore = NumpyVectorStore(HashingEmbeddings())
+        stats = sync_vectorstore(vectorstore, iter_documents())
+        if stats["added"] == 0:
+            print("❌ No documents were indexed")
+            return False
+        
+        documents = vectorstore.as_retriever(search_kwargs={"k": 3}).invoke("ما هي شركات التأمين الصحي المتعاقدة؟")
+        if not any("Insurance" in doc.page_content for doc in documents):
+            print("❌ Insurance question did not retrieve an insurance row")
+            return False
+        
+        # "تامين" inside "فيتامين" is not the insurance keyword
+        if "insurance" in text_categories("كم سعر تحليل فيتامين د؟"):
+            print("❌ Vitamin question was categorised as insurance")
+            return False
+        
+        retriever = DenseRetriever(vectorstore=vectorstore, search_kwargs={"k": 3})
+        documents = retriever.invoke("كم سعر تحليل فيتامين د؟", categories=["lab_radiology"])
+        if not documents or not all(doc.metadata["category_lab_radiology"] for doc in documents):
+            print("❌ Category-filtered search returned rows outside the partition")
+            return False
+        
+        print(f"✅ Offline retrieval works ({stats['added']} rows indexed)")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Offline retrieval test failed: {e}")
+        return False
+
+def test_answer_cache():
+    """Test that a normalised repeat is answered from the answer cache (fake chains, no API key needed)"""
+    print("🔍 Testing answer cache...")
+    
+    had_key = "OPENAI_API_KEY" in os.environ
+    try:
+        # Importing the benchmark fakes sets a placeholder key so the chains can be built
+        from benchmarks.bench_async_graph import fake_chains
+        from src.answer_cache import AnswerCache, cached_invoke
+        from src.embeddings import HashingEmbeddings
+        from src.metrics import metrics
+        from src.normalization import normalize_text
+        import numpy as np
+        
+        class LocalAnswerCache(AnswerCache):
+            """Keys questions with the offline hashing embeddings instead of the configured provider"""
+            
+            @staticmethod
+            def embed(question):
+                vector = np.asarray(HashingEmbeddings().embed_query(normalize_text(question)), dtype=np.float32)
+                return vector / np.linalg.norm(vector)
+        
+        cache = LocalAnswerCache()
+        hits = metrics.snapshot()["counters"].get("answer_cache.hits", 0)
+        with fake_chains():
+            first = cached_invoke({"question": "ما هي شركات التأمين الصحي المتعاقدة؟", "conversation_history": []}, cache=cache)
+            repeat = cached_invoke({"question": "ما هي شركات التامين الصحي المتعاقده", "conversation_history": []}, cache=cache)
+        
+        if first.get("answered_by") != "generate" or len(cache) != 1:
+            print("❌ Knowledge base answer was not stored")
+            return False
+        
+        if metrics.snapshot()["counters"].get("answer_cache.hits", 0) != hits + 1 or repeat["generation"] != first["generation"]:
+            print("❌ Normalised repeat was not answered from the cache")
+            return False
+        
+        print("✅ Answer cache works")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Answer cache test failed: {e}")
+        return False
+    finally:
+        if not had_key:
+            os.environ.pop("OPENAI_API_KEY", None)
+
 def test_streamlit_components():
     """Test Streamlit components"""
     print("🔍 Testing Streamlit components...")
@@ -108,22 +249,29 @@ def main():
         test_environment,
         test_imports,
         test_chatbot,
+        test_text_normalization,
+        test_offline_retrieval,
+        test_answer_cache,
         test_streamlit_components
     ]
     
     passed = 0
+    skipped = 0
     total = len(tests)
     
     for test in tests:
         try:
-            if test():
+            result = test()
+            if result == SKIPPED:
+                skipped += 1
+            elif result:
                 passed += 1
             print()
         except Exception as e:
             print(f"❌ Test {test.__name__} failed with exception: {e}")
             print()
     
-    print(f"📊 Test Results: {passed}/{total} passed")
+    print(f"📊 Test Results: {passed}/{total} passed, {skipped} skipped")
     
     if passed == total:
         print("🎉 All tests passed! The chatbot is ready for deployment.")
@@ -132,6 +280,9 @@ def main():
         print("\n🐳 To deploy with Docker:")
         print("   docker-compose up --build")
         return 0
+    elif passed + skipped == total:
+        print("✅ All offline tests passed. Set OPENAI_API_KEY to run the tests that call OpenAI.")
+        return 0
     else:
         print("❌ Some tests failed. Please fix the issues before deployment.")
         return 1